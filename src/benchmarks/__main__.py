@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+from typing import Optional
+
+from benchmarks.codec import measure_codec
+from benchmarks.corpus import DEFAULT_MIX, CorpusSpec, generate_corpus
+from benchmarks.memory import measure_memory
+from benchmarks.pathological import (
+    CASES,
+    DEFAULT_MAX_EXPONENT,
+    DEFAULT_SIZES,
+    run_pathological,
+)
+from benchmarks.throughput import compare, load_baselines, run_throughput, save_baseline
+
+
+def _mix(value: str) -> dict[str, int]:
+    """Parses `paragraph=6,code=1,...`; kinds that are not named keep their default weight."""
+    mix = dict(DEFAULT_MIX)
+    for item in value.split(","):
+        kind, sep, weight = item.partition("=")
+        if not sep or kind.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"invalid block weight {item!r}")
+        mix[kind.strip()] = int(weight)
+    return mix
+
+
+def _sizes(value: str) -> tuple[int, ...]:
+    try:
+        sizes = tuple(int(size) for size in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid sizes {value!r}") from None
+    if len(set(sizes)) < 2 or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("need at least two different positive sizes")
+    return sizes
+
+
+def _add_corpus_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=4096, help="bytes per page")
+    parser.add_argument("--depth", type=int, default=3, help="directory levels")
+    parser.add_argument(
+        "--fanout", type=int, default=8, help="subdirectories per level"
+    )
+    parser.add_argument(
+        "--mix",
+        type=_mix,
+        default=DEFAULT_MIX,
+        help=f"block weights, e.g. code=3,quote=0 (kinds: {', '.join(DEFAULT_MIX)})",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def _spec(args: argparse.Namespace) -> CorpusSpec:
+    return CorpusSpec(
+        args.pages, args.page_size, args.depth, args.fanout, args.mix, args.seed
+    )
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    corpus = commands.add_parser("corpus", help="write a synthetic content tree")
+    corpus.add_argument("dest")
+    _add_corpus_args(corpus)
+
+    throughput = commands.add_parser(
+        "throughput", help="time full and incremental builds of a synthetic corpus"
+    )
+    _add_corpus_args(throughput)
+    throughput.add_argument("-j", "--jobs", type=int, default=1)
+    throughput.add_argument(
+        "--repeat", type=int, default=1, help="keep the best of N runs"
+    )
+    throughput.add_argument("--baseline", default="bench-baseline.json", metavar="PATH")
+    throughput.add_argument("--save", metavar="NAME", help="store the results as NAME")
+    throughput.add_argument(
+        "--compare", metavar="NAME", help="compare with baseline NAME"
+    )
+
+    memory = commands.add_parser(
+        "memory", help="measure the bytes per node of the parsed corpus"
+    )
+    _add_corpus_args(memory)
+    memory.set_defaults(pages=100)
+
+    codec = commands.add_parser(
+        "codec", help="compare doc_codec with pickle on the parsed corpus"
+    )
+    _add_corpus_args(codec)
+    codec.add_argument("--repeat", type=int, default=3, help="keep the best of N runs")
+    codec.set_defaults(pages=100)
+
+    pathological = commands.add_parser(
+        "pathological", help="check that adversarial inputs parse in linear time"
+    )
+    pathological.add_argument(
+        "--sizes",
+        type=_sizes,
+        default=DEFAULT_SIZES,
+        help=f"comma-separated input sizes (default {','.join(map(str, DEFAULT_SIZES))})",
+    )
+    pathological.add_argument(
+        "--repeat", type=int, default=3, help="keep the best of N runs"
+    )
+    pathological.add_argument(
+        "--max-exponent",
+        type=float,
+        default=DEFAULT_MAX_EXPONENT,
+        help="fail a case whose time grows faster than size**EXPONENT",
+    )
+    pathological.add_argument(
+        "--case",
+        action="append",
+        choices=[case.name for case in CASES],
+        help="run only this case (repeatable)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = _parse_args(argv)
+    if args.command == "pathological":
+        results = run_pathological(
+            args.sizes, args.repeat, args.max_exponent, args.case
+        )
+        for result in results:
+            print(result)
+        failed = [result.case for result in results if not result.ok]
+        if failed:
+            raise SystemExit(f"worse than linear: {', '.join(failed)}")
+        return
+
+    spec = _spec(args)
+    if args.command == "memory":
+        for result in measure_memory(spec):
+            print(result)
+        return
+
+    if args.command == "codec":
+        for result in measure_codec(spec, args.repeat):
+            print(result)
+        return
+
+    if args.command == "corpus":
+        stats = generate_corpus(args.dest, spec)
+        print(
+            f"{stats.pages} pages, {stats.bytes / 1e6:.2f} MB in {os.path.abspath(args.dest)}"
+        )
+        print(json.dumps(stats.blocks))
+        return
+
+    baseline = None
+    if args.compare:
+        baseline = load_baselines(args.baseline).get(args.compare)
+        if baseline is None:
+            raise SystemExit(f"no baseline named {args.compare!r} in {args.baseline}")
+
+    results = run_throughput(spec, args.jobs, args.repeat)
+    for result in results:
+        print(result)
+    if baseline is not None:
+        print(f"compared with {args.compare!r}:")
+        for line in compare(baseline, spec, results):
+            print(f"  {line}")
+    if args.save:
+        save_baseline(args.baseline, args.save, spec, results)
+        print(f"saved baseline {args.save!r} to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import pickle
+import time
+from typing import Callable, NamedTuple, TypeVar
+
+import doc_codec
+from benchmarks.corpus import CorpusSpec, corpus_pages
+from flat_document import flatten_markdown
+from markdown_to_html import markdown_to_html
+
+D = TypeVar("D")
+
+
+class CodecResult(NamedTuple):
+    codec: str
+    documents: int
+    bytes: int
+    # the best of the runs, for every document
+    dumps_seconds: float
+    loads_seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.codec:<12} {self.bytes / 1e6:>8.2f} MB "
+            f"dumps {self.dumps_seconds * 1e3:>8.1f}ms "
+            f"loads {self.loads_seconds * 1e3:>8.1f}ms"
+        )
+
+
+def _pickle(document: object) -> bytes:
+    return pickle.dumps(document, pickle.HIGHEST_PROTOCOL)
+
+
+def _measure(
+    name: str,
+    documents: list[D],
+    dumps: Callable[[D], bytes],
+    loads: Callable[[bytes], object],
+    repeat: int,
+) -> CodecResult:
+    best_dumps = best_loads = float("inf")
+    encoded: list[bytes] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encoded = [dumps(document) for document in documents]
+        best_dumps = min(best_dumps, time.perf_counter() - started)
+        started = time.perf_counter()
+        for data in encoded:
+            loads(data)
+        best_loads = min(best_loads, time.perf_counter() - started)
+    size = sum(len(data) for data in encoded)
+    return CodecResult(name, len(documents), size, best_dumps, best_loads)
+
+
+def measure_codec(
+    spec: CorpusSpec = CorpusSpec(pages=100), repeat: int = 3
+) -> list[CodecResult]:
+    """
+    Encodes and decodes the parsed pages of the corpus, as node trees and as
+    `FlatDocument`s, with pickle and with `doc_codec`.
+    """
+    pages = [markdown for _, markdown in corpus_pages(spec)]
+    trees = [markdown_to_html(markdown) for markdown in pages]
+    flat = [flatten_markdown(markdown) for markdown in pages]
+    return [
+        _measure("pickle tree", trees, _pickle, pickle.loads, repeat),
+        _measure("codec tree", trees, doc_codec.dumps, doc_codec.loads, repeat),
+        _measure("pickle flat", flat, _pickle, pickle.loads, repeat),
+        _measure("codec flat", flat, doc_codec.dumps, doc_codec.loads, repeat),
+    ]
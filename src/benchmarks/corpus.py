@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import random
+from typing import Iterator, NamedTuple, Optional
+
+# relative weights of the block kinds a synthetic page is made of
+DEFAULT_MIX: dict[str, int] = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "code": 1,
+    "quote": 1,
+}
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat duis aute "
+    "irure in reprehenderit voluptate velit esse cillum fugiat nulla pariatur"
+).split()
+
+
+class CorpusSpec(NamedTuple):
+    """The shape of a synthetic content tree."""
+
+    pages: int = 1000
+    page_size: int = 4096  # approximate size of each page in bytes
+    depth: int = 3  # levels of directories below the content root
+    fanout: int = 8  # subdirectories per directory
+    mix: dict[str, int] = DEFAULT_MIX
+    seed: int = 0
+
+
+class CorpusStats(NamedTuple):
+    pages: int
+    bytes: int
+    blocks: dict[str, int]
+
+
+class _PageWriter:
+    """Produces the markdown of one page from a seeded random generator."""
+
+    def __init__(self, rng: random.Random, spec: CorpusSpec, links: list[str]) -> None:
+        self.rng = rng
+        self.spec = spec
+        self.links = links
+        self.kinds = list(spec.mix)
+        self.weights = [spec.mix[kind] for kind in self.kinds]
+
+    def words(self, n: int) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(n))
+
+    def inline(self, n: int) -> str:
+        """`n` words with the occasional bold, italic, code span, link or image."""
+        parts: list[str] = []
+        remaining = n
+        while remaining > 0:
+            take = min(remaining, self.rng.randint(3, 9))
+            remaining -= take
+            text = self.words(take)
+            roll = self.rng.random()
+            if roll < 0.08:
+                text = f"**{text}**"
+            elif roll < 0.14:
+                text = f"_{text}_"
+            elif roll < 0.18:
+                text = f"`{text}`"
+            elif roll < 0.24:
+                text = f"[{text}]({self.rng.choice(self.links)})"
+            elif roll < 0.27:
+                text = f"![{text}](/images/{self.rng.randint(0, 99)}.png)"
+            parts.append(text)
+        return " ".join(parts)
+
+    def block(self, kind: str) -> str:
+        rng = self.rng
+        match kind:
+            case "paragraph":
+                return self.inline(rng.randint(20, 80))
+            case "heading":
+                return f"{'#' * rng.randint(2, 6)} {self.inline(rng.randint(2, 8))}"
+            case "unordered_list":
+                items = rng.randint(2, 8)
+                return "\n".join(
+                    f"- {self.inline(rng.randint(3, 15))}" for _ in range(items)
+                )
+            case "ordered_list":
+                items = rng.randint(2, 8)
+                return "\n".join(
+                    f"{i}. {self.inline(rng.randint(3, 15))}"
+                    for i in range(1, items + 1)
+                )
+            case "code":
+                lines = [
+                    f"    {self.words(rng.randint(2, 8))}"
+                    for _ in range(rng.randint(2, 10))
+                ]
+                return "```\n" + "\n".join(lines) + "\n```"
+            case "quote":
+                lines = rng.randint(1, 5)
+                return "\n".join(
+                    f"> {self.inline(rng.randint(5, 15))}" for _ in range(lines)
+                )
+            case _:
+                raise ValueError(f"unknown block kind {kind!r}")
+
+    def page(self, title: str, counts: dict[str, int]) -> str:
+        blocks = [f"# {title}"]
+        size = len(blocks[0])
+        while size < self.spec.page_size:
+            kind = self.rng.choices(self.kinds, self.weights)[0]
+            counts[kind] = counts.get(kind, 0) + 1
+            block = self.block(kind)
+            blocks.append(block)
+            size += len(block) + 2
+        return "\n\n".join(blocks) + "\n"
+
+
+def page_paths(spec: CorpusSpec) -> list[str]:
+    """
+    The relative directory of every page, spread round-robin over a tree that is
+    `depth` levels deep with `fanout` subdirectories per level.
+    """
+    directories = [""]
+    frontier = [""]
+    for _ in range(spec.depth):
+        frontier = [
+            os.path.join(parent, f"section-{i}")
+            for parent in frontier
+            for i in range(spec.fanout)
+        ]
+        directories.extend(frontier)
+
+    # every page is an index.md in its own directory, like the real content
+    paths: list[str] = []
+    for n in range(spec.pages):
+        parent = directories[n % len(directories)]
+        paths.append(parent if n == 0 else os.path.join(parent, f"page-{n}"))
+    return paths
+
+
+def corpus_pages(
+    spec: CorpusSpec = CorpusSpec(), counts: Optional[dict[str, int]] = None
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields the relative directory and markdown of every page of the corpus,
+    counting the blocks of each kind into `counts`.
+    """
+    if spec.pages < 1:
+        raise ValueError("a corpus needs at least one page")
+    for kind, weight in spec.mix.items():
+        if weight < 0:
+            raise ValueError(f"negative weight for {kind!r}")
+    if not any(spec.mix.values()):
+        raise ValueError("the block mix is empty")
+
+    rng = random.Random(spec.seed)
+    paths = page_paths(spec)
+    links = ["/" + path if path else "/" for path in paths[: min(len(paths), 256)]]
+    writer = _PageWriter(rng, spec, links)
+    if counts is None:
+        counts = {}
+    for n, path in enumerate(paths):
+        yield path, writer.page(f"Page {n}: {writer.words(4)}", counts)
+
+
+def generate_corpus(root: str, spec: CorpusSpec = CorpusSpec()) -> CorpusStats:
+    """
+    Writes `spec.pages` deterministic markdown pages below `root`. The same spec
+    always produces byte-identical files, so builds of it can be compared.
+    """
+    counts: dict[str, int] = {}
+    pages = total = 0
+    for path, markdown in corpus_pages(spec, counts):
+        directory = os.path.join(root, path)
+        os.makedirs(directory, exist_ok=True)
+        data = markdown.encode("utf-8")
+        with open(os.path.join(directory, "index.md"), "wb") as f:
+            f.write(data)
+        pages += 1
+        total += len(data)
+    return CorpusStats(pages, total, dict(sorted(counts.items())))
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from typing import Iterable, NamedTuple
+
+from benchmarks.corpus import CorpusSpec, corpus_pages
+from flat_document import flatten_markdown
+from markdown_to_html import markdown_to_html
+from markdown_to_textnode import text_to_textnodes
+from parse_markdown import scan_blocks
+
+
+class NodeMemory(NamedTuple):
+    kind: str
+    nodes: int
+    # the node objects alone (with their __dict__, if they have one)
+    object_bytes: int
+    # everything allocated for the trees: nodes, children lists, props and text
+    traced_bytes: int
+    # the characters of text the nodes hold
+    text_bytes: int
+
+    @property
+    def object_bytes_per_node(self) -> float:
+        return self.object_bytes / self.nodes if self.nodes else 0.0
+
+    @property
+    def traced_bytes_per_node(self) -> float:
+        return self.traced_bytes / self.nodes if self.nodes else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.kind:<6} {self.nodes:>9} nodes "
+            f"{self.object_bytes_per_node:>7.1f} B/node objects "
+            f"{self.traced_bytes_per_node:>7.1f} B/node traced "
+            f"({self.traced_bytes / max(self.text_bytes, 1):.1f}x the text)"
+        )
+
+
+def _walk(roots: Iterable[object]) -> Iterable[object]:
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(getattr(node, "children", None) or ())
+
+
+def object_size(node: object) -> int:
+    """The bytes of `node` itself, and of its `__dict__` if it has one."""
+    size = sys.getsizeof(node)
+    attributes = getattr(node, "__dict__", None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+    return size
+
+
+def _measure(kind: str, build) -> NodeMemory:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        roots = build()
+        traced, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nodes = objects = text = 0
+    for node in _walk(roots):
+        nodes += 1
+        objects += object_size(node)
+        value = getattr(node, "value", None) or getattr(node, "text", None)
+        text += len(value) if isinstance(value, str) else 0
+    return NodeMemory(kind, nodes, objects, traced, text)
+
+
+def _measure_flat(pages: list[str]) -> NodeMemory:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        documents = [flatten_markdown(markdown) for markdown in pages]
+        traced, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    nodes = sum(len(document) for document in documents)
+    objects = sum(document.nbytes() for document in documents)
+    # mostly spans of the source, which the other trees copy out of it
+    text = sum(sum(document.lengths) for document in documents)
+    return NodeMemory("flat", nodes, objects, traced, text)
+
+
+def measure_memory(spec: CorpusSpec = CorpusSpec(pages=100)) -> list[NodeMemory]:
+    """
+    Builds the html node trees of the corpus's pages, and the inline text nodes
+    of their blocks, and measures what they hold in memory; `flat` is the html
+    trees held as `FlatDocument`s, whose object bytes are those of its arrays.
+    """
+    pages = [markdown for _, markdown in corpus_pages(spec)]
+    blocks = [block.text for markdown in pages for block in scan_blocks(markdown)]
+    return [
+        _measure("html", lambda: [markdown_to_html(markdown) for markdown in pages]),
+        _measure(
+            "text", lambda: [node for b in blocks for node in text_to_textnodes(b)]
+        ),
+        _measure_flat(pages),
+    ]
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, NamedTuple, Optional
+
+from flat_document import flatten_markdown
+from markdown_to_html import render_markdown
+from markdown_to_textnode import split_nodes_image, split_nodes_link, text_to_textnodes
+from parse_markdown import (
+    extract_markdown_images,
+    extract_markdown_links,
+    is_quote,
+    is_unordered_list,
+)
+from textnode import TextNode, TextType
+
+# a linear parser measures close to 1; quadratic ones measure close to 2
+DEFAULT_MAX_EXPONENT = 1.3
+# the largest size is a 100k-line document for the line-based cases
+DEFAULT_SIZES = (6250, 25000, 100000)
+
+
+class Case(NamedTuple):
+    """An adversarial input that grows with `n`, and the parsing step it targets."""
+
+    name: str
+    make: Callable[[int], str]
+    run: Callable[[str], object]
+
+
+class ScalingResult(NamedTuple):
+    case: str
+    sizes: tuple[int, ...]
+    seconds: tuple[float, ...]
+    # the slope of log(seconds) over log(size)
+    exponent: float
+    max_exponent: float
+
+    @property
+    def ok(self) -> bool:
+        return self.exponent <= self.max_exponent
+
+    def __str__(self) -> str:
+        timings = " ".join(f"{s * 1e3:>9.2f}ms" for s in self.seconds)
+        verdict = "ok" if self.ok else f"FAIL (> {self.max_exponent:g})"
+        return f"{self.case:<20} {timings}  n^{self.exponent:.2f} {verdict}"
+
+
+def _links(text: str) -> object:
+    return extract_markdown_links(text), extract_markdown_images(text)
+
+
+def _split(text: str) -> object:
+    return split_nodes_image(split_nodes_link([TextNode(text, TextType.TEXT)]))
+
+
+def _inline(text: str) -> object:
+    return text_to_textnodes(text)
+
+
+def _classify(text: str) -> object:
+    return is_unordered_list(text), is_quote(text)
+
+
+def _render(text: str) -> object:
+    return render_markdown(text)
+
+
+def _flatten(text: str) -> object:
+    return flatten_markdown(text)
+
+
+CASES: tuple[Case, ...] = (
+    Case("unmatched-brackets", lambda n: "[" * n, _links),
+    Case("bang-brackets", lambda n: "![" * n, _links),
+    Case("unclosed-links", lambda n: "[a](" * n, _split),
+    Case("unclosed-images", lambda n: "![a](" * n, _split),
+    Case("broken-links", lambda n: "[a](b\n" * n, _split),
+    Case("inline-brackets", lambda n: "[a](" * n, _inline),
+    Case("bold-runs", lambda n: "**" * n, _inline),
+    Case("unclosed-emphasis", lambda n: "**a _b " * n, _inline),
+    Case("backticks", lambda n: "`" * n, _inline),
+    Case("dash-line", lambda n: "- " * n + "\nx", _classify),
+    Case("long-list", lambda n: "- item **bold** [a](/b)\n" * n, _render),
+    Case("long-quote", lambda n: "> quoted _line_\n" * n, _render),
+    Case(
+        "ordered-list",
+        lambda n: "".join(f"{i}. item\n" for i in range(1, n + 1)),
+        _render,
+    ),
+    Case("many-blocks", lambda n: "a paragraph\n\n" * n, _render),
+    Case("flat-quote", lambda n: "> quoted _line_\n" * n, _flatten),
+    Case("flat-list", lambda n: "- item **bold** [a](/b)\n" * n, _flatten),
+)
+
+
+def _best_time(run: Callable[[str], object], text: str, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(text)
+        best = min(best, time.perf_counter() - started)
+    # timer resolution; a case this fast cannot tell its growth anyway
+    return max(best, 1e-7)
+
+
+def scaling_exponent(sizes: tuple[int, ...], seconds: tuple[float, ...]) -> float:
+    """The least-squares slope of log(seconds) over log(sizes)."""
+    if len(sizes) < 2 or len(sizes) != len(seconds):
+        raise ValueError("need a time for each of at least two sizes")
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(second) for second in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if spread == 0:
+        raise ValueError("the sizes must differ")
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+def measure_case(
+    case: Case,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeat: int = 3,
+    max_exponent: float = DEFAULT_MAX_EXPONENT,
+) -> ScalingResult:
+    """Times `case` at every size, keeping the best of `repeat` runs of each."""
+    inputs = [case.make(size) for size in sizes]
+    seconds = tuple(_best_time(case.run, text, repeat) for text in inputs)
+    exponent = scaling_exponent(sizes, seconds)
+    return ScalingResult(case.name, tuple(sizes), seconds, exponent, max_exponent)
+
+
+def run_pathological(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeat: int = 3,
+    max_exponent: float = DEFAULT_MAX_EXPONENT,
+    names: Optional[list[str]] = None,
+) -> list[ScalingResult]:
+    """
+    Measures how every case (or those in `names`) scales from the smallest
+    size to the largest. A result is not `ok` if its time grows faster than
+    `size ** max_exponent`.
+    """
+    known = {case.name for case in CASES}
+    unknown = sorted(set(names or ()) - known)
+    if unknown:
+        raise ValueError(f"unknown cases: {', '.join(unknown)}")
+    cases = [case for case in CASES if names is None or case.name in names]
+    return [measure_case(case, sizes, repeat, max_exponent) for case in cases]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import NamedTuple, Optional
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+BASELINE_VERSION = 1
+
+TEMPLATE = """<!doctype html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+</head>
+<body>
+    <article>{{ Content }}</article>
+</body>
+</html>
+"""
+
+
+class BenchResult(NamedTuple):
+    scenario: str
+    pages: int
+    bytes: int
+    jobs: int
+    seconds: float
+    peak_rss: int  # bytes, the build process and its workers combined
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / self.seconds / 1e6 if self.seconds else 0.0
+
+    def to_json(self) -> dict:
+        data = self._asdict()
+        data["pages_per_sec"] = self.pages_per_sec
+        data["mb_per_sec"] = self.mb_per_sec
+        return data
+
+    def __str__(self) -> str:
+        return (
+            f"{self.scenario:<12} {self.pages:>7} pages {self.seconds:>8.3f}s "
+            f"{self.pages_per_sec:>10.1f} pages/s {self.mb_per_sec:>8.2f} MB/s "
+            f"peak rss {self.peak_rss / 2**20:>7.1f} MiB"
+        )
+
+
+def _max_rss(who: int) -> int:
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _build(content_dir: str, template: str, dest_dir: str, jobs: int, results) -> None:
+    # imported here so the spawned process pays for it outside the timed region
+    from generate_page import generate_pages_recursive
+
+    started = time.perf_counter()
+    generate_pages_recursive(content_dir, template, dest_dir, "/", jobs=jobs)
+    elapsed = time.perf_counter() - started
+    rss = max(_max_rss(resource.RUSAGE_SELF), _max_rss(resource.RUSAGE_CHILDREN))
+    results.put((elapsed, rss))
+
+
+def measure_build(
+    content_dir: str, template: str, dest_dir: str, jobs: int = 1
+) -> tuple[float, int]:
+    """
+    Builds the site in a fresh interpreter, so peak RSS only covers this build,
+    and returns `(seconds, peak_rss_bytes)`.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=_build, args=(content_dir, template, dest_dir, jobs, results)
+    )
+    process.start()
+    # the result is a couple of numbers, so joining before reading cannot deadlock
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"benchmark build exited with {process.exitcode}")
+    return results.get()
+
+
+def run_throughput(
+    spec: CorpusSpec,
+    jobs: int = 1,
+    repeat: int = 1,
+    workdir: Optional[str] = None,
+) -> list[BenchResult]:
+    """
+    Generates the corpus described by `spec` and times a full build into an empty
+    output directory, then an incremental rebuild with nothing changed. Each
+    scenario keeps the fastest of `repeat` runs.
+    """
+    root = tempfile.mkdtemp(prefix="ssg-bench-", dir=workdir)
+    try:
+        content = os.path.join(root, "content")
+        corpus = generate_corpus(content, spec)
+        template = os.path.join(root, "template.html")
+        with open(template, "w") as f:
+            f.write(TEMPLATE)
+
+        best: dict[str, tuple[float, int]] = {}
+        for _ in range(max(1, repeat)):
+            dest = os.path.join(root, "docs")
+            shutil.rmtree(dest, ignore_errors=True)
+            for scenario in ("full", "incremental"):
+                seconds, rss = measure_build(content, template, dest, jobs)
+                if scenario not in best or seconds < best[scenario][0]:
+                    best[scenario] = (seconds, rss)
+
+        return [
+            BenchResult(scenario, corpus.pages, corpus.bytes, jobs, seconds, rss)
+            for scenario, (seconds, rss) in best.items()
+        ]
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def load_baselines(path: str) -> dict[str, dict]:
+    """Loads the named baselines saved in `path`; missing or foreign files hold none."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != BASELINE_VERSION:
+        return {}
+    return data.get("baselines", {})
+
+
+def save_baseline(
+    path: str, name: str, spec: CorpusSpec, results: list[BenchResult]
+) -> None:
+    baselines = load_baselines(path)
+    baselines[name] = {
+        "spec": spec._asdict(),
+        "results": {result.scenario: result.to_json() for result in results},
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": BASELINE_VERSION, "baselines": baselines}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def compare(baseline: dict, spec: CorpusSpec, results: list[BenchResult]) -> list[str]:
+    """One line per scenario with the change in throughput and peak RSS."""
+    lines: list[str] = []
+    if baseline.get("spec") != spec._asdict():
+        lines.append("warning: the baseline was measured on a different corpus")
+    previous = baseline.get("results", {})
+    for result in results:
+        old = previous.get(result.scenario)
+        if old is None:
+            lines.append(f"{result.scenario:<12} no baseline")
+            continue
+        speed = _change(old["pages_per_sec"], result.pages_per_sec)
+        rss = _change(old["peak_rss"], result.peak_rss)
+        lines.append(
+            f"{result.scenario:<12} pages/s {speed:+.1f}%  peak rss {rss:+.1f}%"
+        )
+    return lines
+
+
+def _change(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+from build_manifest import hash_text
+from cache_store import CacheStore
+from parse_markdown import BlockType
+
+# enough for the boilerplate shared across a site and the blocks of the
+# largest pages, at a few hundred bytes of html each
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def block_key(block: str, block_type: BlockType, variant: str = "") -> str:
+    """
+    The cache key of a block's rendered html: a hash of its markdown and type,
+    and of `variant`, which names anything else the html depends on (like the
+    link rules applied to it).
+    """
+    return hash_text(f"{block_type.value}\0{variant}\0{block}")
+
+
+class BlockCache:
+    """
+    Rendered html fragments of markdown blocks, keyed by `block_key`, with the
+    least recently used entries evicted past `max_entries`. With a `store`,
+    blocks missing from memory are looked up in it and new ones written to it,
+    so they carry over between builds.
+    """
+
+    namespace = "blocks"
+
+    def __init__(
+        self, max_entries: int = DEFAULT_MAX_ENTRIES, store: Optional[CacheStore] = None
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("a block cache must hold at least one entry")
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        # entries put since the last `drain`, handed back from worker processes;
+        # only a worker's copy keeps them (see `start_worker`)
+        self._added: Optional[dict[str, str]] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __repr__(self) -> str:
+        return (
+            f"BlockCache({len(self)}/{self.max_entries} entries, "
+            f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions)"
+        )
+
+    def start_worker(self) -> None:
+        """
+        Readies the copy of a cache a worker process got: its counters start
+        from zero, and the entries put from now on are kept for `drain`.
+        """
+        self._added = {}
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        html = self._entries.get(key)
+        if html is not None:
+            self._entries.move_to_end(key)
+        elif self.store is not None:
+            data = self.store.get(self.namespace, self.store.key(key))
+            if data is not None:
+                html = data.decode("utf-8")
+                self._remember(key, html)
+        if html is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        self._remember(key, html)
+        if self._added is not None:
+            self._added[key] = html
+        if self.store is not None:
+            self.store.put(self.namespace, self.store.key(key), html.encode("utf-8"))
+
+    def _remember(self, key: str, html: str) -> None:
+        self._entries[key] = html
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def drain(self) -> tuple[dict[str, str], int, int]:
+        """
+        Returns, and forgets, the entries put and the hits and misses counted
+        since the last call, for a worker process to hand back with `merge`.
+        """
+        drained = (self._added or {}, self.hits, self.misses)
+        self._added = {} if self._added is not None else None
+        self.hits, self.misses = 0, 0
+        return drained
+
+    def merge(self, entries: dict[str, str], hits: int = 0, misses: int = 0) -> None:
+        """Adds entries rendered elsewhere, like in a worker process."""
+        for key, html in entries.items():
+            self._remember(key, html)
+        self.hits += hits
+        self.misses += misses
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Optional
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Records, for every generated page, the hashes of the inputs it was rendered from.
+    Pages are keyed by their source path relative to the content directory and
+    outputs are stored relative to the directory the manifest lives in.
+    Static assets copied into the output directory are recorded under `assets`,
+    keyed by their path relative to both the static and the output directory,
+    and the compressed sidecars of output files under `sidecars`, keyed by the
+    path of the file they compress.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        pages: Optional[dict[str, dict]] = None,
+        assets: Optional[dict[str, dict]] = None,
+        sidecars: Optional[dict[str, dict]] = None,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self.pages: dict[str, dict] = pages if pages is not None else {}
+        self.assets: dict[str, dict] = assets if assets is not None else {}
+        self.sidecars: dict[str, dict] = sidecars if sidecars is not None else {}
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, root: str) -> BuildManifest:
+        """Loads the manifest in `root`, or returns an empty one if it is missing or unreadable."""
+        manifest = cls(root)
+        try:
+            with open(manifest.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return manifest
+
+        pages = data.get("pages")
+        if isinstance(pages, dict):
+            manifest.pages = pages
+        for section in ("assets", "sidecars"):
+            records = data.get(section)
+            if isinstance(records, dict):
+                setattr(manifest, section, records)
+        return manifest
+
+    def save(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "pages": self.pages,
+            "assets": self.assets,
+            "sidecars": self.sidecars,
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def is_current(self, source: str, inputs: dict[str, str], output: str) -> bool:
+        """True if `source` was last built from exactly `inputs` and its output still exists."""
+        entry = self.pages.get(source)
+        if entry is None or entry.get("output") != output:
+            return False
+        for key, value in inputs.items():
+            if entry.get(key) != value:
+                return False
+        return os.path.isfile(os.path.join(self.root, output))
+
+    def record(
+        self,
+        source: str,
+        inputs: dict[str, str],
+        output: str,
+        written: Optional[tuple[int, str]] = None,
+    ) -> None:
+        """Records a built page; `written` is the `(size, digest)` of its output."""
+        entry: dict = dict(inputs)
+        entry["output"] = output
+        if written is not None:
+            entry["output_size"], entry["output_hash"] = written
+        self.pages[source] = entry
+
+    def output_stamp(self, source: str) -> Optional[tuple[int, str]]:
+        """The `(size, digest)` of the output last written for `source`, if known."""
+        entry = self.pages.get(source)
+        if entry is None or "output_hash" not in entry:
+            return None
+        return entry["output_size"], entry["output_hash"]
+
+    def prune(self, sources: set[str]) -> list[str]:
+        """
+        Drops every page whose source is not in `sources` and returns the outputs
+        that no remaining page writes to.
+        """
+        return self.discard([source for source in self.pages if source not in sources])
+
+    def discard(self, sources: list[str]) -> list[str]:
+        """Drops the given pages and returns the outputs that no remaining page writes to."""
+        removed = [
+            self.pages.pop(source)["output"]
+            for source in sources
+            if source in self.pages
+        ]
+        live = {entry["output"] for entry in self.pages.values()}
+        return sorted({output for output in removed if output not in live})
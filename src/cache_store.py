@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import os
+import sys
+import time
+from typing import Iterator, NamedTuple, Optional
+
+from output_writer import atomic_write
+
+CACHE_STORE_VERSION = 1
+DEFAULT_CACHE_DIR = ".cache"
+DEFAULT_MAX_BYTES = 256 << 20
+
+# temporary files older than this were left behind by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+_GC_LOCK = "gc.lock"
+
+
+@functools.cache
+def generator_hash() -> str:
+    """
+    A hash of the generator's own source files. It is part of every key, so
+    entries written by another version of the generator are never read.
+    """
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(here)):
+        if name.endswith(".py"):
+            with open(os.path.join(here, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read() + b"\0")
+    return digest.hexdigest()
+
+
+class CacheEntry(NamedTuple):
+    namespace: str
+    path: str
+    size: int
+    # the last time the entry was written or read
+    used_ns: int
+
+
+class CacheStats(NamedTuple):
+    entries: int
+    bytes: int
+    namespaces: dict[str, tuple[int, int]]
+
+    def __str__(self) -> str:
+        lines = [f"{self.entries} entries, {_format_bytes(self.bytes)}"]
+        for namespace, (entries, size) in sorted(self.namespaces.items()):
+            size_text = _format_bytes(size)
+            lines.append(f"  {namespace:<12} {entries:>8} entries {size_text:>10}")
+        return "\n".join(lines)
+
+
+def _format_bytes(n: int) -> str:
+    size = float(n)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
+
+
+class CacheStore:
+    """
+    A content-addressed cache directory shared by every build on the machine.
+    Values are bytes, stored in one file per key under `root/<namespace>/`.
+    Writes go to a temporary file that is renamed into place, so concurrent
+    builds never see a partial entry; a lost race only means the same value is
+    written twice. Reading an entry marks it as used, and `gc` deletes the least
+    recently used entries until the store fits in `max_bytes`.
+    """
+
+    def __init__(
+        self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+
+    def __repr__(self) -> str:
+        return f"CacheStore({self.root!r}, max_bytes={self.max_bytes})"
+
+    def key(self, *parts: str) -> str:
+        """
+        The key of a value computed from `parts`. It also covers the store's
+        format version and the generator's source, so changing either one
+        invalidates every entry.
+        """
+        digest = hashlib.sha256()
+        for part in (str(CACHE_STORE_VERSION), generator_hash(), *parts):
+            digest.update(part.encode("utf-8") + b"\0")
+        return digest.hexdigest()
+
+    def _path(self, namespace: str, key: str) -> str:
+        if not namespace or os.sep in namespace or namespace.startswith("."):
+            raise ValueError(f"invalid cache namespace {namespace!r}")
+        return os.path.join(self.root, namespace, key[:2], key[2:])
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # never written, or collected by another build's gc
+            return None
+        return data
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        atomic_write(self._path(namespace, key), data)
+
+    def entries(self) -> Iterator[CacheEntry]:
+        try:
+            namespaces = sorted(os.listdir(self.root))
+        except FileNotFoundError:
+            return
+        for namespace in namespaces:
+            top = os.path.join(self.root, namespace)
+            if namespace.startswith(".") or not os.path.isdir(top):
+                continue
+            for shard in sorted(os.listdir(top)):
+                with os.scandir(os.path.join(top, shard)) as it:
+                    for entry in it:
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        yield CacheEntry(
+                            namespace, entry.path, stat.st_size, stat.st_mtime_ns
+                        )
+
+    def stats(self) -> CacheStats:
+        namespaces: dict[str, tuple[int, int]] = {}
+        for entry in self.entries():
+            if entry.path.endswith(".tmp"):
+                continue
+            count, size = namespaces.get(entry.namespace, (0, 0))
+            namespaces[entry.namespace] = (count + 1, size + entry.size)
+        entries = sum(count for count, _ in namespaces.values())
+        size = sum(size for _, size in namespaces.values())
+        return CacheStats(entries, size, namespaces)
+
+    def gc(self, max_bytes: Optional[int] = None) -> tuple[int, int]:
+        """
+        Deletes the least recently used entries until the store holds at most
+        `max_bytes` (by default the store's own limit), along with temporary
+        files abandoned by crashed writers. Returns how many entries and bytes
+        were removed. If another process is collecting already, does nothing.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, _GC_LOCK), "a") as lock:
+            if not _try_lock(lock):
+                return 0, 0
+
+            stale = time.time_ns() - STALE_TMP_SECONDS * 10**9
+            live: list[CacheEntry] = []
+            removed = freed = 0
+            for entry in self.entries():
+                if entry.path.endswith(".tmp"):
+                    if entry.used_ns < stale and _remove(entry.path):
+                        removed += 1
+                        freed += entry.size
+                else:
+                    live.append(entry)
+
+            total = sum(entry.size for entry in live)
+            live.sort(key=lambda entry: entry.used_ns)
+            for entry in live:
+                if total <= limit:
+                    break
+                total -= entry.size
+                if _remove(entry.path):
+                    removed += 1
+                    freed += entry.size
+        return removed, freed
+
+
+def _try_lock(lock) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        # no advisory locks; collections may overlap, which is only wasteful
+        return True
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cache", description="Inspect or trim the build cache."
+    )
+    parser.add_argument("command", choices=("stats", "gc"))
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR, help="the cache directory")
+    parser.add_argument(
+        "--max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        metavar="MB",
+        help="size to trim the cache to with gc",
+    )
+    args = parser.parse_args(argv)
+
+    store = CacheStore(args.dir, args.max_mb << 20)
+    if args.command == "gc":
+        removed, freed = store.gc()
+        print(f"removed {removed} entries, {_format_bytes(freed)}")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
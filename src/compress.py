@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import gzip
+import os
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+from build_manifest import BuildManifest, hash_bytes
+from get_static import map_bounded
+from output_writer import WriteStats, remove_output, write_if_changed
+
+try:  # the stdlib only ships zstd from python 3.14
+    from compression import zstd  # type: ignore[import-not-found]
+except ImportError:
+    zstd = None
+
+# outputs worth precompressing; images and fonts are compressed already
+TEXT_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml")
+
+# a sidecar is only kept if it is at least this much smaller than the original
+MIN_SAVING = 0.1
+
+COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    # mtime=0 keeps the bytes, and so the sidecar, identical across builds
+    "gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+}
+if zstd is not None:
+    COMPRESSORS["zst"] = lambda data: zstd.compress(data, level=19)
+
+
+def available_formats() -> tuple[str, ...]:
+    return tuple(COMPRESSORS)
+
+
+class CompressStats(WriteStats):
+    """Counts sidecars written, skipped and removed, and those not worth keeping."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.unprofitable = 0
+
+    def __str__(self) -> str:
+        return f"{super().__str__()}, {self.unprofitable} not worth compressing"
+
+
+class _Outcome(NamedTuple):
+    rel: str
+    record: dict
+    written: int
+    skipped: int
+    unprofitable: int
+    removed: int
+
+
+def compress_outputs(
+    public_dir: str,
+    formats: Optional[Sequence[str]] = None,
+    jobs: int = os.cpu_count() or 1,
+    manifest: Optional[BuildManifest] = None,
+    min_saving: float = MIN_SAVING,
+) -> CompressStats:
+    """
+    Writes a `.gz` (and, where the stdlib has it, `.zst`) sidecar next to every
+    text file in `public_dir`, using `jobs` threads (zlib and zstd release the
+    GIL while they work). Files whose content hash matches the last build keep
+    their sidecars; sidecars that would not save at least `min_saving` of the
+    original's size are not written, and stale ones are removed.
+    """
+    formats = tuple(formats) if formats is not None else available_formats()
+    for fmt in formats:
+        if fmt not in COMPRESSORS:
+            raise ValueError(f"compression format {fmt!r} is not available")
+
+    public = os.path.abspath(public_dir)
+    if manifest is None:
+        manifest = BuildManifest.load(public)
+    previous = manifest.sidecars
+
+    def compress(item: tuple[str, os.stat_result]) -> _Outcome:
+        rel, stat = item
+        return compress_file(public, rel, stat, formats, previous.get(rel), min_saving)
+
+    outcomes = map_bounded(compress, text_outputs(public), jobs)
+    return _record_outcomes(public, outcomes, manifest)
+
+
+def refresh_sidecars(
+    public_dir: str,
+    jobs: int = os.cpu_count() or 1,
+    manifest: Optional[BuildManifest] = None,
+    min_saving: float = MIN_SAVING,
+) -> CompressStats:
+    """
+    Keeps the sidecars an earlier `compress_outputs` wrote in step with their
+    outputs, for a build that does not compress: an output rewritten since is
+    compressed again in the formats it had, and a removed one loses its
+    sidecars. Outputs that have never been compressed are left alone.
+    """
+    public = os.path.abspath(public_dir)
+    if manifest is None:
+        manifest = BuildManifest.load(public)
+    previous = manifest.sidecars
+    if not previous:
+        return CompressStats()
+
+    def compress(item: tuple[str, os.stat_result]) -> _Outcome:
+        rel, stat = item
+        record = previous[rel]
+        formats = tuple(fmt for fmt in record.get("formats", []) if fmt in COMPRESSORS)
+        return compress_file(public, rel, stat, formats, record, min_saving)
+
+    outcomes = map_bounded(compress, _recorded_outputs(public, previous), jobs)
+    return _record_outcomes(public, outcomes, manifest)
+
+
+def _recorded_outputs(
+    public: str, records: dict[str, dict]
+) -> Iterator[tuple[str, os.stat_result]]:
+    for rel in sorted(records):
+        try:
+            yield rel, os.stat(os.path.join(public, rel))
+        except FileNotFoundError:
+            continue
+
+
+def _record_outcomes(
+    public: str, outcomes: Iterable[_Outcome], manifest: BuildManifest
+) -> CompressStats:
+    previous = manifest.sidecars
+    stats = CompressStats()
+    records: dict[str, dict] = {}
+    for outcome in outcomes:
+        records[outcome.rel] = outcome.record
+        stats.written += outcome.written
+        stats.skipped += outcome.skipped
+        stats.unprofitable += outcome.unprofitable
+        stats.removed += outcome.removed
+
+    # the outputs of deleted pages and assets leave their sidecars behind
+    for rel in sorted(set(previous) - set(records)):
+        for fmt in previous[rel].get("sidecars", []):
+            if remove_output(public, f"{rel}.{fmt}"):
+                stats.removed += 1
+
+    manifest.sidecars = records
+    manifest.save()
+    return stats
+
+
+def compress_file(
+    public: str,
+    rel: str,
+    stat: os.stat_result,
+    formats: tuple[str, ...],
+    previous: Optional[dict],
+    min_saving: float = MIN_SAVING,
+) -> _Outcome:
+    path = os.path.join(public, rel)
+    # the last build's record, if its sidecars are all there in these formats
+    reusable: Optional[dict] = None
+    if (
+        previous is not None
+        and previous.get("formats") == list(formats)
+        and all(os.path.isfile(f"{path}.{fmt}") for fmt in previous.get("sidecars", []))
+    ):
+        reusable = previous
+    if reusable is not None and (reusable["size"], reusable["mtime_ns"]) == (
+        stat.st_size,
+        stat.st_mtime_ns,
+    ):
+        return _Outcome(rel, reusable, 0, len(formats), 0, 0)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    record = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": hash_bytes(data),
+        "formats": list(formats),
+        "sidecars": [],
+    }
+    if reusable is not None and reusable["hash"] == record["hash"]:
+        # touched but not changed
+        record["sidecars"] = reusable["sidecars"]
+        return _Outcome(rel, record, 0, len(formats), 0, 0)
+
+    written = skipped = unprofitable = removed = 0
+    for fmt in formats:
+        compressed = COMPRESSORS[fmt](data)
+        sidecar = f"{path}.{fmt}"
+        if len(compressed) <= len(data) * (1 - min_saving):
+            if write_if_changed(sidecar, compressed):
+                written += 1
+            else:
+                skipped += 1
+            record["sidecars"].append(fmt)
+        else:
+            unprofitable += 1
+            if os.path.isfile(sidecar):
+                os.remove(sidecar)
+                removed += 1
+
+    for fmt in (previous or {}).get("sidecars", []):
+        # formats that are no longer produced
+        if fmt not in formats and remove_output(public, f"{rel}.{fmt}"):
+            removed += 1
+    return _Outcome(rel, record, written, skipped, unprofitable, removed)
+
+
+def text_outputs(public: str) -> Iterator[tuple[str, os.stat_result]]:
+    """Yields the relative path and stat of every compressible file below `public`."""
+    stack: list[str] = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(public, rel_dir)) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            # dotfiles are the build manifest and in-flight temporary files
+            if entry.name.startswith("."):
+                continue
+            rel = os.path.join(rel_dir, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(rel)
+            elif entry.is_file() and entry.name.endswith(TEXT_EXTENSIONS):
+                yield rel, entry.stat()
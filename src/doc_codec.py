@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from typing import Optional, Union
+
+from flat_document import FlatDocument, name_id, name_of
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
+from html_void_node import VoidNode
+from htmlnode import EMPTY_PROPS, HTMLNode
+
+CODEC_VERSION = 1
+
+_MAGIC = b"SSGD"
+# magic, version, what is encoded
+_HEADER = struct.Struct("<4sHB")
+# a column's typecode and its size in bytes
+_COLUMN = struct.Struct("<cQ")
+_SIZE = struct.Struct("<Q")
+
+# what an encoding holds
+_TREE = 0
+_FLAT = 1
+
+# node classes in a tree, and flags kept with them in the same byte
+_CLASSES: tuple[type[HTMLNode], ...] = (HTMLNode, ParentNode, LeafNode, VoidNode)
+_CLASS_IDS = {cls: i for i, cls in enumerate(_CLASSES)}
+_HAS_PROPS = 0x80
+_NO_CHILDREN = 0x40
+_CLASS_MASK = 0x3F
+
+# integer typecodes from narrowest to widest, unsigned then signed
+_WIDTHS = (("B", "b"), ("H", "h"), ("I", "i"), ("Q", "q"))
+_TYPECODES = frozenset(code for pair in _WIDTHS for code in pair)
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class CodecError(ValueError):
+    """Raised for data that is not an encoding this version of the codec reads."""
+
+
+def dumps(document: Union[HTMLNode, FlatDocument]) -> bytes:
+    """
+    Encodes an `HTMLNode` tree, like those of `markdown_to_html`, or a
+    `FlatDocument`. The encoding is columnar: the nodes' classes, tags, parents
+    and values are arrays of integers, each stored as narrow as its values
+    allow, and the text is a string table that they index (for a tree) or the
+    markdown source that they span (for a flat document).
+    """
+    if isinstance(document, FlatDocument):
+        return _dumps_flat(document)
+    if isinstance(document, HTMLNode):
+        return _dumps_tree(document)
+    raise TypeError(f"cannot encode {type(document).__name__}")
+
+
+def loads(data: bytes) -> Union[HTMLNode, FlatDocument]:
+    """Decodes what `dumps` encoded, into a tree or document equal to it."""
+    reader = _Reader(data)
+    magic, version, kind = reader.unpack(_HEADER)
+    if magic != _MAGIC:
+        raise CodecError("not an encoded document")
+    if version != CODEC_VERSION:
+        raise CodecError(f"encoded with codec version {version}, not {CODEC_VERSION}")
+    if kind == _TREE:
+        document: Union[HTMLNode, FlatDocument] = _loads_tree(reader)
+    elif kind == _FLAT:
+        document = _loads_flat(reader)
+    else:
+        raise CodecError(f"unknown kind of document {kind}")
+    if reader.pos != len(reader.data):
+        raise CodecError("trailing data after the document")
+    return document
+
+
+def _dumps_tree(root: HTMLNode) -> bytes:
+    # every distinct string, by id; id 0 is None
+    ids: dict[Optional[str], int] = {None: 0}
+    kinds: list[int] = []
+    tags: list[int] = []
+    parents: list[int] = []
+    values: list[int] = []
+    attribute_starts = [0]
+    attributes: list[int] = []
+    add_kind, add_tag, add_parent = kinds.append, tags.append, parents.append
+    add_value, add_attribute = values.append, attributes.append
+    class_ids, get_id = _CLASS_IDS, ids.get
+
+    # nodes in document order, each with the index of its parent
+    stack: list[tuple[HTMLNode, int]] = [(root, -1)]
+    push, pop = stack.append, stack.pop
+    while stack:
+        node, parent = pop()
+        cls = class_ids.get(type(node))
+        if cls is None:
+            raise TypeError(f"cannot encode {type(node).__name__} nodes")
+        index = len(kinds)
+        props, children = node.props, node.children
+        if props is not None:
+            cls |= _HAS_PROPS
+            for item in props.items():
+                for string in item:
+                    found = get_id(string)
+                    if found is None:
+                        found = ids[string] = len(ids)
+                    add_attribute(found)
+            attribute_starts.append(len(attributes) // 2)
+        else:
+            attribute_starts.append(attribute_starts[-1])
+        if children is None:
+            cls |= _NO_CHILDREN
+        else:
+            for child in reversed(children):
+                if not isinstance(child, HTMLNode):
+                    raise TypeError(f"cannot encode a {type(child).__name__} child")
+                push((child, index))
+        add_kind(cls)
+        add_parent(parent)
+        tag, value = node.tag, node.value
+        found = get_id(tag)
+        if found is None:
+            found = ids[tag] = len(ids)
+        add_tag(found)
+        found = get_id(value)
+        if found is None:
+            found = ids[value] = len(ids)
+        add_value(found)
+
+    out = [_HEADER.pack(_MAGIC, CODEC_VERSION, _TREE)]
+    _write_strings(out, list(ids)[1:])  # type: ignore[arg-type]
+    columns = (kinds, tags, parents, values, attribute_starts)
+    for column in columns + (attributes[0::2], attributes[1::2]):
+        _write_column(out, column)
+    return b"".join(out)
+
+
+def _loads_tree(reader: _Reader) -> HTMLNode:
+    strings: list = [None]
+    strings.extend(reader.strings())
+    kinds, tags, parents, values = (reader.column() for _ in range(4))
+    attribute_starts, attribute_names, attribute_values = (
+        reader.column() for _ in range(3)
+    )
+    count = len(kinds)
+    if not count or not all(len(c) == count for c in (tags, parents, values)):
+        raise CodecError("the node columns differ in length")
+    if len(attribute_starts) != count + 1 or len(attribute_names) != len(
+        attribute_values
+    ):
+        raise CodecError("the attribute columns differ in length")
+    # tags are interned, as the node constructors would have them
+    for tag in set(tags):
+        if 0 < tag < len(strings):
+            strings[tag] = sys.intern(strings[tag])
+
+    # the nodes were valid when they were encoded, so they are rebuilt
+    # slot by slot rather than checked again by their constructors
+    new, classes = object.__new__, _CLASSES
+    nodes: list[HTMLNode] = []
+    add_node = nodes.append
+    columns = zip(kinds, tags, values, parents)
+    try:
+        for i, (flags, tag, value, parent) in enumerate(columns):
+            node: HTMLNode = new(classes[flags & _CLASS_MASK])
+            node.tag = strings[tag]
+            node.value = strings[value]
+            node.children = None if flags & _NO_CHILDREN else []
+            if flags & _HAS_PROPS:
+                props: dict[str, str] = {}
+                for a in range(attribute_starts[i], attribute_starts[i + 1]):
+                    props[strings[attribute_names[a]]] = strings[attribute_values[a]]
+                node.props = props or EMPTY_PROPS
+            else:
+                node.props = None
+            if i:
+                if not 0 <= parent < i:
+                    raise CodecError(f"node {i} comes before its parent")
+                nodes[parent].children.append(node)  # type: ignore[union-attr]
+            add_node(node)
+    except (IndexError, AttributeError) as e:
+        raise CodecError(f"corrupt node {len(nodes)}: {e}") from None
+    return nodes[0]
+
+
+def _dumps_flat(document: FlatDocument) -> bytes:
+    # tag and attribute name ids are only meaningful in this process,
+    # so every name up to the highest id used goes with the document
+    used = max(max(document.tags, default=0), max(document.attribute_names, default=0))
+
+    out = [_HEADER.pack(_MAGIC, CODEC_VERSION, _FLAT)]
+    _write_strings(out, [name_of(i) for i in range(used + 1)])
+    _write_strings(out, [document.source])
+    _write_strings(out, document.strings)
+    columns = (
+        document.kinds,
+        document.tags,
+        document.parents,
+        document.starts,
+        document.lengths,
+        document.attribute_starts,
+        document.attribute_names,
+        document.attribute_value_starts,
+        document.attribute_value_lengths,
+    )
+    for column in columns:
+        _write_column(out, column)
+    return b"".join(out)
+
+
+def _loads_flat(reader: _Reader) -> FlatDocument:
+    ids = [name_id(name) for name in reader.strings()]
+    renumbered = ids != list(range(len(ids)))
+    source = reader.strings()
+    if len(source) != 1:
+        raise CodecError("a flat document has one source")
+    document = FlatDocument(source[0])
+    document.strings = reader.strings()
+
+    def column(like: array, names: bool = False) -> array:
+        encoded = reader.column()
+        if names and encoded and max(encoded) >= len(ids):
+            raise CodecError("a name is not in the name table")
+        if names and renumbered:
+            # the names were numbered differently in the process that encoded them
+            return array(like.typecode, [ids[i] for i in encoded])
+        if encoded.typecode == like.typecode:
+            return encoded
+        return array(like.typecode, encoded)
+
+    document.kinds = column(document.kinds)
+    document.tags = column(document.tags, names=True)
+    document.parents = column(document.parents)
+    document.starts = column(document.starts)
+    document.lengths = column(document.lengths)
+    document.attribute_starts = column(document.attribute_starts)
+    document.attribute_names = column(document.attribute_names, names=True)
+    document.attribute_value_starts = column(document.attribute_value_starts)
+    document.attribute_value_lengths = column(document.attribute_value_lengths)
+
+    count = len(document.kinds)
+    columns = (document.tags, document.parents, document.starts, document.lengths)
+    if (
+        not all(len(column) == count for column in columns)
+        or len(document.attribute_starts) != count + 1
+    ):
+        raise CodecError("the node columns differ in length")
+    return document
+
+
+def _narrowest(column: Union[array, list[int]]) -> str:
+    """The narrowest integer typecode that holds every value of `column`."""
+    if not column:
+        return "B"
+    low, high = min(column), max(column)
+    for unsigned, signed in _WIDTHS:
+        bits = array(unsigned).itemsize * 8
+        if low >= 0 and high < 1 << bits:
+            return unsigned
+        if low < 0 and -(1 << (bits - 1)) <= low and high < 1 << (bits - 1):
+            return signed
+    raise ValueError("values too large to encode")
+
+
+def _write_column(out: list[bytes], column: Union[array, list[int]]) -> None:
+    typecode = _narrowest(column)
+    if isinstance(column, array) and column.typecode != typecode:
+        # converting from a list is quicker than from another array
+        column = column.tolist()
+    if not isinstance(column, array) or _BIG_ENDIAN:
+        column = array(typecode, column)
+    if _BIG_ENDIAN:
+        column.byteswap()
+    data = column.tobytes()
+    out.append(_COLUMN.pack(typecode.encode(), len(data)))
+    out.append(data)
+
+
+def _write_strings(out: list[bytes], strings: list[str]) -> None:
+    # the strings' lengths, then all of them as one block of utf-8
+    _write_column(out, array("Q", [len(string) for string in strings]))
+    data = "".join(strings).encode("utf-8", "surrogatepass")
+    out.append(_SIZE.pack(len(data)))
+    out.append(data)
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        end = self.pos + layout.size
+        if end > len(self.data):
+            raise CodecError("truncated document")
+        values = layout.unpack_from(self.data, self.pos)
+        self.pos = end
+        return values
+
+    def _bytes(self, size: int) -> memoryview:
+        end = self.pos + size
+        if end > len(self.data):
+            raise CodecError("truncated document")
+        data = self.data[self.pos : end]
+        self.pos = end
+        return data
+
+    def column(self) -> array:
+        typecode, size = self.unpack(_COLUMN)
+        typecode = typecode.decode("latin-1")
+        if typecode not in _TYPECODES:
+            raise CodecError(f"invalid column type {typecode!r}")
+        column = array(typecode)
+        if size % column.itemsize:
+            raise CodecError("truncated column")
+        column.frombytes(self._bytes(size))
+        if _BIG_ENDIAN:
+            column.byteswap()
+        return column
+
+    def strings(self) -> list[str]:
+        lengths = self.column()
+        (size,) = self.unpack(_SIZE)
+        try:
+            text = str(self._bytes(size), "utf-8", "surrogatepass")
+        except UnicodeDecodeError:
+            raise CodecError("the string table is not utf-8") from None
+        if sum(lengths) != len(text) or (lengths and min(lengths) < 0):
+            raise CodecError("the string table does not match its lengths")
+        strings: list[str] = []
+        pos = 0
+        for length in lengths:
+            strings.append(text[pos : pos + length])
+            pos += length
+        return strings
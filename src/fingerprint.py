@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Optional
+
+from build_manifest import BuildManifest, hash_file
+from materialize import Materializer
+from output_writer import remove_output, write_if_changed
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+# hex digits of the content hash kept in fingerprinted names
+HASH_LENGTH = 6
+
+
+def fingerprinted_name(rel: str, digest: str, length: int = HASH_LENGTH) -> str:
+    """`css/index.css` with digest `3f2a1c...` becomes `css/index.3f2a1c.css`."""
+    head, _, name = rel.rpartition("/")
+    stem, ext = os.path.splitext(name)
+    if head:
+        head += "/"
+    return f"{head}{stem}.{digest[:length]}{ext}"
+
+
+def _url_path(rel: str) -> str:
+    return rel.replace(os.sep, "/")
+
+
+def _escapes(rel: str) -> bool:
+    return os.path.isabs(rel) or os.path.normpath(rel).startswith(os.pardir)
+
+
+def load_asset_manifest(public_dir: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(public_dir, ASSET_MANIFEST_NAME)) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def fingerprint_assets(
+    public_dir: str,
+    manifest: Optional[BuildManifest] = None,
+    strategy: str = "auto",
+) -> dict[str, str]:
+    """
+    Gives every static asset synced into `public_dir` a content-hashed copy next
+    to it and writes `asset-manifest.json`, which maps each asset's path to its
+    fingerprinted path (both relative to `public_dir`). Hashed copies of older
+    versions are deleted; the unhashed copies stay for anything linking to them.
+    Hashes are kept in the build manifest and reused while an asset is unchanged.
+    """
+    public = os.path.abspath(public_dir)
+    if manifest is None:
+        manifest = BuildManifest.load(public)
+    materializer = Materializer(strategy)
+    previous = load_asset_manifest(public)
+
+    mapping: dict[str, str] = {}
+    for rel, record in sorted(manifest.assets.items()):
+        path = os.path.join(public, rel)
+        if "hash" not in record:
+            record["hash"] = hash_file(path)
+        name = _url_path(rel)
+        hashed = fingerprinted_name(name, record["hash"])
+        hashed_path = os.path.join(public, hashed)
+        if previous.get(name) != hashed or not os.path.isfile(hashed_path):
+            materializer.materialize(path, hashed_path)
+        mapping[name] = hashed
+
+    live = set(mapping.values())
+    for hashed in sorted(set(previous.values()) - live):
+        # the file is ours to delete only if it is inside public
+        if isinstance(hashed, str) and not _escapes(hashed):
+            remove_output(public, os.path.normpath(hashed))
+
+    data = json.dumps(mapping, indent=1, sort_keys=True).encode("utf-8")
+    write_if_changed(os.path.join(public, ASSET_MANIFEST_NAME), data)
+    manifest.save()
+    return mapping
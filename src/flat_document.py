@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+from array import array
+from typing import Callable, Iterator, Optional
+
+import markdown_to_textnode as md2tn
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
+from html_tags import escape_attribute, tag_markup
+from htmlnode import HTMLNode
+from markdown_to_html import heading_parts, list_item_texts, quote_text
+from parse_markdown import Block, BlockType, scan_blocks
+from textnode import TextNode, TextType
+
+# the kinds of node: an element holding the nodes after it whose parent it is,
+# an element holding only text, and bare text
+ELEMENT = 0
+LEAF = 1
+TEXT = 2
+
+# every tag and attribute name, shared by all documents; id 0, "", is no tag
+_NAMES: list[str] = [""]
+_NAME_IDS: dict[str, int] = {"": 0}
+
+
+def name_id(name: Optional[str]) -> int:
+    """The id of a tag or attribute name in this process."""
+    name = name or ""
+    found = _NAME_IDS.get(name)
+    if found is None:
+        found = _NAME_IDS[name] = len(_NAMES)
+        _NAMES.append(name)
+    return found
+
+
+def name_of(name_id: int) -> str:
+    """The tag or attribute name with id `name_id`, "" for no tag."""
+    return _NAMES[name_id]
+
+
+_INLINE_TAGS = {TextType.BOLD: "b", TextType.ITALIC: "i", TextType.CODE: "code"}
+
+
+class FlatDocument:
+    """
+    A rendered markdown document held in parallel arrays rather than a tree of
+    node objects: node `i` has a kind, a tag, the index of its parent and the
+    span of its text, and its attributes are those from `attribute_starts[i]`
+    up to `attribute_starts[i + 1]`. Nodes are stored in document order, so an
+    element's children follow it.
+
+    A span is an (offset, length) into `source`, the markdown the document was
+    built from; text that does not appear there, like a line of a quote joined
+    to the next, is kept in `strings` and has a negative offset, `-1 - index`.
+
+    `iter_html` renders the arrays directly; `to_tree` builds the equivalent
+    `HTMLNode` tree for code that needs one.
+    """
+
+    __slots__ = (
+        "source",
+        "kinds",
+        "tags",
+        "parents",
+        "starts",
+        "lengths",
+        "attribute_starts",
+        "attribute_names",
+        "attribute_value_starts",
+        "attribute_value_lengths",
+        "strings",
+    )
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.kinds = array("B")
+        self.tags = array("H")
+        self.parents = array("i")
+        self.starts = array("q")
+        self.lengths = array("i")
+        self.attribute_starts = array("i", [0])
+        self.attribute_names = array("H")
+        self.attribute_value_starts = array("q")
+        self.attribute_value_lengths = array("i")
+        self.strings: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __repr__(self) -> str:
+        return f"FlatDocument({len(self)} nodes)"
+
+    def nbytes(self) -> int:
+        """The bytes held by the arrays, not counting the source and `strings`."""
+        arrays = (getattr(self, name) for name in self.__slots__[1:-1])
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def text(self, index: int) -> str:
+        return self._string(self.starts[index], self.lengths[index])
+
+    def tag(self, index: int) -> Optional[str]:
+        return _NAMES[self.tags[index]] or None
+
+    def attributes(self, index: int) -> list[tuple[str, str]]:
+        names = self.attribute_names
+        starts, lengths = self.attribute_value_starts, self.attribute_value_lengths
+        first, last = self.attribute_starts[index], self.attribute_starts[index + 1]
+        return [
+            (_NAMES[names[a]], self._string(starts[a], lengths[a]))
+            for a in range(first, last)
+        ]
+
+    def _string(self, start: int, length: int) -> str:
+        if start < 0:
+            return self.strings[-1 - start]
+        return self.source[start : start + length]
+
+    def _span(self, text: str, cursor: int, limit: int) -> tuple[int, int, int]:
+        """
+        The span of `text`, and where to search for the next one. Text is looked
+        for in `source` between `cursor` and `limit`; any occurrence holds the
+        same characters, so the first is as good as the one it was parsed from.
+
+        Text is looked for by its first line, so text joined across lines, like
+        those of a quote without their `>`, costs no search to `limit`; it is
+        kept in `strings`, and the search moves past each of its lines instead.
+        """
+        if not text:
+            return 0, 0, cursor
+        source = self.source
+        found = source.find(text.partition("\n")[0], cursor, limit)
+        if found == -1:
+            self.strings.append(text)
+            return -len(self.strings), len(text), cursor
+        if source.startswith(text, found, limit):
+            return found, len(text), found + len(text)
+
+        self.strings.append(text)
+        for line in text.split("\n"):
+            found = source.find(line, cursor, limit)
+            if found == -1:
+                break
+            cursor = found + len(line)
+        return -len(self.strings), len(text), cursor
+
+    def rewrite_links(
+        self, rewrite_url: Callable[[str, Optional[str], str], str]
+    ) -> None:
+        """
+        Replaces the value of every `href` and `src` attribute with
+        `rewrite_url(url, tag, attribute)`, like `LinkRewriter.rewrite_url`.
+        """
+        links = {name_id("href"), name_id("src")}
+        owners = self.attribute_starts
+        starts, lengths = self.attribute_value_starts, self.attribute_value_lengths
+        node = 0
+        for a, name in enumerate(self.attribute_names):
+            if name not in links:
+                continue
+            while owners[node + 1] <= a:
+                node += 1
+            url = self._string(starts[a], lengths[a])
+            rewritten = rewrite_url(url, self.tag(node), _NAMES[name])
+            if rewritten != url:
+                self.strings.append(rewritten)
+                starts[a], lengths[a] = -len(self.strings), len(rewritten)
+
+    def iter_html(self) -> Iterator[str]:
+        """
+        Yields the html of the document a fragment at a time, the same html as
+        `to_tree().to_html()`, without creating any nodes.
+        """
+        kinds, tags, parents = self.kinds, self.tags, self.parents
+        starts, lengths = self.starts, self.lengths
+        attribute_starts = self.attribute_starts
+        string = self._string
+        count = len(kinds)
+        # the open elements, innermost last, and their end tags
+        open_elements: list[int] = []
+        end_tags: list[str] = []
+        for i in range(count):
+            parent = parents[i]
+            while open_elements and open_elements[-1] != parent:
+                open_elements.pop()
+                yield end_tags.pop()
+
+            kind = kinds[i]
+            if kind == TEXT:
+                yield string(starts[i], lengths[i])
+                continue
+            markup = tag_markup(_NAMES[tags[i]])
+            if attribute_starts[i] == attribute_starts[i + 1]:
+                start_tag = markup.start
+            else:
+                start_tag = markup.prefix + self._attributes_html(i) + ">"
+            if kind == LEAF:
+                yield start_tag + string(starts[i], lengths[i]) + markup.end
+                continue
+            if i + 1 == count or parents[i + 1] != i:
+                raise ValueError("parent is missing children")
+            yield start_tag
+            open_elements.append(i)
+            end_tags.append(markup.end)
+        while end_tags:
+            yield end_tags.pop()
+
+    def _attributes_html(self, index: int) -> str:
+        attributes = self.attributes(index)
+        return "".join([f' {name}="{escape_attribute(v)}"' for name, v in attributes])
+
+    def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def to_tree(self) -> HTMLNode:
+        """Builds the `HTMLNode` tree of the document, as `markdown_to_html` would."""
+        nodes: list[HTMLNode] = []
+        for i in range(len(self)):
+            props = dict(self.attributes(i)) or None
+            tag = self.tag(i)
+            if self.kinds[i] == ELEMENT:
+                node: HTMLNode = ParentNode(tag, [], props)  # type: ignore[arg-type]
+            else:
+                node = LeafNode(tag, self.text(i), props)
+            nodes.append(node)
+            if self.parents[i] >= 0:
+                nodes[self.parents[i]].children.append(node)  # type: ignore[union-attr]
+        return nodes[0]
+
+
+def flatten_markdown(markdown: str) -> FlatDocument:
+    """
+    Parses `markdown` into a `FlatDocument` holding the tree `markdown_to_html`
+    would build: one `div` per block inside `html` and `body`.
+    """
+    if not isinstance(markdown, str):
+        raise TypeError
+
+    builder = _FlatBuilder(FlatDocument(markdown))
+    body = builder.element("body", builder.element("html", -1))
+    for block in scan_blocks(markdown):
+        builder.block(block, builder.element("div", body))
+    return builder.document
+
+
+class _FlatBuilder:
+    def __init__(self, document: FlatDocument) -> None:
+        self.document = document
+        # text is looked for in the source from `cursor` up to `limit`,
+        # the end of the block being added
+        self.cursor = 0
+        self.limit = 0
+
+    def _add(self, kind: int, tag: Optional[str], parent: int, text: str = "") -> int:
+        doc = self.document
+        start, length, self.cursor = doc._span(text, self.cursor, self.limit)
+        doc.kinds.append(kind)
+        doc.tags.append(name_id(tag))
+        doc.parents.append(parent)
+        doc.starts.append(start)
+        doc.lengths.append(length)
+        doc.attribute_starts.append(doc.attribute_starts[-1])
+        return len(doc.kinds) - 1
+
+    def _add_attribute(self, name: str, span: tuple[int, int]) -> None:
+        doc = self.document
+        doc.attribute_names.append(name_id(name))
+        doc.attribute_value_starts.append(span[0])
+        doc.attribute_value_lengths.append(span[1])
+        doc.attribute_starts[-1] += 1
+
+    def _value_span(self, text: str) -> tuple[int, int]:
+        start, length, self.cursor = self.document._span(text, self.cursor, self.limit)
+        return start, length
+
+    def element(self, tag: str, parent: int) -> int:
+        return self._add(ELEMENT, tag, parent)
+
+    def block(self, block: Block, parent: int) -> None:
+        text = block.text
+        self.cursor, self.limit = block.offset, block.offset + len(text)
+        match block.type:
+            case BlockType.PARAGRAPH:
+                self.inline(text, self.element("p", parent))
+            case BlockType.HEADING:
+                tag, title = heading_parts(text)
+                self.inline(title, self.element(tag, parent))
+            case BlockType.CODE:
+                self._add(LEAF, "code", self.element("pre", parent), text)
+            case BlockType.QUOTE:
+                self.inline(quote_text(text), self.element("blockquote", parent))
+            case BlockType.UNDORDERED_LIST | BlockType.ORDERED_LIST:
+                ordered = block.type is BlockType.ORDERED_LIST
+                items = self.element("ol" if ordered else "ul", parent)
+                for item in list_item_texts(text, ordered):
+                    self.inline(item, self.element("li", items))
+            case _:
+                raise ValueError("invalid block type detected")
+
+    def inline(self, text: str, parent: int) -> None:
+        for node in md2tn.text_to_textnodes(text):
+            self.text_node(node, parent)
+
+    def text_node(self, node: TextNode, parent: int) -> None:
+        text_type = node.text_type
+        if node.children:
+            if text_type is not TextType.BOLD and text_type is not TextType.ITALIC:
+                raise ValueError(f"{text_type} spans cannot be nested")
+            element = self.element(_INLINE_TAGS[text_type], parent)
+            for child in node.children:
+                self.text_node(child, element)
+        elif text_type is TextType.TEXT:
+            self._add(TEXT, None, parent, node.text)
+        elif text_type in _INLINE_TAGS:
+            self._add(LEAF, _INLINE_TAGS[text_type], parent, node.text)
+        elif text_type is TextType.LINK:
+            if not node.url:
+                raise ValueError("links must have a url")
+            self._add(LEAF, "a", parent, node.text)
+            self._add_attribute("href", self._value_span(node.url))
+        elif text_type is TextType.IMAGE:
+            if not node.url:
+                raise ValueError("images must have a url")
+            self._add(LEAF, "img", parent)
+            # the alt text comes first in the source
+            alt = self._value_span(node.text)
+            self._add_attribute("src", self._value_span(node.url))
+            self._add_attribute("alt", alt)
+        else:
+            raise ValueError(f"invalid TextType {text_type = }")
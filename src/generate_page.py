@@ -1,10 +1,137 @@
+import argparse
 import os
-from sys import argv
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from typing import Callable, Iterator, NamedTuple, Optional, Union
 
-from get_static import get_static_assets
-from markdown_to_html import markdown_to_html
-from parse_markdown import extract_title
+import profiler
+from block_cache import DEFAULT_MAX_ENTRIES, BlockCache
+from build_manifest import BuildManifest, hash_bytes, hash_file
+from cache_store import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, CacheStore
+from compress import available_formats, compress_outputs, refresh_sidecars
+from fingerprint import fingerprint_assets
+from get_static import DEFAULT_CONCURRENCY, get_static_assets
+from link_rewriter import (
+    BasepathRule,
+    CdnRule,
+    FingerprintRule,
+    LinkRewriter,
+    LinkRule,
+    TrailingSlashRule,
+)
+from markdown_to_html import DEFAULT_TIME_BUDGET, render_markdown, stream_markdown
+from materialize import AUTO_ORDER, STRATEGIES
+from minify import HTMLMinifier, MinifyOptions, minify_html
+from output_writer import (
+    FileStamp,
+    StreamingOutput,
+    WriteStats,
+    remove_output,
+    write_if_changed,
+)
+from parse_markdown import (
+    extract_title,
+    find_title,
+    iter_blocks,
+    read_front_matter,
+    split_front_matter,
+)
+from template_engine import Template, load_template, resolve_layout
+
+
+def render_page(
+    md: str,
+    html_template_file: str,
+    links: LinkRewriter,
+    minify: Optional[MinifyOptions] = None,
+    cache: Optional[BlockCache] = None,
+    time_budget: Optional[float] = None,
+) -> str:
+    """
+    Renders a markdown document into its template: `html_template_file`,
+    or the layout named in the document's front matter. With `minify`, the
+    page is minified as it is rendered. With `cache`, blocks rendered before
+    (on this page or any other) are not rendered again. With `time_budget`,
+    rendering the markdown is aborted after that many seconds.
+    """
+    meta, body = split_front_matter(md)
+    with profiler.stage("template"):
+        template = page_template(html_template_file, meta)
+        template = template.map_literals(("links", links.key), links.rewrite_html)
+    context = dict(meta)
+    context["Content"] = render_markdown(
+        body, cache, links.rewrite_tree, links.digest, time_budget
+    )
+    context["Title"] = meta.get("title") or extract_title(body)
+    with profiler.stage("template"):
+        html = template.render(context)
+    if minify is None:
+        return html
+    with profiler.stage("minify"):
+        return minify_html(html, minify)
+
+
+def stream_page(
+    source_path: str,
+    html_template_file: str,
+    links: LinkRewriter,
+    write: Callable[[str], object],
+    minify: Optional[MinifyOptions] = None,
+    cache: Optional[BlockCache] = None,
+    time_budget: Optional[float] = None,
+) -> None:
+    """
+    Renders the markdown file at `source_path` to the same html as `render_page`,
+    handing it to `write` a piece at a time. The document is read a block at a
+    time and each block is written as soon as it is rendered, so memory is
+    bounded by the largest block rather than the document. Without a title in
+    its front matter, the file is read once more to find its title first.
+    """
+    with open(source_path) as f:
+        meta = read_front_matter(f)
+        title = meta.get("title") or find_title(iter_blocks(f))
+    if not title:
+        raise ValueError("The markdown is missing a title")
+    with profiler.stage("template"):
+        template = page_template(html_template_file, meta)
+        template = template.map_literals(("links", links.key), links.rewrite_html)
+
+    minifier = HTMLMinifier(minify) if minify is not None else None
+
+    def emit(html: str) -> None:
+        write(minifier.feed(html) if minifier is not None else html)
+
+    def content() -> None:
+        with open(source_path) as f:
+            read_front_matter(f)
+            blocks = iter_blocks(f)
+            rewrite, variant = links.rewrite_tree, links.digest
+            stream_markdown(blocks, emit, cache, rewrite, variant, time_budget)
+
+    context = dict(meta)
+    context["Title"] = title
+    template.stream(context, emit, "Content", content)
+    if minifier is not None:
+        write(minifier.close())
+
+
+def page_template(html_template_file: str, meta: dict[str, str]) -> Template:
+    return load_template(resolve_layout(html_template_file, meta.get("layout")))
+
+
+def write_page(
+    html_dest_dir: str, html: str, previous: Optional[FileStamp] = None
+) -> tuple[bool, FileStamp]:
+    """
+    Writes `html` to `index.html` in `html_dest_dir`, unless the file already holds it.
+    Returns whether the file was written and the stamp of its contents.
+    """
+    html_dest_full_path: str = os.path.abspath(html_dest_dir)
+    dest_full_path = os.path.join(html_dest_full_path, "index.html")
+
+    data = html.encode("utf-8")
+    stamp = FileStamp.of(data)
+    return write_if_changed(dest_full_path, data, stamp, previous), stamp
 
 
 def generate_page(
@@ -13,35 +140,180 @@ def generate_page(
     html_dest_dir: str,
     basepath: str,
 ):
-    # print(
-    #     f"Generating page from {from_md_file} to {html_dest_dir} using {html_template_file}"
-    # )
-
     md_full_path: str = os.path.abspath(from_md_file)
-    template_full_path: str = os.path.abspath(html_template_file)
-    html_dest_full_path: str = os.path.abspath(html_dest_dir)
 
     with open(md_full_path) as f:
         md = f.read()
 
-    with open(template_full_path) as f:
-        template = f.read()
+    links = LinkRewriter.for_basepath(basepath)
+    write_page(html_dest_dir, render_page(md, html_template_file, links))
 
-    html_nodes = markdown_to_html(md)
-    html_content = html_nodes.to_html()
-    title = extract_title(md)
-    html = template.replace("{{ Title }}", title)
-    html = html.replace("{{ Content }}", html_content)
-    html = html.replace('href="/', f'href="{basepath}')
-    html = html.replace('src="/', f'src="{basepath}')
 
-    # if not os.path.exists(dest_full_path):
-    os.makedirs(html_dest_full_path, exist_ok=True)
+class PageBuildError(ValueError):
+    """Raised once a build has finished if any page failed to render."""
+
+    def __init__(self, failures: list[tuple[str, str]]) -> None:
+        self.failures = sorted(failures)
+        lines = [f"{len(self.failures)} page(s) failed to build:"]
+        lines += [f"  {source}: {error}" for source, error in self.failures]
+        super().__init__("\n".join(lines))
+
+
+class StreamedPage(NamedTuple):
+    """A page a worker streamed straight to its output file."""
+
+    written: bool
+    stamp: FileStamp
 
-    dest_full_path = os.path.join(html_dest_full_path, "index.html")
 
-    with open(dest_full_path, "w") as f:
-        f.write(html)
+# markdown files this large (in bytes) are streamed to their output
+DEFAULT_STREAM_THRESHOLD = 16 << 20
+
+
+class _PageJob(NamedTuple):
+    source: str
+    source_path: str
+    dest_dir: str
+    output: str
+    inputs: dict[str, str]
+    # (output path, recorded stamp) for a page streamed to its output
+    stream_to: Optional[tuple[str, Optional[FileStamp]]] = None
+
+
+# the block cache of a worker process, a copy of the building process's
+_worker_cache: Optional[BlockCache] = None
+
+
+def _init_worker(template_path: str, cache: Optional[BlockCache] = None) -> None:
+    global _worker_cache
+    # compile the default template once per worker; layouts are cached on first use
+    load_template(template_path)
+    if cache is not None:
+        cache.start_worker()
+    _worker_cache = cache
+
+
+def _render_chunk(
+    jobs: list[
+        tuple[
+            str,
+            str,
+            LinkRewriter,
+            Optional[MinifyOptions],
+            Optional[float],
+            Optional[tuple[str, Optional[FileStamp]]],
+        ]
+    ],
+) -> tuple[
+    list[tuple[Union[str, StreamedPage, None], Optional[str]]],
+    tuple[dict[str, str], int, int],
+]:
+    results = [_render_source(*job, cache=_worker_cache) for job in jobs]
+    # hand the blocks these pages rendered back, for the building process's cache
+    drained = _worker_cache.drain() if _worker_cache is not None else ({}, 0, 0)
+    return results, drained
+
+
+def _render_source(
+    source_path: str,
+    template_path: str,
+    links: LinkRewriter,
+    minify: Optional[MinifyOptions] = None,
+    time_budget: Optional[float] = None,
+    stream_to: Optional[tuple[str, Optional[FileStamp]]] = None,
+    cache: Optional[BlockCache] = None,
+) -> tuple[Union[str, StreamedPage, None], Optional[str]]:
+    """
+    Returns `(html, None)` on success and `(None, error)` if the page cannot be rendered.
+    With `stream_to`, the page is streamed to that output path instead, and a
+    `StreamedPage` is returned in place of its html.
+    """
+    try:
+        with profiler.page(source_path):
+            if time_budget is not None:
+                time_budget = page_time_budget(
+                    time_budget, os.path.getsize(source_path)
+                )
+            if stream_to is not None:
+                path, previous = stream_to
+                with StreamingOutput(path, previous) as out:
+                    stream_page(
+                        source_path,
+                        template_path,
+                        links,
+                        out.write,
+                        minify,
+                        cache,
+                        time_budget,
+                    )
+                assert out.result is not None
+                return StreamedPage(*out.result), None
+            with profiler.stage("read"):
+                with open(source_path) as f:
+                    md = f.read()
+            return (
+                render_page(md, template_path, links, minify, cache, time_budget),
+                None,
+            )
+    except Exception as e:
+        details = [line for line in str(e).splitlines() if line.strip()]
+        summary = details[0].strip(" =-") if details else ""
+        return None, f"{type(e).__name__}: {summary}"
+
+
+def page_time_budget(time_budget: float, size: int) -> float:
+    """
+    The time budget of a page whose markdown is `size` bytes: `time_budget`
+    seconds per MiB, and never less than `time_budget`. Rendering takes time
+    linear in the size of a page, so large pages get a budget to match.
+    """
+    return time_budget * max(1.0, size / (1 << 20))
+
+
+def _render_pages(
+    source_paths: list[str],
+    template_path: str,
+    links: LinkRewriter,
+    jobs: int,
+    minify: Optional[MinifyOptions] = None,
+    cache: Optional[BlockCache] = None,
+    time_budget: Optional[float] = None,
+    stream_to: Optional[list[Optional[tuple[str, Optional[FileStamp]]]]] = None,
+) -> Iterator[tuple[int, Union[str, StreamedPage, None], Optional[str]]]:
+    """
+    Renders every source across `jobs` worker processes, yielding the
+    `(index, html, error)` of each as soon as its chunk of sources is done, so
+    only the pages not yet handled by the caller are held in memory. Workers
+    start from a copy of `cache`, and the blocks they render are added to it.
+    Sources with an entry in `stream_to` are streamed to their output.
+    """
+    if stream_to is None:
+        stream_to = [None] * len(source_paths)
+    work = [
+        (path, template_path, links, minify, time_budget, stream)
+        for path, stream in zip(source_paths, stream_to)
+    ]
+    if jobs <= 1 or len(source_paths) <= 1:
+        for index, job in enumerate(work):
+            yield (index, *_render_source(*job, cache=cache))
+        return
+
+    chunksize = max(1, len(work) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(template_path, cache)
+    ) as pool:
+        chunks = {
+            pool.submit(_render_chunk, work[start : start + chunksize]): start
+            for start in range(0, len(work), chunksize)
+        }
+        for future in as_completed(chunks):
+            # dropping the future frees its pages once they are handed over
+            start = chunks.pop(future)
+            results, drained = future.result()
+            if cache is not None:
+                cache.merge(*drained)
+            for offset, (html, error) in enumerate(results):
+                yield start + offset, html, error
 
 
 def generate_pages_recursive(
@@ -49,7 +321,36 @@ def generate_pages_recursive(
     html_template_file: str,
     html_dest_dir: str,
     basepath: str,
-) -> None:
+    manifest: Optional[BuildManifest] = None,
+    jobs: int = 1,
+    links: Optional[LinkRewriter] = None,
+    minify: Optional[MinifyOptions] = None,
+    cache: Optional[BlockCache] = None,
+    time_budget: Optional[float] = None,
+    stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+) -> WriteStats:
+    """
+    Renders every `.md` file under `from_md_dir` into `html_dest_dir`.
+    Pages whose source, template (or layout) and link rules are unchanged since the last
+    build (according to the build manifest in `html_dest_dir`) are skipped, and outputs
+    whose sources have been removed are deleted.
+
+    `links` rewrites every `href`/`src`; by default root-relative urls are prefixed
+    with `basepath`. `minify` minifies the pages as they are rendered.
+    `cache` holds the html of rendered blocks; by default a new one is used
+    for the build, so blocks shared by several pages are rendered once.
+    A page whose markdown takes longer than `time_budget` seconds per MiB
+    (see `page_time_budget`) to render fails instead of stalling the build.
+    Sources of `stream_threshold` bytes or more are streamed to their output
+    a block at a time (see `stream_page`).
+
+    With `jobs` > 1 the pages are rendered across that many worker processes.
+    Every page is attempted either way; failures are reported together, sorted
+    by source path, in a `PageBuildError` once the build has finished.
+
+    Outputs are only rewritten when their bytes change. Returns how many pages
+    were written, skipped and removed.
+    """
     if not (
         isinstance(from_md_dir, str)
         and isinstance(html_template_file, str)
@@ -64,31 +365,166 @@ def generate_pages_recursive(
         raise ValueError("one of the supplied paths does not exist")
 
     visited: set = set()
+    pages: list[tuple[str, str]] = []
     md_content_dir: str = os.path.abspath(from_md_dir)
     html_template_file: str = os.path.abspath(html_template_file)
     html_output_directory: str = os.path.abspath(html_dest_dir)
-    dfs_visit(
-        md_content_dir, html_template_file, html_output_directory, visited, basepath
+    dfs_visit(md_content_dir, html_output_directory, visited, pages)
+
+    if manifest is None:
+        manifest = BuildManifest.load(html_output_directory)
+    if links is None:
+        links = LinkRewriter.for_basepath(basepath)
+    if cache is None:
+        cache = BlockCache()
+
+    stats, failures = build_pages(
+        pages,
+        md_content_dir,
+        html_template_file,
+        manifest,
+        links,
+        jobs,
+        minify,
+        cache,
+        time_budget,
+        stream_threshold,
+    )
+
+    sources = {os.path.relpath(path, md_content_dir) for path, _ in pages}
+    for output in manifest.prune(sources):
+        if remove_output(html_output_directory, output):
+            stats.removed += 1
+
+    manifest.save()
+
+    if failures:
+        raise PageBuildError(failures)
+    return stats
+
+
+def build_pages(
+    pages: list[tuple[str, str]],
+    md_content_dir: str,
+    html_template_file: str,
+    manifest: BuildManifest,
+    links: LinkRewriter,
+    jobs: int = 1,
+    minify: Optional[MinifyOptions] = None,
+    cache: Optional[BlockCache] = None,
+    time_budget: Optional[float] = None,
+    stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+) -> tuple[WriteStats, list[tuple[str, str]]]:
+    """
+    Renders the `(markdown file, destination dir)` pages whose inputs changed since
+    they were recorded in `manifest`, and records them. Returns the write stats and
+    the `(source, error)` of every page that failed. The manifest is not saved.
+    """
+    pending: list[_PageJob] = []
+    for source_path, dest_dir in pages:
+        source = os.path.relpath(source_path, md_content_dir)
+        output = os.path.relpath(os.path.join(dest_dir, "index.html"), manifest.root)
+        stream = stream_threshold is not None and (
+            os.path.getsize(source_path) >= stream_threshold
+        )
+        data: Optional[bytes] = None
+        if stream:
+            source_hash = hash_file(source_path)
+        else:
+            with open(source_path, "rb") as f:
+                data = f.read()
+            source_hash = hash_bytes(data)
+        inputs = {
+            "source": source_hash,
+            "template": _page_template_digest(html_template_file, source_path, data),
+            "links": links.digest,
+            "minify": minify.key if minify is not None else "",
+        }
+        if not manifest.is_current(source, inputs, output):
+            stream_to = None
+            if stream:
+                previous = manifest.output_stamp(source)
+                stream_to = (
+                    os.path.join(os.path.abspath(dest_dir), "index.html"),
+                    FileStamp(*previous) if previous else None,
+                )
+            pending.append(
+                _PageJob(source, source_path, dest_dir, output, inputs, stream_to)
+            )
+
+    rendered = _render_pages(
+        [job.source_path for job in pending],
+        html_template_file,
+        links,
+        jobs,
+        minify,
+        cache,
+        time_budget,
+        [job.stream_to for job in pending],
     )
 
+    stats = WriteStats()
+    stats.skipped = len(pages) - len(pending)
+    failures: list[tuple[str, str]] = []
+    for index, html, error in rendered:
+        job = pending[index]
+        if html is None:
+            failures.append((job.source, error or "unknown error"))
+            continue
+        if isinstance(html, StreamedPage):
+            written, stamp = html
+        else:
+            previous = manifest.output_stamp(job.source)
+            with profiler.page(job.source_path), profiler.stage("write"):
+                written, stamp = write_page(
+                    job.dest_dir, html, FileStamp(*previous) if previous else None
+                )
+        profiler.count("pages")
+        if written:
+            profiler.count("bytes_written", stamp.size)
+            stats.written += 1
+        else:
+            stats.skipped += 1
+        manifest.record(job.source, job.inputs, job.output, stamp)
+    return stats, failures
+
+
+def _page_template_digest(
+    html_template_file: str, source_path: str, data: Optional[bytes]
+) -> str:
+    """
+    The digest of the template (or layout) the page at `source_path` renders
+    with, or "" if its front matter or layout is broken, for the render to
+    report. `data` is the page's markdown, if it has been read already;
+    otherwise only the front matter is read.
+    """
+    try:
+        if data is None:
+            with open(source_path, encoding="utf-8", errors="replace") as f:
+                meta = read_front_matter(f)
+        else:
+            meta, _ = split_front_matter(data.decode("utf-8", errors="replace"))
+        return page_template(html_template_file, meta).digest
+    except (OSError, ValueError):
+        return ""
+
 
 def dfs_visit(
     current_source_dir: str,
-    template_path: str,
     dest_dir: str,
     visited: set,
-    basepath: str,
+    jobs: list[tuple[str, str]],
 ):
+    """Collects a `(markdown file, destination dir)` job for every page below `current_source_dir`."""
     stack: list[str] = []
     visited.add(current_source_dir)
 
-    # Copy all the files in current_source_dir to dest_dir
-    for fso_name in os.listdir(current_source_dir):
+    for fso_name in sorted(os.listdir(current_source_dir)):
         item_path = os.path.join(current_source_dir, fso_name)
         if os.path.isfile(item_path):
-            # item_path is a file, so make an html page in the destimation
+            # item_path is a file, so it becomes an html page in the destination
             if os.path.splitext(item_path)[1] == ".md":
-                generate_page(item_path, template_path, dest_dir, basepath)
+                jobs.append((item_path, dest_dir))
         else:
             # item path is a dir, so put it on the stack and create the dest dir
             stack.append(item_path)
@@ -99,23 +535,293 @@ def dfs_visit(
         dir_name = os.path.basename(next_source_dir)
         new_dest_dir = os.path.join(dest_dir, dir_name)
         next_source_dir_path = os.path.join(current_source_dir, next_source_dir)
-        dfs_visit(next_source_dir_path, template_path, new_dest_dir, visited, basepath)
+        dfs_visit(next_source_dir_path, new_dest_dir, visited, jobs)
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the site from content/.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="wipe the output directory and rebuild every page",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static assets by content instead of size and modification time",
+    )
+    parser.add_argument(
+        "--materialize",
+        choices=STRATEGIES,
+        default="auto",
+        help="how static assets are copied; auto tries each in turn "
+        f"({', '.join(AUTO_ORDER)})",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="write content-hashed copies of static assets and link pages to them",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify pages as they are rendered, and css files as they are synced",
+    )
+    parser.add_argument(
+        "--omit-optional-tags",
+        action="store_true",
+        help="also leave out end tags html does not need, like </li> (implies --minify)",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write precompressed .gz (and .zst, where available) copies of text outputs",
+    )
+    parser.add_argument(
+        "--compress-jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="threads compressing outputs",
+    )
+    parser.add_argument(
+        "--static-jobs",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        metavar="N",
+        help="threads copying static assets",
+    )
+    parser.add_argument(
+        "--static-report",
+        action="store_true",
+        help="print copy throughput and the slowest static assets",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        metavar="DIR",
+        help="keep rendered blocks and minified css in DIR between builds "
+        "(see `main.py cache stats|gc`)",
+    )
+    parser.add_argument(
+        "--cache-limit",
+        type=int,
+        default=DEFAULT_MAX_BYTES >> 20,
+        metavar="MB",
+        help="size the cache directory is trimmed to after a build",
+    )
+    parser.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        metavar="N",
+        help="most rendered blocks kept in the block cache",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=DEFAULT_TIME_BUDGET,
+        metavar="SECONDS",
+        help="fail a page whose markdown takes longer than this per MB to render "
+        "(0 for no limit)",
+    )
+    parser.add_argument(
+        "--stream-mb",
+        type=int,
+        default=DEFAULT_STREAM_THRESHOLD >> 20,
+        metavar="MB",
+        help="stream pages whose markdown is at least this large to disk, "
+        "a block at a time",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="render pages across N worker processes (0 uses every cpu)",
+    )
+    parser.add_argument(
+        "--cdn",
+        metavar="HOST",
+        help="serve images from HOST, e.g. https://cdn.example.com",
+    )
+    parser.add_argument(
+        "--trailing-slash",
+        choices=("add", "strip"),
+        help="add or strip the trailing slash on internal page links",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and rebuild whatever changes",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build-profile.json",
+        metavar="PATH",
+        help="time every build stage and page and write a JSON report to PATH",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of slowest pages to list with --profile",
+    )
+    args = parser.parse_args(argv)
+    if args.watch and (args.profile or args.static_report):
+        parser.error("--profile and --static-report describe one build, not --watch")
+    args.minify = args.minify or args.omit_optional_tags
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    if args.time_budget <= 0:
+        args.time_budget = None
+    return args
+
+
+def _link_rewriter(
+    args: argparse.Namespace, fingerprints: Optional[dict[str, str]] = None
+) -> LinkRewriter:
+    rules: list[LinkRule] = []
+    # fingerprints look up the root-relative path the page wrote, so they go first
+    if fingerprints:
+        rules.append(FingerprintRule(fingerprints))
+    if args.trailing_slash:
+        rules.append(TrailingSlashRule(args.trailing_slash))
+    if args.cdn:
+        rules.append(CdnRule(args.cdn))
+    rules.append(BasepathRule(args.basepath))
+    return LinkRewriter(rules)
 
 
-def main():
-    # content = "static"
-    # template = "template.html"
-    # dest = "public"
-    # basepath =
-    # generate_pages_recursive(content, template, dest, basepath)
+def _minify_options(args: argparse.Namespace) -> Optional[MinifyOptions]:
+    if not args.minify:
+        return None
+    return MinifyOptions(omit_optional_tags=args.omit_optional_tags)
 
-    basepath: str = argv[1] or "\\"
+
+def _cache_store(args: argparse.Namespace) -> Optional[CacheStore]:
+    if not args.cache:
+        return None
+    return CacheStore(args.cache, args.cache_limit << 20)
+
+
+def main(argv: Optional[list[str]] = None):
+    args = _parse_args(argv)
+    if args.watch:
+        watch(argv)
+        return
+
+    basepath: str = args.basepath
     print(f"{basepath=}")
     static = "static"
     public = "docs"
-    get_static_assets(static, public)
 
-    generate_pages_recursive("content", "template.html", public, basepath)
+    build_profiler = None
+    if args.profile:
+        if args.jobs > 1:
+            print("--profile renders in-process; ignoring --jobs")
+            args.jobs = 1
+        build_profiler = profiler.enable()
+
+    store = _cache_store(args)
+    try:
+        with profiler.stage("static"):
+            static_stats = get_static_assets(
+                static,
+                public,
+                clean=args.full,
+                checksum=args.checksum,
+                strategy=args.materialize,
+                concurrency=args.static_jobs,
+                minify=args.minify,
+                store=store,
+            )
+        print(f"static: {static_stats}")
+        if args.static_report:
+            print(static_stats.report())
+
+        fingerprints = None
+        if args.fingerprint:
+            with profiler.stage("fingerprint"):
+                fingerprints = fingerprint_assets(public, strategy=args.materialize)
+            print(f"fingerprinted {len(fingerprints)} assets")
+
+        cache = BlockCache(args.block_cache_size, store)
+        stats = generate_pages_recursive(
+            "content",
+            "template.html",
+            public,
+            basepath,
+            jobs=args.jobs,
+            links=_link_rewriter(args, fingerprints),
+            minify=_minify_options(args),
+            cache=cache,
+            time_budget=args.time_budget,
+            stream_threshold=args.stream_mb << 20,
+        )
+        print(f"pages: {stats}")
+        print(f"blocks: {cache.hits} cached, {cache.misses} rendered")
+
+        with profiler.stage("compress"):
+            if args.compress:
+                compress_stats = compress_outputs(public, jobs=args.compress_jobs)
+                print(f"sidecars ({', '.join(available_formats())}): {compress_stats}")
+            else:
+                # outputs compressed by an earlier build keep their sidecars current
+                compress_stats = refresh_sidecars(public, jobs=args.compress_jobs)
+                if compress_stats.written or compress_stats.removed:
+                    print(f"sidecars: {compress_stats}")
+
+        if store is not None:
+            removed, _ = store.gc()
+            if removed:
+                print(f"cache: trimmed {removed} entries to {args.cache_limit}MB")
+    finally:
+        if build_profiler is not None:
+            profiler.disable()
+            build_profiler.write_json(args.profile)
+            print(build_profiler.format_table(args.profile_top))
+            print(f"profile written to {args.profile}")
+
+
+def watch(argv: Optional[list[str]] = None):
+    """Builds the site, then rebuilds the affected pages and assets on every change."""
+    from watch import SiteWatcher
+
+    args = _parse_args(argv)
+    print(f"basepath={args.basepath!r}")
+    store = _cache_store(args)
+    watcher = SiteWatcher(
+        "content",
+        "static",
+        "template.html",
+        "docs",
+        _link_rewriter(args),
+        jobs=args.jobs,
+        minify=_minify_options(args),
+        cache=BlockCache(args.block_cache_size, store),
+        store=store,
+        time_budget=args.time_budget,
+        stream_threshold=args.stream_mb << 20,
+        clean=args.full,
+        checksum=args.checksum,
+        strategy=args.materialize,
+        static_jobs=args.static_jobs,
+        fingerprint=partial(_link_rewriter, args) if args.fingerprint else None,
+        compress=args.compress,
+        compress_jobs=args.compress_jobs,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.gc()
 
 
 if __name__ == "__main__":
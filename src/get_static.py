@@ -1,5 +1,97 @@
 import os
 import shutil
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, TypeVar
+
+from build_manifest import BuildManifest, hash_bytes, hash_file
+from materialize import Materializer
+from cache_store import CacheStore
+from minify import CSSMinifier
+from output_writer import WriteStats, remove_output, write_if_changed
+
+# copying is latency bound, so use more threads than cores (like ThreadPoolExecutor)
+DEFAULT_CONCURRENCY = min(32, (os.cpu_count() or 1) + 4)
+
+
+class AssetCopy(NamedTuple):
+    """The outcome of syncing one asset; `strategy` is `None` if it was up to date."""
+
+    rel: str
+    strategy: Optional[str]
+    size: int
+    seconds: float
+
+
+class SyncStats(WriteStats):
+    """Counts what a static sync did, which strategy materialized the copies and how fast."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.strategies: Counter[str] = Counter()
+        self.copies: list[AssetCopy] = []
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __str__(self) -> str:
+        text = super().__str__()
+        if self.strategies:
+            used = ", ".join(
+                f"{name}: {n}" for name, n in sorted(self.strategies.items())
+            )
+            text += f" ({used})"
+        return text
+
+    def add(self, copy: AssetCopy) -> None:
+        if copy.strategy is None:
+            self.skipped += 1
+        else:
+            self.written += 1
+            self.strategies[copy.strategy] += 1
+            self.copies.append(copy)
+            self.bytes += copy.size
+
+    def report(self, n: int = 10) -> str:
+        """Total throughput, then the `n` slowest copies with their own throughput."""
+        seconds = self.seconds or 1e-9
+        lines = [
+            f"copied {self.written} files, {self.bytes / 1e6:.1f} MB in {self.seconds:.3f}s: "
+            f"{self.bytes / 1e6 / seconds:.1f} MB/s, {self.written / seconds:.1f} files/s"
+        ]
+        slowest = sorted(self.copies, key=lambda copy: -copy.seconds)[:n]
+        if slowest:
+            lines.append(f"slowest {len(slowest)} copies:")
+        for copy in slowest:
+            rate = copy.size / 1e6 / (copy.seconds or 1e-9)
+            lines.append(
+                f"  {copy.size / 1e6:>9.2f} MB {copy.seconds:>8.4f}s {rate:>9.1f} MB/s"
+                f"  {copy.rel} ({copy.strategy})"
+            )
+        return "\n".join(lines)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_bounded(fn: Callable[[T], R], items: Iterable[T], workers: int) -> Iterator[R]:
+    """
+    Like `ThreadPoolExecutor.map`, but consumes `items` lazily, keeping only a few
+    tasks per worker in flight, so huge trees are not queued up front.
+    """
+    if workers <= 1:
+        yield from map(fn, items)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= workers * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def _reset_public(public):
@@ -8,8 +100,28 @@ def _reset_public(public):
     os.mkdir(public)
 
 
-def get_static_assets(static_dir: str, public_dir: str) -> None:
-    """Clears the public directory, then copies all assets from the static director to the public directory."""
+def get_static_assets(
+    static_dir: str,
+    public_dir: str,
+    clean: bool = False,
+    checksum: bool = False,
+    manifest: Optional[BuildManifest] = None,
+    strategy: str = "auto",
+    concurrency: int = DEFAULT_CONCURRENCY,
+    minify: bool = False,
+    store: Optional[CacheStore] = None,
+) -> SyncStats:
+    """
+    Syncs the static directory into the public directory, like `rsync`: files whose
+    size or modification time differ from their copy (or, with `checksum`, whose
+    contents differ) are copied, and assets that were synced before but no longer
+    exist in static are deleted. Everything else in public, generated pages
+    included, is left alone. With `clean`, the public directory is cleared first,
+    which also discards previously generated pages and their build manifest.
+    Copies are made with the given materialization `strategy` (see `materialize`)
+    by up to `concurrency` threads. With `minify`, css files are minified instead,
+    and the results kept in `store`, if given.
+    """
     if not (isinstance(static_dir, str) and isinstance(public_dir, str)):
         raise TypeError
 
@@ -20,31 +132,199 @@ def get_static_assets(static_dir: str, public_dir: str) -> None:
     if not (os.path.isdir(static_dir) and os.path.isdir(public_dir)):
         raise NotADirectoryError
 
-    visited: set = set()
     static: str = os.path.abspath(static_dir)
     public: str = os.path.abspath(public_dir)
-    _reset_public(public)
-    dfs_visit(public, static, visited)
-
-
-def dfs_visit(dest_dir: str, source_dir: str, visited: set):
-    stack: list[str] = []
-    visited.add(source_dir)
-    files = os.listdir(source_dir)
-    for file in files:
-        file_path = os.path.join(source_dir, file)
-        if not os.path.isfile(file_path):
-            stack.append(file)
+    if clean:
+        _reset_public(public)
+        manifest = None
+    if manifest is None:
+        manifest = BuildManifest.load(public)
+
+    materializer = Materializer(strategy)
+    css = CSSMinifier(store) if minify else None
+    stats = SyncStats()
+    sources: set[str] = set()
+    started = time.perf_counter()
+
+    def sync(item: tuple[str, os.stat_result]) -> AssetCopy:
+        rel, stat = item
+        transform = css if rel.endswith(".css") else None
+        return sync_asset(
+            static, public, rel, manifest, materializer, checksum, stat, transform
+        )
+
+    for copy in map_bounded(sync, dfs_visit(static), concurrency):
+        sources.add(copy.rel)
+        stats.add(copy)
+    stats.seconds = time.perf_counter() - started
+
+    orphans = [rel for rel in manifest.assets if rel not in sources]
+    for rel in sorted(orphans):
+        del manifest.assets[rel]
+        if remove_output(public, rel):
+            stats.removed += 1
+    manifest.save()
+    return stats
+
+
+def update_static_assets(
+    static_dir: str,
+    public_dir: str,
+    paths: Iterable[str],
+    manifest: Optional[BuildManifest] = None,
+    strategy: str = "auto",
+    minify: bool = False,
+    store: Optional[CacheStore] = None,
+) -> SyncStats:
+    """
+    Mirrors individual files of the static directory into the public directory:
+    files that exist are synced, files that were deleted are removed from public.
+    The caller saves `manifest`.
+    """
+    static: str = os.path.abspath(static_dir)
+    public: str = os.path.abspath(public_dir)
+    if manifest is None:
+        manifest = BuildManifest(public)
+
+    materializer = Materializer(strategy)
+    css = CSSMinifier(store) if minify else None
+    stats = SyncStats()
+    for path in paths:
+        rel = os.path.relpath(os.path.abspath(path), static)
+        if rel.startswith(os.pardir):
+            raise ValueError(f"{path} is not inside {static_dir}")
+        if os.path.isfile(path):
+            transform = css if rel.endswith(".css") else None
+            copy = sync_asset(
+                static, public, rel, manifest, materializer, transform=transform
+            )
+            stats.add(copy)
         else:
-            shutil.copy(file_path, dest_dir)
-
-    while len(stack) > 0:
-        dir = stack.pop()
-        pub = os.path.join(dest_dir, dir)
-        if not os.path.exists(pub):
-            os.mkdir(pub)
-        stat = os.path.join(source_dir, dir)
-        dfs_visit(pub, stat, visited)
+            manifest.assets.pop(rel, None)
+            if remove_output(public, rel):
+                stats.removed += 1
+    return stats
+
+
+def sync_asset(
+    static: str,
+    public: str,
+    rel: str,
+    manifest: BuildManifest,
+    materializer: Materializer,
+    checksum: bool = False,
+    stat: Optional[os.stat_result] = None,
+    transform: Optional[CSSMinifier] = None,
+) -> AssetCopy:
+    """
+    Materializes `static/rel` at `public/rel` unless the copy is up to date.
+    `stat` saves a system call when the caller already has the source's stat.
+    With `transform`, the output is the transformed source instead of a copy.
+    """
+    source = os.path.join(static, rel)
+    dest = os.path.join(public, rel)
+    if stat is None:
+        stat = os.stat(source)
+    record: dict[str, object] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    previous = manifest.assets.get(rel)
+
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        dest_stat = None
+
+    if transform is not None:
+        return _sync_transformed(
+            source, dest, rel, stat, dest_stat, manifest, transform
+        )
+
+    current = False
+    if dest_stat is not None and dest_stat.st_size == stat.st_size:
+        same_mtime = dest_stat.st_mtime_ns == stat.st_mtime_ns
+        if checksum:
+            record["hash"] = hash_file(source)
+            # the copy needs no hashing if neither side changed since it was made
+            unchanged = previous == record and same_mtime
+            current = unchanged or hash_file(dest) == record["hash"]
+        else:
+            current = same_mtime
+            if current and previous and "hash" in previous:
+                # unchanged since it was hashed, so the hash still holds
+                stamp = (previous.get("size"), previous.get("mtime_ns"))
+                if stamp == (stat.st_size, stat.st_mtime_ns):
+                    record["hash"] = previous["hash"]
+
+    used = None
+    started = time.perf_counter()
+    if not current:
+        # copies keep the source's mtime, so the next sync can trust a stat
+        used = materializer.materialize(source, dest)
+        if checksum and "hash" not in record:
+            record["hash"] = hash_file(source)
+    manifest.assets[rel] = record
+    return AssetCopy(rel, used, stat.st_size, time.perf_counter() - started)
+
+
+def _sync_transformed(
+    source: str,
+    dest: str,
+    rel: str,
+    stat: os.stat_result,
+    dest_stat: Optional[os.stat_result],
+    manifest: BuildManifest,
+    transform: CSSMinifier,
+) -> AssetCopy:
+    """
+    Syncs an asset whose output differs from its source. The output can't be
+    compared with the source, so it is current if neither the source nor the
+    output changed since the manifest recorded them.
+    """
+    started = time.perf_counter()
+    previous = manifest.assets.get(rel)
+    if previous is not None and dest_stat is not None:
+        if previous.get("transform") == transform.key and (
+            previous.get("size"),
+            previous.get("mtime_ns"),
+            previous.get("output_size"),
+            previous.get("output_mtime_ns"),
+        ) == (stat.st_size, stat.st_mtime_ns, dest_stat.st_size, dest_stat.st_mtime_ns):
+            return AssetCopy(rel, None, stat.st_size, time.perf_counter() - started)
+
+    with open(source, "rb") as f:
+        text = f.read().decode("utf-8", errors="surrogateescape")
+    data = transform(text).encode("utf-8", errors="surrogateescape")
+    write_if_changed(dest, data)
+    output = os.stat(dest)
+    manifest.assets[rel] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "transform": transform.key,
+        "output_size": output.st_size,
+        "output_mtime_ns": output.st_mtime_ns,
+        # what fingerprints are made from is the output
+        "hash": hash_bytes(data),
+    }
+    return AssetCopy(rel, transform.key, len(data), time.perf_counter() - started)
+
+
+def dfs_visit(source_dir: str) -> Iterator[tuple[str, os.stat_result]]:
+    """
+    Yields the path, relative to `source_dir`, and the stat of every file below it
+    in sorted order. `os.scandir` reports file types without an extra stat per entry.
+    """
+    stack: list[str] = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(source_dir, rel_dir)) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        subdirs: list[str] = []
+        for entry in entries:
+            rel = os.path.join(rel_dir, entry.name)
+            if entry.is_file():
+                yield rel, entry.stat()
+            elif entry.is_dir():
+                subdirs.append(rel)
+        stack.extend(reversed(subdirs))
 
 
 if __name__ == "__main__":
@@ -1,8 +1,9 @@
-from html_tags import HTMLTags
 from htmlnode import HTMLNode
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self, tag: str | None, value: str, props: dict[str, str] | None = None
     ) -> None:
@@ -14,5 +15,4 @@ class LeafNode(HTMLNode):
         if not self.tag:
             return self.value
         else:
-            tag = HTMLTags(self.tag)
-            return self._to_html_helper(tag, self.value, self.props)
+            return self._to_html_helper(self.tag, self.value, self.props)
@@ -1,10 +1,12 @@
-from typing import Sequence
+from typing import Optional, Sequence
 
-from html_tags import HTMLTags
+from html_tags import TagMarkup, tag_markup
 from htmlnode import HTMLNode
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -13,19 +15,40 @@ class ParentNode(HTMLNode):
     ) -> None:
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self) -> str:
+        """
+        Renders the node and everything below it. The tree is walked with an
+        explicit stack rather than recursion, so nesting depth is unlimited,
+        and every fragment is appended to one list joined at the end, so the
+        cost is linear in the size of the html.
+        """
+        parts: list[str] = []
+        # nodes still to render; None where a parent ends, whose end tag is
+        # the last of `end_tags`
+        stack: list[Optional[HTMLNode]] = [self]
+        end_tags: list[str] = []
+        push, pop, emit = stack.append, stack.pop, parts.append
+        while stack:
+            item = pop()
+            if item is None:
+                emit(end_tags.pop())
+            elif isinstance(item, ParentNode):
+                markup, children = item._checked_parts()
+                emit(item._start_tag(markup))
+                end_tags.append(markup.end)
+                push(None)
+                for child in reversed(children):
+                    if not isinstance(child, HTMLNode):
+                        raise ValueError("child is not")
+                    push(child)
+            else:
+                emit(item.to_html())
+        return "".join(parts)
+
+    def _checked_parts(self) -> tuple[TagMarkup, Sequence[HTMLNode]]:
+        """The markup of the node's tag, and its children."""
         if not self.tag:
             raise ValueError("parrent node is missing tag")
         if not self.children:
             raise ValueError("parent is missing children")
-
-        tag = HTMLTags(self.tag)
-        value = self._to_html_helper(tag, "{{{}}}", self.props)
-        child_value = ""
-        for child in self.children:
-            if child is None or not isinstance(child, HTMLNode):
-                raise ValueError("child is not")
-            child_value += child.to_html()
-
-        value = value.replace("{{{}}}", child_value)
-        return value
+        return tag_markup(self.tag), self.children
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import re
 from enum import Enum
+from typing import NamedTuple, Optional, Union
 
 
 class HTMLTags(Enum):
@@ -33,107 +35,84 @@ class HTMLTags(Enum):
         return self.value
 
     def opening_tag(self) -> str:
-        match self:
-            case HTMLTags.HTML:
-                return "<html>"
-            case HTMLTags.BODY:
-                return "<body>"
-            case HTMLTags.HEAD:
-                return "<head>"
-            case HTMLTags.IMAGE:
-                return "<img>"
-            case HTMLTags.UNORDERED_LIST:
-                return "<ul>"
-            case HTMLTags.ORDERED_LIST:
-                return "<ol>"
-            case HTMLTags.LIST_ITEM:
-                return "<li>"
-            case HTMLTags.ANCHOR:
-                return "<a>"
-            case HTMLTags.PARAGRAPH:
-                return "<p>"
-            case HTMLTags.BOLD:
-                return "<b>"
-            case HTMLTags.ITALICS:
-                return "<i>"
-            case HTMLTags.SPAN:
-                return "<span>"
-            case HTMLTags.DIV:
-                return "<div>"
-            case HTMLTags.META:
-                return "<meta>"
-            case HTMLTags.TITLE:
-                return "<title>"
-            case HTMLTags.H1:
-                return "<h1>"
-            case HTMLTags.H2:
-                return "<h2>"
-            case HTMLTags.H3:
-                return "<h3>"
-            case HTMLTags.H4:
-                return "<h4>"
-            case HTMLTags.H5:
-                return "<h5>"
-            case HTMLTags.H6:
-                return "<h6>"
-            case HTMLTags.CODE:
-                return "<code>"
-            case HTMLTags.PRE:
-                return "<pre>"
-            case HTMLTags.BLOCKQUOTE:
-                return "<blockquote>"
-            case _:
-                raise ValueError("invalid tag type")
+        return _enum_markup(self).start
 
     def closing_tag(self) -> str:
-        match self:
-            case HTMLTags.HTML:
-                return "</html>"
-            case HTMLTags.BODY:
-                return "</body>"
-            case HTMLTags.HEAD:
-                return "</head>"
-            case HTMLTags.IMAGE:
-                return "</img>"
-            case HTMLTags.UNORDERED_LIST:
-                return "</ul>"
-            case HTMLTags.ORDERED_LIST:
-                return "</ol>"
-            case HTMLTags.LIST_ITEM:
-                return "</li>"
-            case HTMLTags.ANCHOR:
-                return "</a>"
-            case HTMLTags.PARAGRAPH:
-                return "</p>"
-            case HTMLTags.BOLD:
-                return "</b>"
-            case HTMLTags.ITALICS:
-                return "</i>"
-            case HTMLTags.SPAN:
-                return "</span>"
-            case HTMLTags.DIV:
-                return "</div>"
-            case HTMLTags.META:
-                return ""
-            case HTMLTags.TITLE:
-                return "</title>"
-            case HTMLTags.H1:
-                return "</h1>"
-            case HTMLTags.H2:
-                return "</h2>"
-            case HTMLTags.H3:
-                return "</h3>"
-            case HTMLTags.H4:
-                return "</h4>"
-            case HTMLTags.H5:
-                return "</h5>"
-            case HTMLTags.H6:
-                return "</h6>"
-            case HTMLTags.CODE:
-                return "</code>"
-            case HTMLTags.PRE:
-                return "</pre>"
-            case HTMLTags.BLOCKQUOTE:
-                return "</blockquote>"
-            case _:
-                raise ValueError("invalid tag type")
+        return _enum_markup(self).end
+
+
+class TagMarkup(NamedTuple):
+    """The literal html a tag is written with."""
+
+    # the opening tag when the node has no attributes, e.g. `<p>`
+    start: str
+    # the opening tag up to its attributes, e.g. `<p`
+    prefix: str
+    # the closing tag, empty for void elements
+    end: str
+
+
+# elements that never have content, so never have a closing tag
+# (`img` is one, but keeps the `</img>` it has always been written with)
+VOID_ELEMENTS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "input", "link", "meta", "source",
+     "track", "wbr"}
+)  # fmt: skip
+
+_TAG_NAME = re.compile(r"[a-zA-Z][a-zA-Z0-9-]*")
+
+
+def _markup_for(name: str, end: Optional[str] = None) -> TagMarkup:
+    if end is None:
+        end = "" if name.lower() in VOID_ELEMENTS else f"</{name}>"
+    return TagMarkup(f"<{name}>", f"<{name}", end)
+
+
+# tag name, or HTMLTags member -> its markup; other tags are added on first use
+_TAGS: dict[Union[str, HTMLTags], TagMarkup] = {}
+for _tag in HTMLTags:
+    _TAGS[_tag] = _TAGS[_tag.value] = _markup_for(
+        _tag.value, "</img>" if _tag is HTMLTags.IMAGE else None
+    )
+
+
+def _enum_markup(tag: HTMLTags) -> TagMarkup:
+    markup = _TAGS.get(tag) if isinstance(tag, HTMLTags) else None
+    if markup is None:
+        raise ValueError("invalid tag type")
+    return markup
+
+
+def tag_markup(tag: Union[str, HTMLTags]) -> TagMarkup:
+    """
+    The markup of `tag`, a tag name or an HTMLTags member. Any well-formed
+    tag name works, not only those in HTMLTags: `table` or `figure` is added
+    to the table the first time it is rendered.
+    """
+    markup = _TAGS.get(tag)
+    if markup is None:
+        if not (isinstance(tag, str) and _TAG_NAME.fullmatch(tag)):
+            raise ValueError(f"invalid tag {tag!r}")
+        markup = _TAGS[tag] = _markup_for(tag)
+    return markup
+
+
+# `&` is left alone where it already starts a character reference
+_ATTRIBUTE_SPECIAL = re.compile(
+    r'&(?!#\d+;|#[xX][0-9a-fA-F]+;|[a-zA-Z][a-zA-Z0-9]*;)|["<>]'
+)
+_ATTRIBUTE_ESCAPES = {"&": "&amp;", '"': "&quot;", "<": "&lt;", ">": "&gt;"}
+
+
+def escape_attribute(value: str) -> str:
+    """Escapes `value` for use inside a double-quoted attribute."""
+    if "&" in value or '"' in value or "<" in value or ">" in value:
+        return _ATTRIBUTE_SPECIAL.sub(lambda m: _ATTRIBUTE_ESCAPES[m.group()], value)
+    return value
+
+
+def attributes_to_html(props: dict[str, str]) -> str:
+    """Writes `props` as attributes, each preceded by a space: ` href="/a" id="b"`."""
+    return "".join(
+        [f' {name}="{escape_attribute(value)}"' for name, value in props.items()]
+    )
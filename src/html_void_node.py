@@ -1,10 +1,8 @@
-from multiprocessing.sharedctypes import Value
-
-from html_tags import HTMLTags
 from htmlnode import HTMLNode
 
 
 class VoidNode(HTMLNode):
+    __slots__ = ()
 
     def __init__(self, tag: str, props: dict[str, str] | None = None) -> None:
         if not (tag and isinstance(tag, str)):
@@ -15,5 +13,4 @@ class VoidNode(HTMLNode):
         if not self.tag or self.tag is None:
             raise ValueError("A void element must have a tag.")
         else:
-            tag = HTMLTags(self.tag)
-            return self._to_html_helper(tag, "", self.props)
+            return self._to_html_helper(self.tag, "", self.props)
@@ -1,11 +1,40 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+import sys
+from typing import NoReturn, Optional, Sequence, Union
 
-from html_tags import HTMLTags
+from html_tags import HTMLTags, TagMarkup, attributes_to_html, tag_markup
+
+
+class _EmptyProps(dict):
+    """
+    The props of every node created with an empty dict: one shared dict that
+    cannot be changed. It equals `{}`, and pickles as the shared instance.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs) -> NoReturn:
+        raise TypeError(
+            "empty props are shared and cannot be changed; assign a new dict"
+        )
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __repr__(self) -> str:
+        return "EMPTY_PROPS"
+
+    def __reduce__(self) -> str:
+        return "EMPTY_PROPS"
+
+
+EMPTY_PROPS = _EmptyProps()
 
 
 class HTMLNode:
+    # no per-node __dict__: the trees of large pages hold many thousands of nodes
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(
         self,
@@ -14,10 +43,11 @@ class HTMLNode:
         children: Optional[Sequence[HTMLNode]] = None,
         props: Optional[dict[str, str]] = None,
     ) -> None:
-        self.tag = tag
+        # the few distinct tags are shared by every node that has them
+        self.tag = sys.intern(tag) if type(tag) is str else tag
         self.value = value
         self.children = children
-        self.props = props
+        self.props = EMPTY_PROPS if props is not None and not props else props
 
     def __repr__(self) -> str:
         result = f"HTMLNode(\n"
@@ -39,22 +69,21 @@ class HTMLNode:
     def to_html(self) -> str:
         raise NotImplementedError()
 
-    def _to_html_helper(self, tag: HTMLTags, value: str, props: dict | None) -> str:
-        result = tag.opening_tag()
-        if props:
-            result = result.replace(">", f"{self.props_to_html()}>")
-        result += value + tag.closing_tag()
-        return result
+    def _to_html_helper(
+        self, tag: Union[str, HTMLTags], value: str, props: dict | None
+    ) -> str:
+        markup = tag_markup(tag)
+        return self._start_tag(markup) + value + markup.end
+
+    def _start_tag(self, markup: TagMarkup) -> str:
+        if self.props:
+            return markup.prefix + attributes_to_html(self.props) + ">"
+        return markup.start
 
     def props_to_html(self):
         if not self.props:
             return ""
-
-        result = ""
-        for prop, value in self.props.items():
-            result = " ".join([result, f'{prop}="{value}"'])
-
-        return result
+        return attributes_to_html(self.props)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, HTMLNode):
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import re
+from typing import Optional, Sequence
+from urllib.parse import quote, unquote
+
+from build_manifest import hash_text
+from htmlnode import HTMLNode
+
+LINK_ATTRIBUTES = ("href", "src")
+
+# an href/src attribute in raw html, along with the name of the tag it belongs to
+# (the closing quote may be missing when a template slot follows the url)
+_ATTRIBUTE = re.compile(
+    r"(?P<prefix><(?P<tag>[a-zA-Z][\w-]*)\b[^<>]*?\s(?P<attr>href|src)=\")"
+    r"(?P<url>[^\"]*)(?P<end>\"|\Z)"
+)
+
+
+def is_root_relative(url: str) -> bool:
+    return url.startswith("/") and not url.startswith("//")
+
+
+_SCHEME = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+def is_external(url: str) -> bool:
+    return url.startswith("//") or _SCHEME.match(url) is not None
+
+
+class LinkRule:
+    """A single url transformation. Rules only ever see `href` and `src` values."""
+
+    def key(self) -> tuple:
+        raise NotImplementedError()
+
+    def __call__(self, url: str, tag: Optional[str], attr: str) -> str:
+        raise NotImplementedError()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.key()}"
+
+
+def split_url(url: str) -> tuple[str, str]:
+    """Splits a url into its path and the query and/or fragment that follow it."""
+    cut = len(url)
+    for marker in "?#":
+        index = url.find(marker)
+        if index != -1:
+            cut = min(cut, index)
+    return url[:cut], url[cut:]
+
+
+class BasepathRule(LinkRule):
+    """Serves the site from `basepath`: `/images/a.png` becomes `{basepath}images/a.png`."""
+
+    def __init__(self, basepath: str) -> None:
+        self.basepath = basepath
+
+    def key(self) -> tuple:
+        return ("basepath", self.basepath)
+
+    def __call__(self, url: str, tag: Optional[str], attr: str) -> str:
+        if is_root_relative(url):
+            return self.basepath + url[1:]
+        return url
+
+
+class CdnRule(LinkRule):
+    """Points root-relative `src`s of the given tags (images by default) at a CDN host."""
+
+    def __init__(self, host: str, tags: Sequence[str] = ("img",)) -> None:
+        self.host = host.rstrip("/")
+        self.tags = tuple(tags)
+
+    def key(self) -> tuple:
+        return ("cdn", self.host, self.tags)
+
+    def __call__(self, url: str, tag: Optional[str], attr: str) -> str:
+        if attr == "src" and tag in self.tags and is_root_relative(url):
+            return self.host + url
+        return url
+
+
+class TrailingSlashRule(LinkRule):
+    """
+    Normalizes internal page links (anchors whose last path segment has no file
+    extension): `add` ensures a trailing slash, `strip` removes it.
+    """
+
+    def __init__(self, policy: str) -> None:
+        if policy not in ("add", "strip"):
+            raise ValueError(f"invalid trailing slash policy {policy!r}")
+        self.policy = policy
+
+    def key(self) -> tuple:
+        return ("trailing-slash", self.policy)
+
+    def __call__(self, url: str, tag: Optional[str], attr: str) -> str:
+        if tag != "a" or attr != "href" or not url or is_external(url):
+            return url
+
+        path, rest = split_url(url)
+        if not path:
+            return url
+
+        if self.policy == "add":
+            if not path.endswith("/") and "." not in path.rsplit("/", 1)[-1]:
+                path += "/"
+        elif path.endswith("/") and len(path) > 1:
+            path = path.rstrip("/") or "/"
+        return path + rest
+
+
+class FingerprintRule(LinkRule):
+    """
+    Points root-relative links to static assets at their content-hashed copies,
+    using the mapping written by `fingerprint.fingerprint_assets`.
+    """
+
+    def __init__(self, mapping: dict[str, str]) -> None:
+        self.mapping = dict(mapping)
+        self.digest = hash_text(repr(sorted(self.mapping.items())))
+
+    def key(self) -> tuple:
+        return ("fingerprint", self.digest)
+
+    def __call__(self, url: str, tag: Optional[str], attr: str) -> str:
+        if not is_root_relative(url):
+            return url
+        path, rest = split_url(url)
+        hashed = self.mapping.get(unquote(path[1:]))
+        if hashed is None:
+            return url
+        return "/" + quote(hashed) + rest
+
+
+class LinkRewriter:
+    """Runs every `href`/`src` of a page through an ordered list of rules."""
+
+    def __init__(self, rules: Sequence[LinkRule] = ()) -> None:
+        self.rules = tuple(rules)
+        self.key = tuple(rule.key() for rule in self.rules)
+        self.digest = hash_text(repr(self.key))
+
+    @classmethod
+    def for_basepath(cls, basepath: str) -> LinkRewriter:
+        return cls([BasepathRule(basepath)])
+
+    def __repr__(self) -> str:
+        return f"LinkRewriter({list(self.rules)})"
+
+    def rewrite_url(self, url: str, tag: Optional[str], attr: str) -> str:
+        for rule in self.rules:
+            url = rule(url, tag, attr)
+        return url
+
+    def rewrite_tree(self, root: HTMLNode) -> HTMLNode:
+        """Rewrites the link props of every node under `root` in place and returns `root`."""
+        if not self.rules:
+            return root
+
+        stack: list[HTMLNode] = [root]
+        while stack:
+            node = stack.pop()
+            props = node.props
+            if props:
+                for attr in LINK_ATTRIBUTES:
+                    url = props.get(attr)
+                    if url is not None:
+                        props[attr] = self.rewrite_url(url, node.tag, attr)
+            if node.children:
+                stack.extend(node.children)
+        return root
+
+    def rewrite_html(self, html: str) -> str:
+        """
+        Rewrites the `href`/`src` attributes in a fragment of raw html.
+        Used on template literals, which are not parsed into nodes.
+        """
+        if not self.rules:
+            return html
+
+        def replace(match: re.Match) -> str:
+            tag, attr = match.group("tag"), match.group("attr")
+            url = self.rewrite_url(match.group("url"), tag, attr)
+            return f'{match.group("prefix")}{url}{match.group("end")}'
+
+        return _ATTRIBUTE.sub(replace, html)
@@ -1,8 +1,16 @@
+import sys
+
+import cache_store
 import generate_page
 
 
 def main():
-    generate_page.main()
+    argv = sys.argv[1:]
+    if argv[:1] == ["cache"]:
+        # `main.py cache stats|gc` manages the build cache
+        cache_store.main(argv[1:])
+    else:
+        generate_page.main(argv)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,15 @@
-from typing import Optional
+import time
+from functools import partial
+from typing import Callable, Iterable, Optional
 
 import markdown_to_textnode as md2tn
+import profiler
+from block_cache import BlockCache, block_key
 from html_leafnode import LeafNode
 from html_parentnode import ParentNode
 from html_tags import HTMLTags
 from htmlnode import HTMLNode
-from parse_markdown import BlockType
-from parse_markdown import block_to_block_type as b2bt
-from parse_markdown import extract_title
-from parse_markdown import markdown_to_blocks as md2b
+from parse_markdown import Block, BlockType, extract_title, scan_blocks
 from textnode import TextNode, TextType
 
 
@@ -16,36 +17,163 @@ def markdown_to_html(markdown: str) -> HTMLNode:
     if not isinstance(markdown, str):
         raise TypeError
 
-    blocks: list[str] = md2b(markdown)
-    typed_blocks = {block: b2bt(block) for block in blocks}
     children: list[HTMLNode] = []
-    child: HTMLNode
-
-    for block, block_type in typed_blocks.items():
+    for block, block_type in typed_blocks(markdown):
         # parent nodes must be passed a list of HTMLNodes as children,
         # so we have to find and conver the children before rendering the blocks as HTMLModes
-
-        match block_type:
-            case BlockType.PARAGRAPH:
-                child = md_to_paragraph(block)
-            case BlockType.HEADING:
-                child = md_to_heading(block)
-            case BlockType.CODE:
-                child = code_block_to_html(block)
-            case BlockType.QUOTE:
-                child = blockquote_to_html(block)
-            case BlockType.UNDORDERED_LIST:
-                child = md_to_unordered_list(block)
-            case BlockType.ORDERED_LIST:
-                child = md_to_ordered_list(block)
-            case _:
-                raise ValueError("invalid block type detected")
+        child = block_to_html_node(block, block_type)
         children.append(ParentNode(HTMLTags.DIV.value, [child]))
 
     body = ParentNode(HTMLTags.BODY.value, children)
     return ParentNode(HTMLTags.HTML.value, [body])
 
 
+def typed_blocks(markdown: str) -> list[tuple[str, BlockType]]:
+    return [(block.text, block.type) for block in _scan_blocks(markdown)]
+
+
+def _scan_blocks(markdown: str) -> list[Block]:
+    with profiler.stage("scan_blocks"):
+        return scan_blocks(markdown)
+
+
+# seconds; the largest pages on the site render in a few milliseconds
+DEFAULT_TIME_BUDGET = 10.0
+
+
+class RenderBudgetExceeded(ValueError):
+    """Raised when rendering a document takes longer than its time budget."""
+
+    def __init__(self, block: Block, elapsed: float, budget: float) -> None:
+        self.block = block
+        self.elapsed = elapsed
+        self.budget = budget
+        super().__init__(
+            f"rendering took {elapsed:.2f}s, over its {budget:g}s budget, "
+            f"in the {block.type.value} block at line {block.line + 1}"
+        )
+
+
+def block_to_html_node(
+    block: str, block_type: BlockType, check: Optional[Callable[[], None]] = None
+) -> HTMLNode:
+    """
+    Parses a block into its html nodes. `check`, if given, is called between
+    the items of a list, and may raise to stop a long one part way through.
+    """
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return md_to_paragraph(block)
+        case BlockType.HEADING:
+            return md_to_heading(block)
+        case BlockType.CODE:
+            return code_block_to_html(block)
+        case BlockType.QUOTE:
+            return blockquote_to_html(block)
+        case BlockType.UNDORDERED_LIST:
+            return md_to_unordered_list(block, check)
+        case BlockType.ORDERED_LIST:
+            return md_to_ordered_list(block, check)
+        case _:
+            raise ValueError("invalid block type detected")
+
+
+def render_markdown(
+    markdown: str,
+    cache: Optional[BlockCache] = None,
+    rewrite: Optional[Callable[[HTMLNode], HTMLNode]] = None,
+    variant: str = "",
+    time_budget: Optional[float] = None,
+) -> str:
+    """
+    Renders `markdown` to the same html as `markdown_to_html(markdown).to_html()`,
+    one block at a time. `rewrite` is applied to each block's nodes before they
+    are rendered. With `cache`, a block whose text and type were rendered before
+    reuses that html instead of being parsed again; `variant` must tell apart
+    renders whose html differs for the same block, like those of different
+    `rewrite`s.
+
+    With `time_budget`, a `RenderBudgetExceeded` naming the block being rendered
+    is raised once the document has taken more than that many seconds. The
+    clock is checked after every block and every list item; a paragraph,
+    heading or quote is scanned in a single pass, linear in its length, that
+    is not interrupted.
+    """
+    if not isinstance(markdown, str):
+        raise TypeError
+
+    started = time.perf_counter()
+    parts: list[str] = []
+    blocks = _scan_blocks(markdown)
+    stream_markdown(blocks, parts.append, cache, rewrite, variant, time_budget, started)
+    return "".join(parts)
+
+
+def stream_markdown(
+    blocks: Iterable[Block],
+    write: Callable[[str], object],
+    cache: Optional[BlockCache] = None,
+    rewrite: Optional[Callable[[HTMLNode], HTMLNode]] = None,
+    variant: str = "",
+    time_budget: Optional[float] = None,
+    started: Optional[float] = None,
+) -> None:
+    """
+    Renders a document like `render_markdown`, from its blocks as they are
+    scanned (see `iter_blocks`), handing the html to `write` a block at a time.
+    Nothing is written for a document without blocks. `started` is when the
+    time budget started running, by default now.
+    """
+    if started is None:
+        started = time.perf_counter()
+    empty = True
+    check = None
+    for scanned in blocks:
+        if empty:
+            write("<html><body>")
+            empty = False
+        if time_budget is not None:
+            check = partial(_check_budget, scanned, started, time_budget)
+        write(f"<div>{_block_html(scanned, cache, rewrite, variant, check)}</div>")
+        if check is not None:
+            check()
+    if empty:
+        raise ValueError("parent is missing children")
+    write("</body></html>")
+
+
+def _check_budget(block: Block, started: float, budget: float) -> None:
+    elapsed = time.perf_counter() - started
+    if elapsed > budget:
+        raise RenderBudgetExceeded(block, elapsed, budget)
+
+
+def _block_html(
+    scanned: Block,
+    cache: Optional[BlockCache],
+    rewrite: Optional[Callable[[HTMLNode], HTMLNode]],
+    variant: str,
+    check: Optional[Callable[[], None]] = None,
+) -> str:
+    block, block_type = scanned.text, scanned.type
+    key = block_key(block, block_type, variant) if cache is not None else ""
+    html = cache.get(key) if cache is not None else None
+    if html is not None:
+        profiler.count("block_cache_hits")
+        return html
+
+    node = block_to_html_node(block, block_type, check)
+    if rewrite is not None:
+        node = rewrite(node)
+    if profiler.active() is not None:
+        profiler.count("nodes", profiler.count_nodes(node) + 1)
+    with profiler.stage("to_html"):
+        html = node.to_html()
+    if cache is not None:
+        cache.put(key, html)
+    return html
+
+
 def md_to_paragraph(md: str) -> HTMLNode:
     if not isinstance(md, str):
         raise TypeError
@@ -58,64 +186,60 @@ def md_to_heading(md: str) -> HTMLNode:
     if not isinstance(md, str):
         raise TypeError
 
-    def map_heading(text: str) -> HTMLTags:
-        count = len(text) - len(text.lstrip("#"))
-        match count:
-            case 1:
-                return HTMLTags.H1
-            case 2:
-                return HTMLTags.H2
-            case 3:
-                return HTMLTags.H3
-            case 4:
-                return HTMLTags.H4
-            case 5:
-                return HTMLTags.H5
-            case 6:
-                return HTMLTags.H6
-            case _:
-                raise ValueError
-
-    if map_heading(md) == HTMLTags.H1:
-        children = text_to_children(extract_title(md))
-    else:
-        children = text_to_children(md.lstrip("#").lstrip())
-
-    return ParentNode(map_heading(md).value, children)
-
-
-def md_to_unordered_list(md: str) -> HTMLNode:
+    tag, text = heading_parts(md)
+    return ParentNode(tag, text_to_children(text))
+
+
+def heading_parts(md: str) -> tuple[str, str]:
+    """The tag of a heading block, `h1` to `h6`, and the text it holds."""
+    level = len(md) - len(md.lstrip("#"))
+    if not 1 <= level <= 6:
+        raise ValueError
+    if level == 1:
+        return HTMLTags.H1.value, extract_title(md)
+    return f"h{level}", md.lstrip("#").lstrip()
+
+
+def md_to_unordered_list(
+    md: str, check: Optional[Callable[[], None]] = None
+) -> HTMLNode:
     if not isinstance(md, str):
         raise TypeError
-    children = _list_items_to_html(md)
+    children = _list_items_to_html(md, False, check)
     return ParentNode(HTMLTags.UNORDERED_LIST.value, children)
 
 
-def md_to_ordered_list(md: str) -> HTMLNode:
+def md_to_ordered_list(md: str, check: Optional[Callable[[], None]] = None) -> HTMLNode:
     if not isinstance(md, str):
         raise TypeError
-    children = _list_items_to_html(md, True)
+    children = _list_items_to_html(md, True, check)
     return ParentNode(HTMLTags.ORDERED_LIST.value, children)
 
 
-def _list_items_to_html(md: str, ordered: Optional[bool] = False) -> list[ParentNode]:
+def _list_items_to_html(
+    md: str,
+    ordered: Optional[bool] = False,
+    check: Optional[Callable[[], None]] = None,
+) -> list[ParentNode]:
     if not isinstance(md, str):
         raise TypeError
 
-    lines = md.split("\n")
     result: list[ParentNode] = []
-    for line in lines:
-        if ordered:
-            line = line.split(". ", 1)[1]
-        else:
-            line = line.split("- ", 1)[1]
-
+    for line in list_item_texts(md, ordered):
         children: list[HTMLNode] = text_to_children(line)
         parent: ParentNode = ParentNode(HTMLTags.LIST_ITEM.value, children)
         result.append(parent)
+        if check is not None:
+            check()
     return result
 
 
+def list_item_texts(md: str, ordered: Optional[bool] = False) -> list[str]:
+    """The text of each item of a list block, without its marker."""
+    separator = ". " if ordered else "- "
+    return [line.split(separator, 1)[1] for line in md.split("\n")]
+
+
 def code_block_to_html(text: str):
     children = [LeafNode(HTMLTags.CODE.value, text, None)]
     return ParentNode(HTMLTags.PRE.value, children, None)
@@ -124,15 +248,18 @@ def code_block_to_html(text: str):
 def blockquote_to_html(text: str):
     if not isinstance(text, str):
         raise TypeError
-    lines = text.split("\n")
-    for i in range(len(lines)):
-        lines[i] = lines[i][1:].lstrip()
-    lines = "\n".join(lines)
-    return ParentNode(HTMLTags.BLOCKQUOTE.value, text_to_children(lines), None)
+    children = text_to_children(quote_text(text))
+    return ParentNode(HTMLTags.BLOCKQUOTE.value, children, None)
+
+
+def quote_text(text: str) -> str:
+    """The text of a quote block, without the `>` that starts each line."""
+    return "\n".join([line[1:].lstrip() for line in text.split("\n")])
 
 
 def text_to_children(text: str) -> list[HTMLNode]:
-    text_nodes = md2tn.text_to_textnodes(text)
+    with profiler.stage("text_to_textnodes"):
+        text_nodes = md2tn.text_to_textnodes(text)
     html_nodes: list[HTMLNode] = []
     for node in text_nodes:
         html_nodes.append(TextNode.text_node_to_html_node(node))
@@ -1,7 +1,9 @@
+import re
 from enum import Enum
 from typing import Literal
 
-from parse_markdown import extract_markdown_images, extract_markdown_links
+import profiler
+from parse_markdown import TextFinder, find_markdown_links
 from textnode import TextNode, TextType
 
 
@@ -58,76 +60,172 @@ def split_nodes_delimiter(
 
 
 def split_nodes_image(old_nodes):
+    return _split_nodes_pattern(old_nodes, TextType.IMAGE)
+
+
+def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    return _split_nodes_pattern(old_nodes, TextType.LINK)
+
+
+def _split_nodes_pattern(
+    old_nodes: list[TextNode], text_type: TextType
+) -> list[TextNode]:
+    """
+    Splits the text nodes at every link (or image, by `text_type`), which turns
+    into a node of `text_type`. Matches are sliced out by their position, so
+    the text is neither searched again nor copied once per match.
+    """
+    images = text_type is TextType.IMAGE
     new_nodes: list[TextNode] = []
     for node in old_nodes:
-        images = None
         if node.text_type is not TextType.TEXT:
             new_nodes.append(node)
             continue
 
-        images = extract_markdown_images(node.text)
-        if images is None or len(images) == 0:
+        profiler.count("regex")
+        node_text = node.text
+        pos = 0
+        for match in find_markdown_links(node_text, images):
+            if match.start > pos:
+                text = node_text[pos : match.start]
+                new_nodes.append(TextNode(text, TextType.TEXT, None))
+            new_nodes.append(TextNode(match.alt_text, text_type, match.url))
+            pos = match.end
+        if pos == 0:
             new_nodes.append(node)
-            continue
+        elif pos < len(node_text):
+            new_nodes.append(TextNode(node_text[pos:], TextType.TEXT, None))
 
-        node_text = node.text
-        while node_text:
-            if not images:
-                new_nodes.append(TextNode(node_text, TextType.TEXT, None))
-                break
+    return new_nodes
 
-            image = images[0]
-            image_text = image[2]
-            image_start = node_text.find(image_text)
-            if image_start == 0:
-                new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
-                del images[0]
-                node_text = node_text[len(image_text) :]
-            else:
-                new_nodes.append(TextNode(node_text[:image_start], TextType.TEXT, None))
-                node_text = node_text[image_start:]
 
-    return new_nodes
+def text_to_textnodes(text: str) -> list[TextNode]:
+    """
+    Splits a span of markdown into text, bold, italic, code, link and image
+    nodes in one left-to-right scan, in time linear in the length of `text`.
+
+    `**` and `_` open bold and italic, and the next of the same kind closes
+    them; an emphasis still open when its parent closes (or the text ends) is
+    closed there, so emphasis nests but never crosses. Code spans run to the
+    next backtick and, like emphasis, to the end of the text if there is none.
+    Links and images are only recognized outside emphasis and code.
+    """
+    return _InlineScanner(text).scan()
 
 
-def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
-    new_nodes: list[TextNode] = []
-    for node in old_nodes:
-        if node.text_type is not TextType.TEXT:
-            new_nodes.append(node)
-            continue
+# the characters that can start an inline element
+_SPECIAL = re.compile(r"[*_`\[!]")
 
-        links = extract_markdown_links(node.text)
-        if not links or len(links) == 0:
-            new_nodes.append(node)
-            continue
+_EMPHASIS = {"**": TextType.BOLD, "_": TextType.ITALIC}
 
-        node_text = node.text
-        while node_text:
-            if not links:
-                new_nodes.append(TextNode(node_text, TextType.TEXT, None))
-                break
-            link = links[0]
-            link_text = link[2]
-            link_start = node_text.find(link_text)
-            if link_start == 0:
-                new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-                del links[0]
-                node_text = node_text[len(link_text) :]
-            else:
-                new_nodes.append(TextNode(node_text[:link_start], TextType.TEXT, None))
-                node_text = node_text[link_start:]
+# what ends a link's text before its `](`, or starts something it would swallow
+_NOT_IN_LINK_TEXT = ("]", "[", "**", "_", "`")
+_NOT_IN_LINK_URL = ("[", "`")
 
-    return new_nodes
 
+class _InlineScanner:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.nodes: list[TextNode] = []
+        # the open emphases, innermost last, and where in `nodes` their content starts
+        self.open: list[tuple[TextType, int]] = []
+        # every lookup after a position moves forward, so none is repeated
+        self._find = TextFinder(text).find
 
-def text_to_textnodes(text: str) -> list[TextNode]:
-    initial_nodes = [TextNode(text, TextType.TEXT, None)]
-    for text_type in [TextType.BOLD, TextType.ITALIC, TextType.CODE]:
-        initial_nodes = split_nodes_delimiter(
-            initial_nodes, text_type.delim(), text_type
-        )
-    initial_nodes = split_nodes_link(initial_nodes)
-    initial_nodes = split_nodes_image(initial_nodes)
-
-    return initial_nodes
+    def scan(self) -> list[TextNode]:
+        text = self.text
+        pos = plain = 0
+        while True:
+            match = _SPECIAL.search(text, pos)
+            if match is None:
+                break
+            pos = match.start()
+            char = text[pos]
+            if char == "*" and not text.startswith("**", pos):
+                pos += 1
+                continue
+            if char in "*_":
+                delimiter = "**" if char == "*" else "_"
+                self._add_text(text[plain:pos])
+                self._emphasis(_EMPHASIS[delimiter])
+                pos = plain = pos + len(delimiter)
+            elif char == "`":
+                self._add_text(text[plain:pos])
+                end = self._find("`", pos + 1)
+                if end == -1:
+                    end = len(text)
+                self.nodes.append(TextNode(text[pos + 1 : end], TextType.CODE))
+                pos = plain = end + 1
+            elif self.open:
+                pos += 1
+            elif char == "[":
+                pos, plain = self._link(pos, plain, TextType.LINK)
+            elif text.startswith("[", pos + 1):
+                pos, plain = self._link(pos + 1, plain, TextType.IMAGE)
+            else:
+                pos += 1
+        self._add_text(text[plain:])
+        while self.open:
+            self._close()
+        return self.nodes
+
+    def _add_text(self, text: str) -> None:
+        if text:
+            self.nodes.append(TextNode(text, TextType.TEXT))
+
+    def _emphasis(self, text_type: TextType) -> None:
+        if not any(open_type is text_type for open_type, _ in self.open):
+            self.open.append((text_type, len(self.nodes)))
+            return
+        # emphases opened inside this one close with it
+        while self.open[-1][0] is not text_type:
+            self._close()
+        self._close()
+
+    def _close(self) -> None:
+        text_type, start = self.open.pop()
+        children = self.nodes[start:]
+        del self.nodes[start:]
+        if not children:
+            node = TextNode("", text_type)
+        elif len(children) == 1 and children[0].text_type is TextType.TEXT:
+            node = TextNode(children[0].text, text_type)
+        else:
+            text = "".join(child.text for child in children)
+            node = TextNode(text, text_type, None, children)
+        self.nodes.append(node)
+
+    def _link(self, bracket: int, plain: int, text_type: TextType) -> tuple[int, int]:
+        """
+        Adds the link (or image) whose text opens at `bracket`, if there is one,
+        and returns where to continue scanning and where plain text starts.
+        The link must be on one line, its text runs to the first `](` and its
+        url to the next `)`.
+
+        The text may not hold a bracket: a stray `]`, as in `[1]`, closes the
+        `[`, and a later `[` is nearer the `](`, so the link starts there. Nor
+        may it hold emphasis or code, which are scanned as usual instead, so a
+        link never swallows them; its url, which is literal, may hold emphasis
+        but not code or the start of another link.
+        """
+        text = self.text
+        start = bracket if text_type is TextType.LINK else bracket - 1
+        newline = self._find("\n", bracket)
+        close = self._find("](", bracket + 1)
+        if close == -1 or -1 < newline < close:
+            # an `!` before `[` keeps the `[` from starting a link
+            return bracket + 1, plain
+        for needle in _NOT_IN_LINK_TEXT:
+            if -1 < self._find(needle, bracket + 1) < close:
+                return bracket + 1, plain
+        end = self._find(")", close + 2)
+        if end == -1 or -1 < newline < end:
+            return bracket + 1, plain
+        for needle in _NOT_IN_LINK_URL:
+            if -1 < self._find(needle, close + 2) < end:
+                return bracket + 1, plain
+
+        self._add_text(text[plain:start])
+        label, url = text[bracket + 1 : close], text[close + 2 : end]
+        self.nodes.append(TextNode(label, text_type, url))
+        return end + 1, end + 1
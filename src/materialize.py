@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from typing import Callable
+
+# _IOW(0x94, 9, int) from linux/fs.h: make the destination share the source's extents
+FICLONE = 0x40049409
+
+# strategies in the order "auto" tries them; reflinks come before hardlinks because
+# a reflinked copy is independent of its source, while a hardlinked one is the
+# same file (writing to it in place would also change the source)
+AUTO_ORDER = ("reflink", "hardlink", "copy_file_range", "sendfile", "copy")
+STRATEGIES = ("auto",) + AUTO_ORDER
+
+# errors that mean "this strategy cannot work here", not "this file is broken"
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EACCES,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.ENOTTY,
+    errno.EMLINK,
+    errno.EBADF,
+}
+
+
+def _reflink(source: str, dest: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "reflinks need linux")
+    import fcntl
+
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _copy_file_range(source: str, dest: str) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not available")
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def _sendfile(source: str, dest: str) -> None:
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        size = os.fstat(src.fileno()).st_size
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+def _copy(source: str, dest: str) -> None:
+    shutil.copyfile(source, dest)
+
+
+_COPIERS: dict[str, Callable[[str, str], None]] = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "copy": _copy,
+}
+
+
+class Materializer:
+    """
+    Puts a copy of a file at a destination using the cheapest strategy that works.
+    With `auto`, strategies that fail are remembered per pair of filesystems and
+    not tried again. A fixed strategy falls back to `auto` if it does not work.
+    """
+
+    def __init__(self, strategy: str = "auto") -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"invalid materialization strategy {strategy!r}")
+        self.strategy = strategy
+        self._unsupported: set[tuple[str, int, int]] = set()
+        self._lock = threading.Lock()
+
+    def _candidates(self) -> tuple[str, ...]:
+        if self.strategy == "auto":
+            return AUTO_ORDER
+        return (self.strategy,) + tuple(s for s in AUTO_ORDER if s != self.strategy)
+
+    def materialize(self, source: str, dest: str) -> str:
+        """
+        Atomically replaces `dest` with the contents, mode and modification time
+        of `source` and returns the name of the strategy that did it.
+        """
+        directory = os.path.dirname(os.path.abspath(dest))
+        os.makedirs(directory, exist_ok=True)
+        devices = (os.stat(source).st_dev, os.stat(directory).st_dev)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(dest)}.", suffix=".tmp"
+        )
+        os.close(fd)
+        try:
+            for strategy in self._candidates():
+                if (strategy, *devices) in self._unsupported:
+                    continue
+                try:
+                    self._run(strategy, source, tmp_path, devices)
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED or strategy == "copy":
+                        raise
+                    with self._lock:
+                        self._unsupported.add((strategy, *devices))
+                    continue
+                os.replace(tmp_path, dest)
+                return strategy
+            raise AssertionError("the plain copy strategy always applies")
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _run(
+        self, strategy: str, source: str, tmp_path: str, devices: tuple[int, int]
+    ) -> None:
+        if strategy == "hardlink":
+            if devices[0] != devices[1]:
+                raise OSError(
+                    errno.EXDEV, "source and output are on different filesystems"
+                )
+            # os.link will not overwrite, so swap the placeholder for the link
+            os.remove(tmp_path)
+            os.link(source, tmp_path)
+            return
+        _COPIERS[strategy](source, tmp_path)
+        shutil.copystat(source, tmp_path)
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import re
+from typing import NamedTuple, Optional
+
+from build_manifest import hash_text
+from cache_store import CacheStore
+
+# elements whose text is whitespace-sensitive and passed through untouched
+VERBATIM_TAGS = frozenset({"pre", "code", "textarea", "script", "style"})
+
+# elements whose content is not markup; their text runs to the matching end tag
+RAW_TEXT_TAGS = frozenset({"script", "style", "textarea"})
+
+VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+     "source", "track", "wbr"}  # fmt: skip
+)
+
+# whitespace next to these tags never renders, so it can be dropped
+BLOCK_TAGS = frozenset(
+    {"address", "article", "aside", "blockquote", "body", "dd", "details", "div",
+     "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2",
+     "h3", "h4", "h5", "h6", "head", "header", "hgroup", "hr", "html", "li", "link",
+     "main", "menu", "meta", "nav", "ol", "option", "p", "pre", "section", "script",
+     "style", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul"}
+)  # fmt: skip
+
+_P_FOLLOWERS = frozenset(
+    {"address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset",
+     "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+     "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre", "section",
+     "table", "ul"}
+)  # fmt: skip
+
+# end tags that may be omitted when the next start tag is one of these
+# (https://html.spec.whatwg.org/multipage/syntax.html#optional-tags)
+_OPTIONAL_END_TAGS: dict[str, frozenset[str]] = {
+    "li": frozenset({"li"}),
+    "dt": frozenset({"dt", "dd"}),
+    "dd": frozenset({"dt", "dd"}),
+    "p": _P_FOLLOWERS,
+    "option": frozenset({"option", "optgroup"}),
+    "tr": frozenset({"tr"}),
+    "td": frozenset({"td", "th"}),
+    "th": frozenset({"td", "th"}),
+    "thead": frozenset({"tbody", "tfoot"}),
+    "tbody": frozenset({"tbody", "tfoot"}),
+}
+# a `p` end tag is needed before the end of these parents
+_P_KEEPERS = frozenset({"a", "audio", "del", "ins", "map", "noscript", "video"})
+
+_TAG = re.compile(
+    r"<!--.*?-->"
+    r"|<![^>]*>"
+    r"|</?(?P<name>[a-zA-Z][\w:-]*)"
+    r"(?P<attrs>(?:\s+[^\s\"'>/=]+(?:\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s\"'>]+))?)*)"
+    r"\s*/?>",
+    re.S,
+)
+_ATTRIBUTE = re.compile(
+    r"(?P<name>[^\s\"'>/=]+)(?:\s*=\s*(?P<value>\"[^\"]*\"|'[^']*'|[^\s\"'>]+))?"
+)
+_UNQUOTED = re.compile(r"[^\s\"'=<>`]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class MinifyOptions(NamedTuple):
+    omit_optional_tags: bool = False
+
+    @property
+    def key(self) -> str:
+        return "html+tags" if self.omit_optional_tags else "html"
+
+
+def minify_attributes(attrs: str) -> str:
+    """Rewrites a tag's attributes, quoting values only where html requires it."""
+    parts: list[str] = []
+    for match in _ATTRIBUTE.finditer(attrs):
+        name, value = match.group("name"), match.group("value")
+        if value is None:
+            parts.append(name)
+            continue
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        if not value:
+            # an attribute without a value is the empty string
+            parts.append(name)
+        elif _UNQUOTED.fullmatch(value):
+            parts.append(f"{name}={value}")
+        else:
+            parts.append(f'{name}="{value.replace(chr(34), "&quot;")}"')
+    return "".join(f" {part}" for part in parts)
+
+
+class HTMLMinifier:
+    """
+    Minifies html fed to it in chunks of any size: whitespace is collapsed, and
+    dropped next to block-level tags, except inside `pre`, `code`, `textarea`,
+    `script` and `style`; comments are removed; attribute values are only
+    quoted where needed; and, with `omit_optional_tags`, end tags the html
+    spec allows to be left out (`</li>`, `</p>`, `</td>`, ...) are dropped.
+
+        minifier = HTMLMinifier()
+        parts = [minifier.feed(chunk) for chunk in chunks]
+        parts.append(minifier.close())
+    """
+
+    def __init__(self, options: MinifyOptions = MinifyOptions()) -> None:
+        self.options = options
+        self._buffer = ""
+        self._out: list[str] = []
+        self._stack: list[str] = []
+        self._verbatim = 0
+        self._text = ""  # collapsed text waiting for the next tag
+        self._after_block = True  # whether the last tag emitted was block-level
+        self._deferred: Optional[str] = None  # an end tag that may be omitted
+
+    def feed(self, html: str) -> str:
+        self._buffer += html
+        self._consume(final=False)
+        return self._flush()
+
+    def close(self) -> str:
+        self._consume(final=True)
+        self._emit_text(block_follows=True)
+        if self._deferred is not None and not self._may_omit_at_end(self._deferred):
+            self._out.append(f"</{self._deferred}>")
+        self._deferred = None
+        return self._flush()
+
+    def _flush(self) -> str:
+        result = "".join(self._out)
+        self._out.clear()
+        return result
+
+    def _consume(self, final: bool) -> None:
+        buffer = self._buffer
+        pos = 0
+        while pos < len(buffer):
+            raw = self._stack[-1] if self._stack else None
+            if raw in RAW_TEXT_TAGS:
+                end = buffer.lower().find(f"</{raw}", pos)
+                if end == -1:
+                    if not final:
+                        break
+                    end = len(buffer)
+                if end > pos:
+                    self._on_text(buffer[pos:end])
+                pos = end
+                if pos == len(buffer):
+                    break
+
+            start = buffer.find("<", pos)
+            if start == -1:
+                if not final:
+                    # the text may continue in the next chunk
+                    break
+                self._on_text(buffer[pos:])
+                pos = len(buffer)
+                break
+            if start > pos:
+                self._on_text(buffer[pos:start])
+                pos = start
+            match = _TAG.match(buffer, pos)
+            if match is None:
+                if not final and ">" not in buffer[pos:]:
+                    # probably a tag cut off at the end of the chunk
+                    break
+                self._on_text("<")
+                pos += 1
+                continue
+            self._on_tag(match)
+            pos = match.end()
+        self._buffer = buffer[pos:]
+
+    def _on_text(self, text: str) -> None:
+        if self._verbatim:
+            self._emit_deferred(None, False)
+            self._out.append(text)
+            return
+        collapsed = _WHITESPACE.sub(" ", text)
+        if self._after_block and not self._text:
+            collapsed = collapsed.lstrip(" ")
+        if collapsed:
+            self._emit_deferred(None, False)
+            self._text += collapsed
+
+    def _emit_text(self, block_follows: bool) -> None:
+        text = self._text.rstrip(" ") if block_follows else self._text
+        if text:
+            self._out.append(text)
+        self._text = ""
+
+    def _on_tag(self, match: re.Match) -> None:
+        token = match.group(0)
+        name = match.group("name")
+        if name is None:
+            if token.startswith("<!--"):
+                return
+            # doctype
+            self._emit_text(block_follows=True)
+            self._emit_deferred(None, False)
+            self._out.append(token)
+            self._after_block = True
+            return
+
+        lower = name.lower()
+        is_end = token.startswith("</")
+        block = lower in BLOCK_TAGS
+        if self._verbatim and not (is_end and lower in self._stack):
+            # markup inside `pre` keeps its whitespace too
+            self._out.append(token)
+            if not is_end and lower not in VOID_TAGS:
+                self._push(lower)
+            return
+
+        self._emit_text(block_follows=block)
+        self._emit_deferred(lower, is_end)
+
+        if is_end:
+            self._pop(lower)
+            if lower in VOID_TAGS and self.options.omit_optional_tags:
+                # `</img>` is ignored by browsers
+                pass
+            elif self.options.omit_optional_tags and self._may_omit(lower):
+                self._deferred = lower
+            else:
+                self._out.append(f"</{name}>")
+        else:
+            attrs = minify_attributes(match.group("attrs"))
+            self._out.append(f"<{name}{attrs}>")
+            if lower not in VOID_TAGS:
+                self._push(lower)
+        self._after_block = block
+
+    def _may_omit(self, name: str) -> bool:
+        if name in _OPTIONAL_END_TAGS:
+            return True
+        # `</head>`, `</body>` and `</html>` only when they close the document's own
+        return (name == "html" and not self._stack) or (
+            name in ("head", "body") and self._stack == ["html"]
+        )
+
+    def _may_omit_at_end(self, name: str) -> bool:
+        return name in ("html", "body")
+
+    def _emit_deferred(self, name: Optional[str], is_end: bool) -> None:
+        """Decides whether the deferred end tag is needed before the tag `name`."""
+        deferred = self._deferred
+        if deferred is None:
+            return
+        self._deferred = None
+
+        if name is not None:
+            if not is_end and name in _OPTIONAL_END_TAGS.get(deferred, ()):
+                return
+            if is_end:
+                # the parent closes right after the deferred element
+                parent = self._stack[-1] if self._stack else None
+                if deferred in ("html", "body", "head"):
+                    return
+                if deferred == "p" and parent in _P_KEEPERS:
+                    pass
+                elif deferred in _OPTIONAL_END_TAGS and parent == name:
+                    return
+            elif deferred == "head" and name == "body":
+                return
+            elif deferred in ("html", "body"):
+                return
+        self._out.append(f"</{deferred}>")
+
+    def _push(self, name: str) -> None:
+        self._stack.append(name)
+        if name in VERBATIM_TAGS:
+            self._verbatim += 1
+
+    def _pop(self, name: str) -> None:
+        if name not in self._stack:
+            return
+        while self._stack:
+            top = self._stack.pop()
+            if top in VERBATIM_TAGS:
+                self._verbatim -= 1
+            if top == name:
+                break
+
+
+def minify_html(html: str, options: MinifyOptions = MinifyOptions()) -> str:
+    minifier = HTMLMinifier(options)
+    return minifier.feed(html) + minifier.close()
+
+
+_CSS_TOKEN = re.compile(
+    r"(?P<string>\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')"
+    r"|(?P<comment>/\*.*?\*/)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>[^\"'/\s]+|/)",
+    re.S,
+)
+# no whitespace is needed on either side of these
+_CSS_PUNCTUATION = frozenset("{};,>~")
+_CSS_SPLIT = re.compile(r"([{};,>~:])")
+
+
+def minify_css(css: str) -> str:
+    """
+    Removes comments, redundant whitespace and the last `;` of every block.
+    Strings are kept as they are. Spaces around `+` and `-` are kept because
+    `calc(1px + 2px)` needs them, and so are spaces before `:`, which tell
+    `a :hover` from `a:hover`.
+    """
+    out: list[str] = []
+    pending_space = False
+    for match in _CSS_TOKEN.finditer(css):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        if kind == "space":
+            pending_space = True
+            continue
+        token = match.group(0)
+        # split runs like `a{b:c}` so punctuation can be looked at on its own
+        pieces = _CSS_SPLIT.split(token) if kind == "other" else [token]
+        for piece in pieces:
+            if not piece:
+                continue
+            if pending_space and out:
+                previous = out[-1][-1]
+                if previous not in _CSS_PUNCTUATION and previous != ":":
+                    if piece[0] not in _CSS_PUNCTUATION:
+                        out.append(" ")
+            pending_space = False
+            if piece == "}" and out and out[-1] == ";":
+                out.pop()
+            out.append(piece)
+    return "".join(out)
+
+
+class CSSMinifier:
+    """
+    `minify_css` with results remembered by the hash of their input, and kept
+    in `store` between builds.
+    """
+
+    key = "minify-css"
+
+    def __init__(self, store: Optional[CacheStore] = None) -> None:
+        self.store = store
+        self._cache: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, css: str) -> str:
+        key = hash_text(css)
+        cached = self._cache.get(key)
+        if cached is None and self.store is not None:
+            data = self.store.get("css", self.store.key(self.key, key))
+            if data is not None:
+                cached = self._cache[key] = data.decode("utf-8")
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        result = self._cache[key] = minify_css(css)
+        if self.store is not None:
+            self.store.put("css", self.store.key(self.key, key), result.encode("utf-8"))
+        return result
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional
+
+from build_manifest import hash_bytes, hash_file
+
+
+class FileStamp(NamedTuple):
+    size: int
+    digest: str
+
+    @classmethod
+    def of(cls, data: bytes) -> FileStamp:
+        return cls(len(data), hash_bytes(data))
+
+
+class WriteStats:
+    """Counts what a build did to its output files."""
+
+    def __init__(self) -> None:
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+
+    def __repr__(self) -> str:
+        return f"WriteStats(written={self.written}, skipped={self.skipped}, removed={self.removed})"
+
+    def __str__(self) -> str:
+        return f"{self.written} written, {self.skipped} skipped, {self.removed} removed"
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Writes `data` to a temporary file next to `path` and renames it into place,
+    so readers (and crashed builds) never see a partially written file.
+    """
+    fd, tmp_path, mode = _temporary_file(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+
+
+def _temporary_file(path: str) -> tuple[int, str, int]:
+    """Creates a temporary file next to `path`; returns its fd and path, and its mode."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    return fd, tmp_path, mode
+
+
+def _discard(tmp_path: str) -> None:
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def write_if_changed(
+    path: str,
+    data: bytes,
+    stamp: Optional[FileStamp] = None,
+    previous: Optional[FileStamp] = None,
+) -> bool:
+    """
+    Atomically writes `data` to `path` unless the file already holds those bytes,
+    and returns whether it wrote. `previous` is the stamp recorded when the file
+    was last written; if the size on disk still matches it, comparing digests is
+    enough and the file is not read back.
+    """
+    if stamp is None:
+        stamp = FileStamp.of(data)
+
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        size = None
+
+    if size == stamp.size:
+        if previous is not None and previous.size == size:
+            if previous == stamp:
+                return False
+        else:
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+
+    atomic_write(path, data)
+    return True
+
+
+class StreamingOutput:
+    """
+    Writes a file from text handed over a piece at a time, for outputs too
+    large to hold in memory. Like `write_if_changed`, the file is only
+    replaced, atomically, if its bytes change:
+
+        with StreamingOutput(path, previous) as out:
+            for piece in pieces:
+                out.write(piece)
+        written, stamp = out.result
+
+    If the block raises, the output is discarded and `path` left untouched.
+    """
+
+    def __init__(self, path: str, previous: Optional[FileStamp] = None) -> None:
+        self.path = path
+        self.previous = previous
+        self.result: Optional[tuple[bool, FileStamp]] = None
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._file: Optional[BinaryIO] = None
+        self._tmp_path = ""
+        self._mode = 0
+
+    def __enter__(self) -> StreamingOutput:
+        fd, self._tmp_path, self._mode = _temporary_file(self.path)
+        self._file = os.fdopen(fd, "wb", buffering=1 << 16)
+        return self
+
+    def write(self, text: str) -> None:
+        if self._file is None:
+            raise ValueError("the output is not open")
+        data = text.encode("utf-8")
+        self._digest.update(data)
+        self._size += len(data)
+        self._file.write(data)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        assert self._file is not None
+        self._file.close()
+        self._file = None
+        if exc_type is not None:
+            _discard(self._tmp_path)
+            return
+        try:
+            self.result = self._commit()
+        except BaseException:
+            _discard(self._tmp_path)
+            raise
+
+    def _commit(self) -> tuple[bool, FileStamp]:
+        stamp = FileStamp(self._size, self._digest.hexdigest())
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            size = None
+
+        if size == stamp.size:
+            if self.previous is not None and self.previous.size == size:
+                unchanged = self.previous == stamp
+            else:
+                unchanged = hash_file(self.path) == stamp.digest
+            if unchanged:
+                _discard(self._tmp_path)
+                return False, stamp
+
+        os.chmod(self._tmp_path, self._mode)
+        os.replace(self._tmp_path, self.path)
+        return True, stamp
+
+
+def remove_output(root: str, output: str) -> bool:
+    """Deletes a generated file and any directories left empty by its removal."""
+    output_path = os.path.join(root, output)
+    removed = os.path.isfile(output_path)
+    if removed:
+        os.remove(output_path)
+
+    parent = os.path.dirname(output_path)
+    while parent != root and os.path.isdir(parent) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+    return removed
@@ -1,5 +1,8 @@
 import re
 from enum import Enum
+from typing import Iterable, Iterator, NamedTuple, Optional, TextIO
+
+import profiler
 
 
 class BlockType(Enum):
@@ -11,58 +14,276 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+class Block(NamedTuple):
+    text: str
+    type: BlockType
+    # where the block starts in the source: its line (from 0) and character index
+    line: int
+    offset: int
+
+
 def markdown_to_blocks(markdown: str) -> list[str]:
     """It takes a raw Markdown string (representing a full document) as input and returns a list of "block" strings."""
+    return [block.text for block in scan_blocks(markdown)]
+
+
+def scan_blocks(markdown: str) -> list[Block]:
+    """
+    Splits a document into its blocks, in order, in a single pass over its lines.
+    Blocks are separated by empty lines and stripped of surrounding whitespace,
+    and each is typed as `block_to_block_type` would type it.
+    """
     if not type(markdown) is str:
         raise TypeError(f"invalid input type {type(markdown)}; only strings accepted")
 
-    initial_blocks: list[str] = markdown.split("\n\n")
-    blocks: list[str] = []
-    for block in initial_blocks:
-        block = block.strip()
-        if len(block) > 0:
-            blocks.append(block)
+    blocks: list[Block] = []
+    start = -1  # where the lines of the current block start
+    start_line = 0
+    pos = line = 0
+    size = len(markdown)
+    while pos <= size:
+        end = markdown.find("\n", pos)
+        if end == -1:
+            end = size
+        if end == pos:
+            if start != -1:
+                _add_block(blocks, markdown, start, pos - 1, start_line)
+                start = -1
+        elif start == -1:
+            start, start_line = pos, line
+        pos = end + 1
+        line += 1
+    if start != -1:
+        _add_block(blocks, markdown, start, size, start_line)
     return blocks
 
 
+def _add_block(
+    blocks: list[Block], markdown: str, start: int, end: int, line: int
+) -> None:
+    block = _make_block(markdown[start:end], start, line)
+    if block is not None:
+        blocks.append(block)
+
+
+def _make_block(text: str, offset: int, line: int) -> Optional[Block]:
+    stripped = text.lstrip()
+    if not stripped:
+        return None
+    leading = len(text) - len(stripped)
+    line += text.count("\n", 0, leading)
+    stripped = stripped.rstrip()
+    return Block(stripped, classify_block(stripped), line, offset + leading)
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    """
+    Yields the blocks `scan_blocks` would return, from a document read a line
+    at a time, each line ending in its line break as file objects yield them.
+    Only the lines of the current block are held in memory.
+    """
+    current: list[str] = []
+    start = start_line = pos = 0
+    for number, line in enumerate(lines):
+        if line == "\n" or not line:
+            if current:
+                block = _make_block("".join(current), start, start_line)
+                current.clear()
+                if block is not None:
+                    yield block
+        else:
+            if not current:
+                start, start_line = pos, number
+            current.append(line)
+        pos += len(line)
+    if current:
+        block = _make_block("".join(current), start, start_line)
+        if block is not None:
+            yield block
+
+
+def split_front_matter(markdown: str) -> tuple[dict[str, str], str]:
+    """
+    Splits an optional front matter header off a markdown document.
+    The header is a block of `key: value` lines fenced by `---` lines at the very top:
+
+        ---
+        layout: layouts/post.html
+        ---
+    """
+    if not isinstance(markdown, str):
+        raise TypeError(f"invalid input type {type(markdown)}; only strings accepted")
+
+    if not markdown.startswith("---\n"):
+        return {}, markdown
+
+    end = markdown.find("\n---", 3)
+    while end != -1 and markdown[end + 4 : end + 5] not in ("", "\n"):
+        end = markdown.find("\n---", end + 4)
+    if end == -1:
+        return {}, markdown
+
+    return _parse_front_matter(markdown[4:end].split("\n")), markdown[end + 5 :]
+
+
+def read_front_matter(f: TextIO) -> dict[str, str]:
+    """
+    Reads the front matter header (see `split_front_matter`) off the start of
+    the file `f`, leaving it at the start of the body. Without a header, `f`
+    is rewound to its start and no metadata is returned.
+    """
+    if f.readline() != "---\n":
+        f.seek(0)
+        return {}
+    lines: list[str] = []
+    for line in iter(f.readline, ""):
+        if line in ("---\n", "---"):
+            return _parse_front_matter(lines)
+        lines.append(line.rstrip("\n"))
+    # never closed, so it is part of the body
+    f.seek(0)
+    return {}
+
+
+def _parse_front_matter(lines: list[str]) -> dict[str, str]:
+    meta: dict[str, str] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip():
+            raise ValueError(f"invalid front matter line: {line!r}")
+        meta[key.strip()] = value.strip()
+    return meta
+
+
 def block_to_block_type(md: str) -> BlockType:
     if not isinstance(md, str):
         raise TypeError(f"invalid input type: {type(md)}, only str type accepted.")
+    return classify_block(md)
+
 
-    if is_heading(md):
-        return BlockType.HEADING
-    elif is_code(md):
-        return BlockType.CODE
-    elif is_quote(md):
+def classify_block(md: str) -> BlockType:
+    """
+    Types a block by its first character and, for quotes and lists, the start
+    of each of its lines. Gives the same results as trying `is_heading`,
+    `is_code`, `is_quote`, `is_unordered_list` and `is_ordered_list` in turn.
+    """
+    first = md[:1]
+    if first == "#":
+        level = len(md) - len(md.lstrip("#"))
+        if level <= 6 and md[level : level + 1] == " " and "\n" not in md:
+            return BlockType.HEADING
+    elif first == "`":
+        if md.startswith("```\n") and md.endswith("```") and len(md) >= 7:
+            return BlockType.CODE
+    elif first == ">":
+        if all(line[:1] == ">" for line in md.split("\n")):
+            return BlockType.QUOTE
+    elif first in ("-", "\n"):
+        if _is_unordered_list(md):
+            return BlockType.UNDORDERED_LIST
+    elif first == "1":
+        if is_ordered_list(md):
+            return BlockType.ORDERED_LIST
+    elif not first:
+        # an empty string is a quote with no lines
         return BlockType.QUOTE
-    elif is_unordered_list(md):
-        return BlockType.UNDORDERED_LIST
-    elif is_ordered_list(md):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
+    return BlockType.PARAGRAPH
+
+
+def _is_unordered_list(md: str) -> bool:
+    lines = md.split("\n")
+    # the list may end with a line break, and one more after that
+    for _ in range(2):
+        if lines and lines[-1] == "":
+            lines.pop()
+    return all(line[:2] == "- " for line in lines)
+
+
+# the grammar of images and links; `find_markdown_links` matches it without
+# backtracking, which these patterns do on text like "[a](" * n
+IMAGE_PATTERN = re.compile(r"(?P<image>!\[(?P<alt_text>.*?)\]\((?P<url>.*?)\))")
+LINK_PATTERN = re.compile(r"(?<!\!)(?P<link>\[(?P<alt_text>.*?)\]\((?P<url>.*?)\))")
+
+
+class TextFinder:
+    """
+    `text.find(needle, pos)`, for a `pos` that only grows between calls with
+    the same needle. An occurrence found by an earlier call is reused until
+    `pos` passes it, so every part of the text is searched for each needle at
+    most once, however many lookups fail.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._found: dict[str, int] = {}
+
+    def find(self, needle: str, pos: int) -> int:
+        found = self._found.get(needle)
+        if found is None or -1 < found < pos:
+            found = self._found[needle] = self.text.find(needle, pos)
+        return found
+
+
+class MarkdownLink(NamedTuple):
+    alt_text: str
+    url: str
+    # the span of the whole link in the text
+    start: int
+    end: int
+
+
+def find_markdown_links(text: str, images: bool = False) -> Iterator[MarkdownLink]:
+    """
+    Finds the links (or, with `images`, the images) in `text`, as
+    `LINK_PATTERN` and `IMAGE_PATTERN` would: each is on one line, its text
+    runs to the first `](` and its url to the next `)`. Takes time linear in
+    the length of `text`.
+    """
+    finder = TextFinder(text)
+    find = finder.find
+    opener = "![" if images else "["
+    pos = 0
+    while True:
+        start = find(opener, pos)
+        if start == -1:
+            return
+        if not images and start > 0 and text[start - 1] == "!":
+            pos = start + 1
+            continue
+        bracket = start + len(opener) - 1
+        close = find("](", bracket + 1)
+        if close == -1:
+            return
+        end = find(")", close + 2)
+        if end == -1:
+            return
+        newline = find("\n", start)
+        if -1 < newline < end:
+            # nothing opened before the line break can close after it
+            pos = newline + 1
+            continue
+        yield MarkdownLink(
+            text[bracket + 1 : close], text[close + 2 : end], start, end + 1
+        )
+        pos = end + 1
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str, str]]:
-    # pat = r"!\[(.*?)\]\((.*?)\)"
-    pat = r"(?P<image>!\[(?P<alt_text>.*?)\]\((?P<url>.*?)\))"
-    matches = re.finditer(pat, text)
-    results: list[tuple[str, str, str]] = []
-    for match in matches:
-        result = (match.group("alt_text"), match.group("url"), match.group("image"))
-        results.append(result)
-    return results
+    profiler.count("regex")
+    return [
+        (image.alt_text, image.url, text[image.start : image.end])
+        for image in find_markdown_links(text, images=True)
+    ]
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str, str]]:
-    # pat = r"(?<!pattern)\[(.*?)\]\((.*?)\)"
-    pat = r"(?<!\!)(?P<link>\[(?P<alt_text>.*?)\]\((?P<url>.*?)\))"
-    matches = re.finditer(pat, text)
-    results: list[tuple[str, str, str]] = []
-    for match in matches:
-        result = (match.group("alt_text"), match.group("url"), match.group("link"))
-        results.append(result)
-    return results
+    profiler.count("regex")
+    return [
+        (link.alt_text, link.url, text[link.start : link.end])
+        for link in find_markdown_links(text)
+    ]
 
 
 def extract_title(md: str) -> str:
@@ -86,34 +307,45 @@ def extract_title(md: str) -> str:
     raise ValueError(error_message)
 
 
+def find_title(blocks: Iterable[Block]) -> Optional[str]:
+    """The title `extract_title` would find among `blocks`, or None if there is none."""
+    for block in blocks:
+        # a title is always typed a heading, so nothing else is matched against it
+        if block.type is BlockType.HEADING and is_title(block.text):
+            return block.text[2:]
+    return None
+
+
 def is_title(md: str) -> bool:
+    profiler.count("regex")
     pat = r"#{1} .*"
     match = re.fullmatch(pat, md)
     return True if match else False
 
 
 def is_heading(md: str) -> bool:
+    profiler.count("regex")
     pat = r"#{1,6} .*"
     match = re.fullmatch(pat, md)
     return True if match else False
 
 
 def is_code(md: str) -> bool:
+    profiler.count("regex")
     pat = r"```\n[\s\S]*```"
     match = re.fullmatch(pat, md)
     return True if match else False
 
 
 def is_quote(md: str) -> bool:
-    # pat = r">.*"
-    # match = re.fullmatch(pat, md)
-    return "\n".join(re.findall(r">.*", md)) == md
+    # an empty string is a quote with no lines
+    return not md or all(line[:1] == ">" for line in md.split("\n"))
 
 
 def is_unordered_list(md: str) -> bool:
-    pat = r"\A(?:(- .*)\n{0,1})*\n{0,1}"
-    match = re.fullmatch(pat, md)
-    return True if match else False
+    # the pattern r"(?:(- .*)\n{0,1})*\n{0,1}" says the same, but backtracks
+    # exponentially on a long line of "- - - ..." that fails to match
+    return _is_unordered_list(md)
 
 
 def is_ordered_list(md: str) -> bool:
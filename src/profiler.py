@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator, Optional
+
+from htmlnode import HTMLNode
+
+# The stages a page goes through, in order, as reported by `--profile`.
+STAGES = (
+    "read",
+    "scan_blocks",
+    "text_to_textnodes",
+    "to_html",
+    "template",
+    "write",
+)
+
+
+class BuildProfiler:
+    """Collects wall time per stage and per page, plus hot-path counters."""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = defaultdict(float)
+        self.pages: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, int] = defaultdict(int)
+        self._page: Optional[dict[str, float]] = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def page(self, name: str) -> Iterator[None]:
+        """Attributes the stages timed inside the block to the page `name`."""
+        outer = self._page
+        timings = self.pages.setdefault(name, defaultdict(float))
+        self._page = timings
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings["total"] += time.perf_counter() - started
+            self._page = outer
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] += elapsed
+            if self._page is not None:
+                self._page[name] += elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def slowest_pages(self, n: int = 10) -> list[tuple[str, dict[str, float]]]:
+        ranked = sorted(self.pages.items(), key=lambda item: -item[1]["total"])
+        return ranked[:n]
+
+    def report(self) -> dict:
+        return {
+            "wall_seconds": time.perf_counter() - self._started,
+            "stages": {name: self.stages.get(name, 0.0) for name in _stage_names(self)},
+            "counters": dict(sorted(self.counters.items())),
+            "pages": {
+                name: dict(timings) for name, timings in sorted(self.pages.items())
+            },
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
+
+    def format_table(self, n: int = 10) -> str:
+        stages = _stage_names(self)
+        lines = ["stage totals:"]
+        for name in stages:
+            lines.append(f"  {name:<20} {self.stages.get(name, 0.0) * 1000:>10.2f}ms")
+        lines.append("counters:")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<20} {value:>12}")
+
+        # stages outside the page loop (like copying static files) have no per-page time
+        stages = [
+            name for name in stages if any(name in t for t in self.pages.values())
+        ]
+        lines.append(f"slowest {n} pages (ms):")
+        header = "  " + " ".join(f"{name[:10]:>10}" for name in stages)
+        lines.append(f"{header} {'total':>10}  page")
+        for name, timings in self.slowest_pages(n):
+            row = "  " + " ".join(
+                f"{timings.get(stage, 0.0) * 1000:>10.2f}" for stage in stages
+            )
+            lines.append(f"{row} {timings['total'] * 1000:>10.2f}  {name}")
+        return "\n".join(lines)
+
+
+def _stage_names(profiler: BuildProfiler) -> list[str]:
+    extra = sorted(name for name in profiler.stages if name not in STAGES)
+    return list(STAGES) + extra
+
+
+# The profiler the build reports to; `None` (the default) disables profiling,
+# leaving only a global lookup on the hot paths.
+_active: Optional[BuildProfiler] = None
+_NULL = nullcontext()
+
+
+def enable(profiler: Optional[BuildProfiler] = None) -> BuildProfiler:
+    global _active
+    _active = profiler if profiler is not None else BuildProfiler()
+    return _active
+
+
+def disable() -> None:
+    global _active
+    _active = None
+
+
+def active() -> Optional[BuildProfiler]:
+    return _active
+
+
+def stage(name: str) -> ContextManager:
+    if _active is None:
+        return _NULL
+    return _active.stage(name)
+
+
+def page(name: str) -> ContextManager:
+    if _active is None:
+        return _NULL
+    return _active.page(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _active is not None:
+        _active.counters[name] += n
+
+
+def count_nodes(root: HTMLNode) -> int:
+    total = 0
+    stack: list[HTMLNode] = [root]
+    while stack:
+        node = stack.pop()
+        total += 1
+        if node.children:
+            stack.extend(node.children)
+    return total
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Callable, Optional
+
+from build_manifest import hash_text
+
+# `{{ Name }}` marks a slot filled in at render time,
+# `{% include "partial.html" %}` is replaced by the partial when the template is compiled.
+_TOKEN = re.compile(
+    r"\{\{\s*(?P<slot>\w+)\s*\}\}"
+    r"|\{%\s*include\s+[\"'](?P<include>[^\"']+)[\"']\s*%\}"
+)
+
+
+class Template:
+    """
+    A template compiled into literal segments separated by named slots,
+    so rendering is a single join: `segments[0] + slots[0] + segments[1] + ...`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segments: list[str],
+        slots: list[str],
+        dependencies: list[str],
+    ) -> None:
+        if len(segments) != len(slots) + 1:
+            raise ValueError("a template needs exactly one more segment than slots")
+        self.path = path
+        self.segments = tuple(segments)
+        self.slots = tuple(slots)
+        self.dependencies = tuple(dependencies)
+        self.digest = hash_text("\0".join(self.segments + ("",) + self.slots))
+        self._variants: dict[object, Template] = {}
+
+    def __repr__(self) -> str:
+        return f"Template({self.path!r}, slots={list(self.slots)})"
+
+    def render(self, context: dict[str, str]) -> str:
+        parts: list[str] = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            if slot not in context:
+                raise ValueError(f"no value for template slot {slot!r} in {self.path}")
+            parts.append(context[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+    def stream(
+        self,
+        context: dict[str, str],
+        write: Callable[[str], object],
+        slot: str,
+        fill: Callable[[], object],
+    ) -> None:
+        """
+        Renders like `render`, handing the html to `write` a piece at a time.
+        Wherever `slot` appears, `fill` is called to write its value instead,
+        so a value too large to hold in memory never has to be.
+        """
+        write(self.segments[0])
+        for name, segment in zip(self.slots, self.segments[1:]):
+            if name == slot:
+                fill()
+            elif name in context:
+                write(context[name])
+            else:
+                raise ValueError(f"no value for template slot {name!r} in {self.path}")
+            write(segment)
+
+    def map_literals(self, key: object, transform: Callable[[str], str]) -> Template:
+        """
+        Returns a copy of the template with `transform` applied to every literal segment.
+        The copy is cached under `key`, so the transform runs once per template.
+        """
+        variant = self._variants.get(key)
+        if variant is None:
+            variant = Template(
+                self.path,
+                [transform(segment) for segment in self.segments],
+                list(self.slots),
+                list(self.dependencies),
+            )
+            self._variants[key] = variant
+        return variant
+
+
+def compile_template(path: str) -> Template:
+    """Parses the template at `path`, inlining its partials."""
+    segments: list[str] = [""]
+    slots: list[str] = []
+    dependencies: list[str] = []
+    _compile_into(os.path.abspath(path), segments, slots, dependencies, [])
+    return Template(os.path.abspath(path), segments, slots, dependencies)
+
+
+def _compile_into(
+    path: str,
+    segments: list[str],
+    slots: list[str],
+    dependencies: list[str],
+    including: list[str],
+) -> None:
+    if path in including:
+        chain = " -> ".join(including + [path])
+        raise ValueError(f"recursive template include: {chain}")
+
+    with open(path) as f:
+        source = f.read()
+    if path not in dependencies:
+        dependencies.append(path)
+
+    position = 0
+    for match in _TOKEN.finditer(source):
+        segments[-1] += source[position : match.start()]
+        position = match.end()
+        if match.group("slot") is not None:
+            slots.append(match.group("slot"))
+            segments.append("")
+        else:
+            partial = os.path.join(os.path.dirname(path), match.group("include"))
+            _compile_into(
+                os.path.abspath(partial),
+                segments,
+                slots,
+                dependencies,
+                including + [path],
+            )
+    segments[-1] += source[position:]
+
+
+# path -> ((mtime, size) of the template and each of its partials, compiled template)
+_cache: dict[str, tuple[tuple[tuple[int, int], ...], Template]] = {}
+
+
+def _stamps(paths: tuple[str, ...]) -> Optional[tuple[tuple[int, int], ...]]:
+    try:
+        stats = [os.stat(path) for path in paths]
+    except FileNotFoundError:
+        return None
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+
+def load_template(path: str) -> Template:
+    """
+    Returns the compiled template at `path`, reusing the cached compilation
+    as long as neither the template nor any of its partials has been modified.
+    """
+    path = os.path.abspath(path)
+    cached = _cache.get(path)
+    if cached is not None:
+        stamps, template = cached
+        if _stamps(template.dependencies) == stamps:
+            return template
+
+    template = compile_template(path)
+    stamps = _stamps(template.dependencies)
+    if stamps is not None:
+        _cache[path] = (stamps, template)
+    return template
+
+
+def resolve_layout(default_template: str, layout: Optional[str]) -> str:
+    """
+    Returns the template a page should be rendered with: the default template,
+    or the page's `layout`, given relative to the default template's directory.
+    """
+    if not layout:
+        return os.path.abspath(default_template)
+    return os.path.abspath(os.path.join(os.path.dirname(default_template), layout))
+
+
+def cached_dependencies() -> set[str]:
+    """Every template and partial file the cached templates were compiled from."""
+    return {path for _, template in _cache.values() for path in template.dependencies}
+
+
+def clear_template_cache() -> None:
+    _cache.clear()
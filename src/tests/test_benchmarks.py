@@ -0,0 +1,208 @@
+import math
+import os
+import tempfile
+import unittest
+
+from benchmarks.codec import measure_codec
+from benchmarks.corpus import DEFAULT_MIX, CorpusSpec, generate_corpus, page_paths
+from benchmarks.memory import measure_memory
+from benchmarks.pathological import (
+    CASES,
+    DEFAULT_SIZES,
+    Case,
+    measure_case,
+    run_pathological,
+    scaling_exponent,
+)
+from benchmarks.throughput import (
+    BenchResult,
+    compare,
+    load_baselines,
+    run_throughput,
+    save_baseline,
+)
+from generate_page import generate_pages_recursive
+from parse_markdown import LINK_PATTERN
+
+
+def _read_tree(root: str) -> dict[str, bytes]:
+    files: dict[str, bytes] = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_same_spec_same_files(self):
+        spec = CorpusSpec(pages=20, page_size=1000, depth=2, fanout=3, seed=7)
+        a = os.path.join(self.root, "a")
+        b = os.path.join(self.root, "b")
+        self.assertEqual(generate_corpus(a, spec), generate_corpus(b, spec))
+        self.assertEqual(_read_tree(a), _read_tree(b))
+
+        c = os.path.join(self.root, "c")
+        generate_corpus(c, spec._replace(seed=8))
+        self.assertNotEqual(_read_tree(a), _read_tree(c))
+
+    def test_shape(self):
+        spec = CorpusSpec(pages=50, page_size=2000, depth=2, fanout=2)
+        stats = generate_corpus(self.root, spec)
+        files = _read_tree(self.root)
+        self.assertEqual(stats.pages, 50)
+        self.assertEqual(len(files), 50)
+        self.assertEqual(stats.bytes, sum(len(data) for data in files.values()))
+        self.assertIn("index.md", files)
+        self.assertEqual(max(path.count(os.sep) for path in files), 3)
+        self.assertTrue(all(len(data) >= 2000 for data in files.values()))
+        self.assertEqual(len(set(page_paths(spec))), 50)
+
+    def test_mix(self):
+        mix = dict.fromkeys(DEFAULT_MIX, 0)
+        mix["code"] = 1
+        stats = generate_corpus(self.root, CorpusSpec(pages=3, page_size=500, mix=mix))
+        self.assertEqual(list(stats.blocks), ["code"])
+
+        with self.assertRaises(ValueError):
+            generate_corpus(self.root, CorpusSpec(mix=dict.fromkeys(mix, 0)))
+        with self.assertRaises(ValueError):
+            generate_corpus(self.root, CorpusSpec(pages=0))
+
+    def test_corpus_builds(self):
+        content = os.path.join(self.root, "content")
+        generate_corpus(
+            content, CorpusSpec(pages=30, page_size=3000, depth=2, fanout=2)
+        )
+        template = os.path.join(self.root, "template.html")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        stats = generate_pages_recursive(
+            content, template, os.path.join(self.root, "docs"), "/"
+        )
+        self.assertEqual(stats.written, 30)
+
+
+class TestThroughput(unittest.TestCase):
+    def test_run_and_compare_with_baseline(self):
+        spec = CorpusSpec(pages=5, page_size=500, depth=1, fanout=2)
+        with tempfile.TemporaryDirectory() as root:
+            results = run_throughput(spec, workdir=root)
+            self.assertEqual([r.scenario for r in results], ["full", "incremental"])
+            for result in results:
+                self.assertEqual(result.pages, 5)
+                self.assertGreater(result.seconds, 0)
+                self.assertGreater(result.peak_rss, 0)
+            # the scratch corpus is cleaned up
+            self.assertEqual(os.listdir(root), [])
+
+            path = os.path.join(root, "baseline.json")
+            save_baseline(path, "before", spec, results)
+            save_baseline(path, "after", spec, results)
+            baselines = load_baselines(path)
+            self.assertEqual(sorted(baselines), ["after", "before"])
+
+            lines = compare(baselines["before"], spec, results)
+            self.assertEqual(
+                lines,
+                [
+                    "full         pages/s +0.0%  peak rss +0.0%",
+                    "incremental  pages/s +0.0%  peak rss +0.0%",
+                ],
+            )
+            lines = compare(baselines["before"], spec._replace(pages=6), results)
+            self.assertIn("different corpus", lines[0])
+
+    def test_rates(self):
+        result = BenchResult("full", 100, 2_000_000, 1, 2.0, 0)
+        self.assertEqual(result.pages_per_sec, 50)
+        self.assertEqual(result.mb_per_sec, 1)
+
+
+class TestMemory(unittest.TestCase):
+    def test_measure_memory(self):
+        results = measure_memory(CorpusSpec(pages=3, page_size=1000))
+        self.assertEqual([r.kind for r in results], ["html", "text", "flat"])
+        for result in results:
+            self.assertGreater(result.nodes, 0)
+            self.assertGreater(result.text_bytes, 0)
+            self.assertLess(result.object_bytes_per_node, 100)
+            self.assertGreater(result.traced_bytes, result.object_bytes)
+            self.assertIn("B/node", str(result))
+        html, text, flat = results
+        # nodes have no __dict__, so each is a small fixed size
+        self.assertEqual(html.object_bytes % html.nodes, 0)
+        self.assertEqual(text.object_bytes % text.nodes, 0)
+        self.assertEqual(flat.nodes, html.nodes)
+        self.assertLess(flat.traced_bytes, html.traced_bytes / 2)
+
+
+class TestCodec(unittest.TestCase):
+    def test_measure_codec(self):
+        results = measure_codec(CorpusSpec(pages=3, page_size=1000), repeat=1)
+        self.assertEqual(
+            [r.codec for r in results],
+            ["pickle tree", "codec tree", "pickle flat", "codec flat"],
+        )
+        for result in results:
+            self.assertEqual(result.documents, 3)
+            self.assertGreater(result.bytes, 0)
+            self.assertIn("MB", str(result))
+        pickled, encoded = results[0], results[1]
+        self.assertLess(encoded.bytes, pickled.bytes)
+
+
+class TestPathological(unittest.TestCase):
+    def test_every_case_runs(self):
+        results = run_pathological(sizes=(10, 20), repeat=1, max_exponent=math.inf)
+        self.assertEqual([r.case for r in results], [case.name for case in CASES])
+        self.assertTrue(all(result.ok for result in results))
+
+    def _assert_scales_linearly(self, sizes, max_exponent):
+        for case in CASES:
+            with self.subTest(case=case.name):
+                result = measure_case(case, sizes, max_exponent=max_exponent)
+                if not result.ok:
+                    # a slow moment while timing one size is not a slow parser
+                    result = measure_case(case, sizes, max_exponent=max_exponent)
+                self.assertTrue(result.ok, str(result))
+
+    def test_cases_are_not_quadratic(self):
+        # two sizes far apart are cheap to time and still show a quadratic
+        # case, though noise at these sizes needs a loose bound
+        self._assert_scales_linearly((400, 6400), max_exponent=1.4)
+
+    # the full sizes take too long for every test run, so the tight bound is
+    # only checked on request
+    @unittest.skipUnless(os.environ.get("SSG_BENCHMARKS"), "set SSG_BENCHMARKS=1")
+    def test_cases_scale_linearly(self):
+        self._assert_scales_linearly(DEFAULT_SIZES, max_exponent=1.5)
+
+    def test_catches_backtracking(self):
+        # the link pattern backtracks over every later "[" when nothing closes
+        case = Case(
+            "regex", lambda n: "[" * n, lambda text: list(LINK_PATTERN.finditer(text))
+        )
+        result = measure_case(case, sizes=(500, 4000))
+        self.assertFalse(result.ok, str(result))
+        self.assertIn("FAIL", str(result))
+
+    def test_scaling_exponent(self):
+        self.assertAlmostEqual(scaling_exponent((1, 10, 100), (1, 100, 10000)), 2.0)
+        self.assertAlmostEqual(scaling_exponent((2, 4), (3, 6)), 1.0)
+        with self.assertRaises(ValueError):
+            scaling_exponent((2, 2), (1, 1))
+        with self.assertRaises(ValueError):
+            run_pathological(names=["no-such-case"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import itertools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import markdown_to_html as md2html_module
+from block_cache import BlockCache, block_key
+from cache_store import CacheStore
+from generate_page import PageBuildError, generate_pages_recursive
+from markdown_to_html import RenderBudgetExceeded, markdown_to_html, render_markdown
+from parse_markdown import BlockType
+
+DOCUMENT = """# Title
+
+Some **bold** text with a [link](/about) and `code`.
+
+- one
+- two
+
+> quoted
+
+```
+code block
+```
+
+1. first
+2. second
+
+_Disclaimer_: shared by every page."""
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        cache.put("c", "<p>c</p>")
+        self.assertNotIn("b", cache)
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_only_workers_keep_what_they_add(self):
+        cache = BlockCache()
+        cache.put("a", "<p>a</p>")
+        self.assertEqual(cache.drain(), ({}, 0, 0))
+        cache.get("a")
+        cache.start_worker()
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        self.assertEqual(cache.drain(), ({"b": "<p>b</p>"}, 1, 0))
+        self.assertEqual(cache.drain(), ({}, 0, 0))
+
+    def test_kept_in_the_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CacheStore(tmp)
+            cache = BlockCache(max_entries=1, store=store)
+            cache.put("a", "<p>a</p>")
+            cache.put("b", "<p>b</p>")
+            # evicted from memory, but not from the store
+            self.assertEqual(cache.get("a"), "<p>a</p>")
+
+            fresh = BlockCache(store=store)
+            self.assertEqual(fresh.get("b"), "<p>b</p>")
+            self.assertIsNone(fresh.get("c"))
+            self.assertEqual((fresh.hits, fresh.misses), (1, 1))
+
+    def test_key_covers_type_and_variant(self):
+        key = block_key("# x", BlockType.HEADING)
+        self.assertNotEqual(key, block_key("# x", BlockType.PARAGRAPH))
+        self.assertNotEqual(key, block_key("# x", BlockType.HEADING, "links"))
+        self.assertEqual(key, block_key("# x", BlockType.HEADING))
+
+
+class TestRenderMarkdown(unittest.TestCase):
+    def test_matches_the_node_tree(self):
+        expected = markdown_to_html(DOCUMENT).to_html()
+        self.assertEqual(render_markdown(DOCUMENT), expected)
+        cache = BlockCache()
+        self.assertEqual(render_markdown(DOCUMENT, cache), expected)
+        self.assertEqual(render_markdown(DOCUMENT, cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (7, 7))
+
+    def test_only_changed_blocks_are_rendered(self):
+        cache = BlockCache()
+        render_markdown(DOCUMENT, cache)
+        edited = DOCUMENT.replace("- two", "- three")
+        with mock.patch.object(
+            md2html_module, "md_to_paragraph", wraps=md2html_module.md_to_paragraph
+        ) as paragraph:
+            html = render_markdown(edited, cache)
+        self.assertEqual(html, markdown_to_html(edited).to_html())
+        self.assertEqual(cache.misses, 8)
+        paragraph.assert_not_called()
+
+    def test_rewrites_are_cached_by_variant(self):
+        def rewrite(node):
+            for child in node.children or []:
+                if child.props:
+                    child.props = {"href": "/site" + child.props["href"]}
+            return node
+
+        cache = BlockCache()
+        plain = render_markdown(DOCUMENT, cache)
+        rewritten = render_markdown(DOCUMENT, cache, rewrite, "site")
+        self.assertIn('href="/about"', plain)
+        self.assertIn('href="/site/about"', rewritten)
+        self.assertEqual(render_markdown(DOCUMENT, cache, rewrite, "site"), rewritten)
+
+    def test_time_budget(self):
+        self.assertEqual(
+            render_markdown(DOCUMENT, time_budget=60),
+            markdown_to_html(DOCUMENT).to_html(),
+        )
+        with self.assertRaises(RenderBudgetExceeded) as raised:
+            render_markdown("intro\n\n# Title", time_budget=0)
+        self.assertEqual(raised.exception.block.line, 0)
+        self.assertIn("paragraph block at line 1", str(raised.exception))
+
+    def test_time_budget_stops_a_long_list_part_way(self):
+        items = "\n".join(f"- item {i}" for i in range(1000))
+        text_to_children = mock.Mock(wraps=md2html_module.text_to_children)
+        ticks = itertools.count()
+        with (
+            mock.patch.object(md2html_module.time, "perf_counter", side_effect=ticks),
+            mock.patch.object(md2html_module, "text_to_children", text_to_children),
+            self.assertRaises(RenderBudgetExceeded) as raised,
+        ):
+            render_markdown(items, time_budget=2.5)
+        # one tick of the clock per item rendered
+        self.assertEqual(text_to_children.call_count, 3)
+        self.assertIn("unordered_list block at line 1", str(raised.exception))
+
+    def test_empty_document_raises(self):
+        with self.assertRaises(ValueError):
+            render_markdown("")
+
+
+class TestBlockCacheBuilds(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.content = os.path.join(self.root, "content")
+        os.makedirs(self.content)
+        for i in range(4):
+            with open(os.path.join(self.content, f"{i}.md"), "w") as f:
+                f.write(f"# Page {i}\n\n_Disclaimer_: shared by every page.")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _build(self, jobs: int, cache: BlockCache) -> None:
+        docs = os.path.join(self.root, f"docs{jobs}")
+        generate_pages_recursive(
+            self.content, self.template, docs, "/", jobs=jobs, cache=cache
+        )
+
+    def test_shared_blocks_are_rendered_once(self):
+        cache = BlockCache()
+        self._build(1, cache)
+        self.assertEqual((cache.hits, cache.misses), (3, 5))
+
+    def test_workers_hand_their_blocks_back(self):
+        cache = BlockCache()
+        self._build(2, cache)
+        self.assertEqual(len(cache), 5)
+        self.assertEqual(cache.hits + cache.misses, 8)
+        self._build(1, cache)
+        self.assertEqual(cache.hits + cache.misses, 16)
+        self.assertEqual(len(cache), 5)
+
+    def test_pages_over_the_time_budget_fail(self):
+        docs = os.path.join(self.root, "docs")
+        with self.assertRaises(PageBuildError) as raised:
+            generate_pages_recursive(
+                self.content, self.template, docs, "/", time_budget=0
+            )
+        self.assertEqual(len(raised.exception.failures), 4)
+        self.assertIn("RenderBudgetExceeded", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
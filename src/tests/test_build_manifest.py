@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import MANIFEST_NAME, BuildManifest, hash_file, hash_text
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _touch(self, rel: str) -> None:
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("x")
+
+    def test_load_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.root)
+        self.assertEqual(manifest.pages, {})
+
+    def test_load_corrupt_manifest_is_empty(self):
+        with open(os.path.join(self.root, MANIFEST_NAME), "w") as f:
+            f.write("{not json")
+        self.assertEqual(BuildManifest.load(self.root).pages, {})
+
+    def test_save_and_load_round_trip(self):
+        manifest = BuildManifest(self.root)
+        manifest.record("index.md", {"source": "a"}, "index.html")
+        manifest.save()
+        loaded = BuildManifest.load(self.root)
+        self.assertEqual(
+            loaded.pages, {"index.md": {"source": "a", "output": "index.html"}}
+        )
+
+    def test_is_current(self):
+        self._touch("index.html")
+        manifest = BuildManifest(self.root)
+        manifest.record("index.md", {"source": "a", "template": "t"}, "index.html")
+        self.assertTrue(
+            manifest.is_current(
+                "index.md", {"source": "a", "template": "t"}, "index.html"
+            )
+        )
+        self.assertFalse(
+            manifest.is_current(
+                "index.md", {"source": "b", "template": "t"}, "index.html"
+            )
+        )
+        self.assertFalse(
+            manifest.is_current("index.md", {"source": "a"}, "other/index.html")
+        )
+        self.assertFalse(manifest.is_current("other.md", {"source": "a"}, "index.html"))
+
+    def test_is_current_false_when_output_missing(self):
+        manifest = BuildManifest(self.root)
+        manifest.record("index.md", {"source": "a"}, "index.html")
+        self.assertFalse(manifest.is_current("index.md", {"source": "a"}, "index.html"))
+
+    def test_prune_returns_unreferenced_outputs(self):
+        manifest = BuildManifest(self.root)
+        manifest.record("a/index.md", {}, "a/index.html")
+        manifest.record("b/index.md", {}, "b/index.html")
+        manifest.record("b/other.md", {}, "b/index.html")
+        removed = manifest.prune({"b/other.md"})
+        self.assertEqual(removed, ["a/index.html"])
+        self.assertEqual(list(manifest.pages), ["b/other.md"])
+
+    def test_hash_helpers(self):
+        path = os.path.join(self.root, "file.txt")
+        with open(path, "w") as f:
+            f.write("hello")
+        self.assertEqual(hash_file(path), hash_text("hello"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import contextlib
+import fcntl
+import io
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import cache_store
+from cache_store import CacheStore
+from minify import CSSMinifier
+
+
+class TestCacheStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self._tmp.name, "cache")
+        self.store = CacheStore(self.root)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _put(self, name: str, data: bytes, used: int) -> str:
+        key = self.store.key(name)
+        self.store.put("blocks", key, data)
+        path = self.store._path("blocks", key)
+        os.utime(path, ns=(used, used))
+        return key
+
+    def test_put_and_get(self):
+        key = self.store.key("a")
+        self.assertIsNone(self.store.get("blocks", key))
+        self.store.put("blocks", key, b"<p>a</p>")
+        self.assertEqual(self.store.get("blocks", key), b"<p>a</p>")
+        self.assertIsNone(self.store.get("css", key))
+        with self.assertRaises(ValueError):
+            self.store.get("../blocks", key)
+
+    def test_keys_cover_the_generator_source(self):
+        key = self.store.key("a")
+        self.assertEqual(key, self.store.key("a"))
+        self.assertNotEqual(key, self.store.key("a", ""))
+        with mock.patch.object(cache_store, "generator_hash", return_value="other"):
+            self.assertNotEqual(key, self.store.key("a"))
+
+    def test_gc_removes_the_least_recently_used(self):
+        now = time.time_ns()
+        a = self._put("a", b"x" * 100, now - 3_000_000_000)
+        b = self._put("b", b"x" * 100, now - 2_000_000_000)
+        c = self._put("c", b"x" * 100, now - 1_000_000_000)
+        # reading marks an entry as used
+        self.store.get("blocks", a)
+
+        self.assertEqual(self.store.gc(max_bytes=250), (1, 100))
+        self.assertIsNone(self.store.get("blocks", b))
+        self.assertIsNotNone(self.store.get("blocks", a))
+        self.assertIsNotNone(self.store.get("blocks", c))
+        self.assertEqual(self.store.gc(max_bytes=250), (0, 0))
+
+    def test_gc_removes_abandoned_temporary_files(self):
+        key = self._put("a", b"x", time.time_ns())
+        shard = os.path.dirname(self.store._path("blocks", key))
+        fresh = os.path.join(shard, ".x.1.tmp")
+        stale = os.path.join(shard, ".x.2.tmp")
+        for path in (fresh, stale):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+        os.utime(stale, ns=(0, 0))
+
+        self.assertEqual(self.store.gc(), (1, 7))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertEqual(self.store.stats().entries, 1)
+
+    def test_gc_is_skipped_while_another_process_collects(self):
+        self._put("a", b"x" * 100, time.time_ns())
+        with open(os.path.join(self.root, "gc.lock"), "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            self.assertEqual(self.store.gc(max_bytes=0), (0, 0))
+        self.assertEqual(self.store.gc(max_bytes=0), (1, 100))
+
+    def test_concurrent_writers_never_expose_partial_entries(self):
+        key = self.store.key("shared")
+        values = [bytes([i]) * (1 << 16) * (i + 1) for i in range(8)]
+
+        def write(value: bytes) -> None:
+            for _ in range(10):
+                self.store.put("blocks", key, value)
+
+        with ThreadPoolExecutor(8) as pool:
+            writes = [pool.submit(write, value) for value in values]
+            while not all(w.done() for w in writes):
+                data = self.store.get("blocks", key)
+                self.assertIn(data, values + [None])
+        self.assertIn(self.store.get("blocks", key), values)
+        self.assertEqual(self.store.stats().entries, 1)
+
+    def test_stats_and_cli(self):
+        self._put("a", b"abc", time.time_ns())
+        self.store.put("css", self.store.key("b"), b"a{}")
+        stats = self.store.stats()
+        self.assertEqual((stats.entries, stats.bytes), (2, 6))
+        self.assertEqual(stats.namespaces, {"blocks": (1, 3), "css": (1, 3)})
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            cache_store.main(["gc", "--dir", self.root, "--max-mb", "0"])
+        self.assertIn("removed 2 entries", out.getvalue())
+        self.assertIn("0 entries", out.getvalue())
+
+    def test_css_minifier_uses_the_store(self):
+        CSSMinifier(self.store)("a { b: c; }")
+        minifier = CSSMinifier(self.store)
+        with mock.patch("minify.minify_css", side_effect=AssertionError):
+            self.assertEqual(minifier("a { b: c; }"), "a{b:c}")
+        self.assertEqual((minifier.hits, minifier.misses), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
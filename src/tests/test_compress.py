@@ -0,0 +1,123 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from build_manifest import MANIFEST_NAME, BuildManifest
+from compress import available_formats, compress_outputs, refresh_sidecars
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.public = self._tmp.name
+        self.page = self._write("index.html", "<p>hello</p>" * 100)
+        self._write(os.path.join("blog", "index.html"), "<p>post</p>" * 100)
+        self._write("index.css", "x")
+        self._write(os.path.join("images", "a.png"), "png" * 100)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, rel: str, text: str) -> str:
+        path = os.path.join(self.public, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _compress(self, **kwargs) -> tuple[int, int, int, int]:
+        stats = compress_outputs(self.public, formats=["gz"], **kwargs)
+        return stats.written, stats.skipped, stats.removed, stats.unprofitable
+
+    def test_writes_gzip_sidecars_for_text_outputs(self):
+        self.assertEqual(self._compress(), (2, 0, 0, 1))
+        with gzip.open(self.page + ".gz") as f:
+            self.assertEqual(f.read(), b"<p>hello</p>" * 100)
+        # not compressible enough, and not text
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css.gz")))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.public, "images", "a.png.gz"))
+        )
+
+    def test_sidecars_are_reproducible(self):
+        self._compress()
+        with open(self.page + ".gz", "rb") as f:
+            first = f.read()
+        os.remove(self.page + ".gz")
+        self._compress()
+        with open(self.page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_unchanged_outputs_are_skipped(self):
+        self._compress()
+        self.assertEqual(self._compress(), (0, 3, 0, 0))
+        # touched without changing: hashed, but not recompressed
+        os.utime(self.page, ns=(0, 0))
+        with mock.patch.dict(
+            "compress.COMPRESSORS", gz=mock.Mock(side_effect=AssertionError)
+        ):
+            self.assertEqual(self._compress(), (0, 3, 0, 0))
+
+    def test_identical_sidecars_are_not_counted_as_written(self):
+        self._compress()
+        # without the manifest every output is compressed again, to the same bytes
+        os.remove(os.path.join(self.public, MANIFEST_NAME))
+        self.assertEqual(self._compress(), (0, 2, 0, 1))
+
+    def test_changed_outputs_are_recompressed(self):
+        self._compress()
+        self._write("index.html", "<p>changed</p>" * 100)
+        self.assertEqual(self._compress(), (1, 2, 0, 0))
+        with gzip.open(self.page + ".gz") as f:
+            self.assertEqual(f.read(), b"<p>changed</p>" * 100)
+
+    def test_stale_sidecars_are_removed(self):
+        self._compress()
+        self._write("index.html", "tiny")
+        os.remove(os.path.join(self.public, "blog", "index.html"))
+        self.assertEqual(self._compress(), (0, 1, 2, 1))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertEqual(
+            sorted(BuildManifest.load(self.public).sidecars),
+            ["index.css", "index.html"],
+        )
+
+    def test_parallel_matches_serial(self):
+        for i in range(20):
+            self._write(os.path.join("many", f"{i}.html"), f"<p>{i}</p>" * 50)
+        self.assertEqual(self._compress(jobs=4), (22, 0, 0, 1))
+        self.assertEqual(self._compress(jobs=1), (0, 23, 0, 0))
+
+    def test_refresh_keeps_earlier_sidecars_current(self):
+        self._compress()
+        self._write("index.html", "<p>changed</p>" * 100)
+        os.remove(os.path.join(self.public, "blog", "index.html"))
+        self._write("new.html", "<p>new</p>" * 100)
+        stats = refresh_sidecars(self.public)
+        self.assertEqual((stats.written, stats.removed), (1, 1))
+        with gzip.open(self.page + ".gz") as f:
+            self.assertEqual(f.read(), b"<p>changed</p>" * 100)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        # never compressed, so not compressed now
+        self.assertFalse(os.path.exists(os.path.join(self.public, "new.html.gz")))
+        self.assertEqual(
+            sorted(BuildManifest.load(self.public).sidecars),
+            ["index.css", "index.html"],
+        )
+
+    def test_refresh_without_earlier_sidecars_does_nothing(self):
+        stats = refresh_sidecars(self.public)
+        self.assertEqual((stats.written, stats.skipped, stats.removed), (0, 0, 0))
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_unknown_format(self):
+        self.assertIn("gz", available_formats())
+        with self.assertRaises(ValueError):
+            compress_outputs(self.public, formats=["br"])
+
+
+if __name__ == "__main__":
+    unittest.main()
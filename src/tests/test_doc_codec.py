@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+
+import flat_document
+from doc_codec import CODEC_VERSION, CodecError, dumps, loads
+from flat_document import FlatDocument, flatten_markdown
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
+from html_void_node import VoidNode
+from htmlnode import EMPTY_PROPS, HTMLNode
+from markdown_to_html import markdown_to_html
+from tests.test_flat_document import DOCUMENT
+from textnode import TextNode, TextType
+
+
+class TestDocCodec(unittest.TestCase):
+    def test_tree_round_trip(self):
+        tree = markdown_to_html(DOCUMENT)
+        decoded = loads(dumps(tree))
+        self.assertEqual(decoded, tree)
+        self.assertEqual(decoded.to_html(), tree.to_html())
+
+    def test_tree_nodes_keep_their_class_and_slots(self):
+        tree = ParentNode(
+            "div",
+            [
+                VoidNode("meta", {"charset": "utf-8"}),
+                LeafNode("a", "x", {}),
+                LeafNode(None, "ünïcode \udcff"),
+                HTMLNode("span", "v", None, {"id": "s"}),
+            ],
+        )
+        decoded = loads(dumps(tree))
+        self.assertEqual(decoded, tree)
+        self.assertEqual(
+            [type(child) for child in decoded.children],  # type: ignore[union-attr]
+            [VoidNode, LeafNode, LeafNode, HTMLNode],
+        )
+        meta, link, text, span = decoded.children  # type: ignore[misc]
+        self.assertIs(link.props, EMPTY_PROPS)
+        self.assertIsNone(text.props)
+        self.assertIsNone(span.children)
+        self.assertIs(meta.tag, VoidNode("meta").tag)
+
+    def test_flat_round_trip(self):
+        document = flatten_markdown(DOCUMENT)
+        decoded = loads(dumps(document))
+        assert isinstance(decoded, FlatDocument)
+        self.assertEqual(decoded.to_html(), document.to_html())
+        self.assertEqual(decoded.to_tree(), document.to_tree())
+        self.assertEqual(decoded.strings, document.strings)
+        for column in ("kinds", "tags", "starts", "attribute_value_starts"):
+            with self.subTest(column=column):
+                self.assertEqual(getattr(decoded, column), getattr(document, column))
+        # the columns are stored narrower, but decoded to their usual types
+        self.assertEqual(decoded.starts.typecode, "q")
+        self.assertLess(len(dumps(document)), len(DOCUMENT) + document.nbytes())
+
+    def test_flat_names_are_renumbered_in_another_process(self):
+        document = flatten_markdown(DOCUMENT)
+        data = dumps(document)
+        html = document.to_html()
+        # a process that has seen other names first numbers them differently
+        with (
+            mock.patch.object(flat_document, "_NAMES", [""]),
+            mock.patch.object(flat_document, "_NAME_IDS", {"": 0}),
+        ):
+            flat_document.name_id("figure")
+            decoded = loads(data)
+            assert isinstance(decoded, FlatDocument)
+            self.assertNotEqual(decoded.tags, document.tags)
+            self.assertEqual(decoded.to_html(), html)
+
+    def test_invalid_data(self):
+        data = dumps(markdown_to_html(DOCUMENT))
+        other_version = data[:4] + (CODEC_VERSION + 1).to_bytes(2, "little") + data[6:]
+        for bad in (b"", b"XXXX" + data[4:], other_version, data[:-3], data + b"\0"):
+            with self.subTest(data=bad[:8]):
+                with self.assertRaises(CodecError):
+                    loads(bad)
+        self.assertTrue(issubclass(CodecError, ValueError))
+
+    def test_only_documents_are_encoded(self):
+        with self.assertRaises(TypeError):
+            dumps(TextNode("x", TextType.TEXT))  # type: ignore[arg-type]
+        with self.assertRaises(TypeError):
+            dumps(ParentNode("p", ["x"]))  # type: ignore[list-item]
+
+
+if __name__ == "__main__":
+    unittest.main()
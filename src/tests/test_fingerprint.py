@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fingerprint import ASSET_MANIFEST_NAME, fingerprint_assets, fingerprinted_name
+from generate_page import generate_pages_recursive
+from get_static import get_static_assets
+from link_rewriter import BasepathRule, FingerprintRule, LinkRewriter
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self._write(self.static, "index.css", "body {}")
+        self._write(self.static, os.path.join("images", "a.png"), "aaaa")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, root: str, rel: str, text: str) -> str:
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _build(self) -> dict[str, str]:
+        get_static_assets(self.static, self.public, strategy="copy")
+        return fingerprint_assets(self.public, strategy="copy")
+
+    def test_fingerprinted_name(self):
+        digest = "3f2a1c" + "0" * 58
+        self.assertEqual(fingerprinted_name("index.css", digest), "index.3f2a1c.css")
+        self.assertEqual(
+            fingerprinted_name("a/b/c.min.js", digest), "a/b/c.min.3f2a1c.js"
+        )
+        self.assertEqual(fingerprinted_name("LICENSE", digest), "LICENSE.3f2a1c")
+
+    def test_writes_hashed_copies_and_manifest(self):
+        mapping = self._build()
+        self.assertEqual(sorted(mapping), ["images/a.png", "index.css"])
+        for rel, hashed in mapping.items():
+            with open(os.path.join(self.public, hashed)) as f:
+                self.assertEqual(
+                    f.read(), "aaaa" if rel.endswith(".png") else "body {}"
+                )
+        with open(os.path.join(self.public, ASSET_MANIFEST_NAME)) as f:
+            self.assertEqual(json.load(f), mapping)
+
+    def test_changed_asset_replaces_its_old_fingerprint(self):
+        old = self._build()["index.css"]
+        self._write(self.static, "index.css", "p {}")
+        new = self._build()["index.css"]
+        self.assertNotEqual(old, new)
+        self.assertFalse(os.path.exists(os.path.join(self.public, old)))
+        self.assertTrue(os.path.exists(os.path.join(self.public, new)))
+
+    def test_unchanged_assets_are_not_rehashed(self):
+        self._build()
+        with mock.patch("fingerprint.hash_file", side_effect=AssertionError("hashed")):
+            self._build()
+
+    def test_pages_link_to_fingerprinted_assets(self):
+        mapping = self._build()
+        template = self._write(
+            self.root,
+            "template.html",
+            '<link href="/index.css" rel="stylesheet" />{{ Content }}',
+        )
+        content = os.path.join(self.root, "content")
+        self._write(content, "index.md", "# Home\n\n![a](/images/a.png)")
+        links = LinkRewriter([FingerprintRule(mapping), BasepathRule("/site/")])
+        generate_pages_recursive(content, template, self.public, "/site/", links=links)
+
+        with open(os.path.join(self.public, "index.html")) as f:
+            html = f.read()
+        self.assertIn(f'href="/site/{mapping["index.css"]}"', html)
+        self.assertIn(f'src="/site/{mapping["images/a.png"]}"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from flat_document import ELEMENT, LEAF, TEXT, flatten_markdown
+from link_rewriter import BasepathRule, LinkRewriter
+from markdown_to_html import markdown_to_html
+
+DOCUMENT = """# Title
+
+Some **bold** text with a [link](/about?a=1&b=2) and `code`.
+
+- one _two **three**_
+- ![an image](/image.png)
+
+> quoted **across
+> lines**
+
+```
+code block
+```
+
+1. first
+2. second"""
+
+
+class TestFlatDocument(unittest.TestCase):
+    def test_matches_the_node_tree(self):
+        document = flatten_markdown(DOCUMENT)
+        tree = markdown_to_html(DOCUMENT)
+        self.assertEqual(document.to_html(), tree.to_html())
+        self.assertEqual(document.to_tree(), tree)
+        self.assertEqual(len(document), 36)
+
+    def test_text_is_spans_of_the_source(self):
+        document = flatten_markdown(DOCUMENT)
+        self.assertEqual(document.kinds[:4].tolist(), [ELEMENT] * 4)
+        self.assertEqual((document.tag(0), document.parents[0]), ("html", -1))
+        self.assertEqual((document.tag(4), document.kinds[4]), (None, TEXT))
+        link = 10
+        self.assertEqual((document.tag(link), document.kinds[link]), ("a", LEAF))
+        self.assertEqual(document.tag(document.parents[link]), "p")
+        self.assertEqual(document.attributes(link), [("href", "/about?a=1&b=2")])
+        start, length = document.starts[link], document.lengths[link]
+        self.assertEqual(DOCUMENT[start : start + length], "link")
+        # the only text not found as it is in the source spans two quoted lines
+        self.assertEqual(document.strings, ["across\nlines"])
+
+    def test_text_after_joined_quote_lines_is_found(self):
+        quote = "> a _b_\n> c _d_\n> e"
+        document = flatten_markdown(quote)
+        self.assertEqual(document.to_html(), markdown_to_html(quote).to_html())
+        self.assertEqual(document.strings, ["\nc ", "\ne"])
+        # the emphasis after a joined line is still a span of the source
+        d = len(document) - 2
+        self.assertEqual(document.text(d), "d")
+        self.assertEqual(document.starts[d], quote.index("d"))
+
+    def test_iter_html_yields_fragments(self):
+        fragments = list(flatten_markdown("a **b**").iter_html())
+        self.assertEqual(
+            fragments,
+            ["<html>", "<body>", "<div>", "<p>", "a ", "<b>b</b>"]
+            + ["</p>", "</div>", "</body>", "</html>"],
+        )
+
+    def test_rewrite_links(self):
+        document = flatten_markdown(DOCUMENT)
+        tree = markdown_to_html(DOCUMENT)
+        links = LinkRewriter([BasepathRule("/site/")])
+        document.rewrite_links(links.rewrite_url)
+        self.assertEqual(document.to_html(), links.rewrite_tree(tree).to_html())
+        self.assertIn('src="/site/image.png"', document.to_html())
+
+    def test_same_errors_as_the_node_tree(self):
+        for markdown in ("", "- a\n- \n- b"):
+            with self.subTest(markdown=markdown):
+                with self.assertRaisesRegex(ValueError, "missing children"):
+                    markdown_to_html(markdown).to_html()
+                with self.assertRaisesRegex(ValueError, "missing children"):
+                    flatten_markdown(markdown).to_html()
+        with self.assertRaises(TypeError):
+            flatten_markdown(None)  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,308 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from build_manifest import MANIFEST_NAME
+from generate_page import (
+    PageBuildError,
+    generate_pages_recursive,
+    main,
+    page_time_budget,
+)
+from minify import MinifyOptions
+from link_rewriter import BasepathRule, LinkRewriter, TrailingSlashRule
+
+TEMPLATE = (
+    '<title>{{ Title }}</title><link href="/index.css"><main>{{ Content }}</main>'
+)
+
+
+class TestGeneratePagesRecursive(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self._write(self.template, TEMPLATE)
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self._write(
+            os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nBody"
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, path: str, text: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def _read(self, *parts: str) -> str:
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def _build(self, basepath: str = "/") -> None:
+        generate_pages_recursive(self.content, self.template, self.public, basepath)
+
+    def _mtime(self, *parts: str) -> int:
+        return os.stat(os.path.join(self.public, *parts)).st_mtime_ns
+
+    def _mark_stale(self, *parts: str) -> None:
+        os.utime(os.path.join(self.public, *parts), ns=(0, 0))
+
+    def test_renders_all_pages(self):
+        self._build("/base/")
+        home = self._read("index.html")
+        self.assertIn("<title>Home</title>", home)
+        self.assertIn('href="/base/index.css"', home)
+        self.assertIn("<p>Hello</p>", home)
+        self.assertIn("<h1>Post</h1>", self._read("blog", "post", "index.html"))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, MANIFEST_NAME)))
+
+    def test_unchanged_pages_are_not_rewritten(self):
+        self._build()
+        self._mark_stale("index.html")
+        self._mark_stale("blog", "post", "index.html")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self._build()
+        self.assertIn("<p>Changed</p>", self._read("index.html"))
+        self.assertNotEqual(self._mtime("index.html"), 0)
+        self.assertEqual(self._mtime("blog", "post", "index.html"), 0)
+
+    def test_template_change_rebuilds_every_page(self):
+        self._build()
+        self._mark_stale("blog", "post", "index.html")
+        self._write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self._build()
+        self.assertTrue(self._read("blog", "post", "index.html").startswith("<h2>Post"))
+
+    def test_basepath_change_rebuilds_every_page(self):
+        self._build("/")
+        self._build("/other/")
+        self.assertIn('href="/other/index.css"', self._read("index.html"))
+
+    def test_deleted_output_is_regenerated(self):
+        self._build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self._build()
+        self.assertIn("<p>Hello</p>", self._read("index.html"))
+
+    def test_removed_source_deletes_output(self):
+        self._build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self._build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post")))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+
+    def test_parallel_build_matches_serial_build(self):
+        self._build("/base/")
+        serial = {
+            rel: self._read(rel) for rel in ("index.html", "blog/post/index.html")
+        }
+        os.remove(os.path.join(self.public, MANIFEST_NAME))
+        generate_pages_recursive(
+            self.content, self.template, self.public, "/base/", jobs=2
+        )
+        for rel, html in serial.items():
+            self.assertEqual(self._read(rel), html)
+
+    def test_streamed_pages_match_rendered_pages(self):
+        self._write(
+            os.path.join(self.content, "blog", "post", "index.md"),
+            "---\ntitle: Meta title\n---\nIntro with a [link](/a).\n\n# Post\n\n- a\n- b",
+        )
+        for minify in (None, MinifyOptions(omit_optional_tags=True)):
+            with self.subTest(minify=minify):
+                rendered = os.path.join(self.public, "rendered")
+                streamed = os.path.join(self.public, "streamed")
+                for dest, threshold in ((rendered, None), (streamed, 0)):
+                    generate_pages_recursive(
+                        self.content,
+                        self.template,
+                        dest,
+                        "/base/",
+                        minify=minify,
+                        stream_threshold=threshold,
+                    )
+                for rel in ("index.html", os.path.join("blog", "post", "index.html")):
+                    self.assertEqual(
+                        self._read("streamed", rel), self._read("rendered", rel)
+                    )
+                post = self._read("streamed", "blog", "post", "index.html")
+                self.assertIn("<title>Meta title</title>", post)
+
+                stats = generate_pages_recursive(
+                    self.content,
+                    self.template,
+                    streamed,
+                    "/base/",
+                    minify=minify,
+                    stream_threshold=0,
+                )
+                self.assertEqual((stats.written, stats.skipped), (0, 2))
+
+    def test_streamed_failures_leave_no_output(self):
+        self._write(os.path.join(self.content, "index.md"), "no title")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                with self.assertRaises(PageBuildError) as cm:
+                    generate_pages_recursive(
+                        self.content,
+                        self.template,
+                        self.public,
+                        "/",
+                        jobs=jobs,
+                        stream_threshold=0,
+                    )
+                self.assertIn("missing a title", str(cm.exception))
+                self.assertEqual(
+                    sorted(os.listdir(self.public)), [MANIFEST_NAME, "blog"]
+                )
+                self.assertIn("<h1>Post</h1>", self._read("blog", "post", "index.html"))
+
+    def test_page_time_budget_grows_with_the_page(self):
+        self.assertEqual(page_time_budget(10, 100), 10)
+        self.assertEqual(page_time_budget(10, 3 << 20), 30)
+
+    def test_failures_are_collected_and_sorted(self):
+        self._write(os.path.join(self.content, "z", "index.md"), "no title")
+        self._write(os.path.join(self.content, "a", "index.md"), "no title either")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                with self.assertRaises(PageBuildError) as cm:
+                    generate_pages_recursive(
+                        self.content, self.template, self.public, "/", jobs=jobs
+                    )
+                sources = [source for source, _ in cm.exception.failures]
+                self.assertEqual(
+                    sources,
+                    [os.path.join("a", "index.md"), os.path.join("z", "index.md")],
+                )
+                self.assertIn("missing a title", str(cm.exception))
+                # the pages that did render are still written
+                self.assertIn("<p>Hello</p>", self._read("index.html"))
+
+    def test_front_matter_layout(self):
+        self._write(
+            os.path.join(os.path.dirname(self.template), "layouts", "post.html"),
+            '{% include "../partials/nav.html" %}<article>{{ Content }}</article>',
+        )
+        self._write(
+            os.path.join(os.path.dirname(self.template), "partials", "nav.html"),
+            '<nav><a href="/">{{ Title }}</a></nav>',
+        )
+        self._write(
+            os.path.join(self.content, "blog", "post", "index.md"),
+            "---\nlayout: layouts/post.html\n---\n# Post\n\nBody",
+        )
+        self._build("/base/")
+        self.assertEqual(
+            self._read("blog", "post", "index.html"),
+            '<nav><a href="/base/">Post</a></nav>'
+            "<article><html><body><div><h1>Post</h1></div>"
+            "<div><p>Body</p></div></body></html></article>",
+        )
+        self.assertIn("<title>Home</title>", self._read("index.html"))
+
+    def test_layout_change_rebuilds_its_pages(self):
+        layout = os.path.join(os.path.dirname(self.template), "post.html")
+        self._write(layout, "<old>{{ Content }}")
+        self._write(
+            os.path.join(self.content, "blog", "post", "index.md"),
+            "---\nlayout: post.html\n---\n# Post",
+        )
+        self._build()
+        self._mark_stale("index.html")
+        self._write(layout, "<new>{{ Content }}")
+        os.utime(layout, ns=(1, 1))
+        self._build()
+        self.assertTrue(self._read("blog", "post", "index.html").startswith("<new>"))
+        self.assertEqual(self._mtime("index.html"), 0)
+
+    def test_links_in_code_are_not_rewritten(self):
+        self._write(
+            os.path.join(self.content, "index.md"),
+            '# Home\n\n[home](/)\n\n```\n<a href="/x">\n```',
+        )
+        self._build("/base/")
+        home = self._read("index.html")
+        self.assertIn('<a href="/base/">home</a>', home)
+        self.assertIn('<code>```\n<a href="/x">\n```</code>', home)
+
+    def test_link_rules(self):
+        links = LinkRewriter([TrailingSlashRule("add"), BasepathRule("/base/")])
+        self._write(
+            os.path.join(self.content, "index.md"), "# Home\n\n[post](/blog/post)"
+        )
+        generate_pages_recursive(
+            self.content, self.template, self.public, "/base/", links=links
+        )
+        self.assertIn('<a href="/base/blog/post/">post</a>', self._read("index.html"))
+
+    def test_identical_output_is_not_rewritten(self):
+        self._build()
+        self._mark_stale("index.html")
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\n\n\nHello\n")
+        stats = generate_pages_recursive(self.content, self.template, self.public, "/")
+        self.assertEqual(self._mtime("index.html"), 0)
+        self.assertEqual((stats.written, stats.skipped, stats.removed), (0, 2, 0))
+
+    def test_stats(self):
+        stats = generate_pages_recursive(self.content, self.template, self.public, "/")
+        self.assertEqual((stats.written, stats.skipped, stats.removed), (2, 0, 0))
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self._write(os.path.join(self.content, "index.md"), "# Home\n\nNew")
+        stats = generate_pages_recursive(self.content, self.template, self.public, "/")
+        self.assertEqual((stats.written, stats.skipped, stats.removed), (1, 0, 1))
+
+    def test_rejects_non_string_paths(self):
+        with self.assertRaises(TypeError):
+            generate_pages_recursive(None, self.template, self.public, "/")  # type: ignore
+
+
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self._tmp.name)
+        os.makedirs("static")
+        self._write_page("Hello")
+        with open("template.html", "w") as f:
+            f.write(TEMPLATE)
+
+    def _write_page(self, text: str) -> None:
+        os.makedirs("content", exist_ok=True)
+        with open(os.path.join("content", "index.md"), "w") as f:
+            f.write(f"# Home\n\n{text * 100}")
+
+    def _main(self, *argv: str) -> None:
+        with redirect_stdout(io.StringIO()):
+            main(list(argv))
+
+    def test_watch_rejects_single_build_reports(self):
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            main(["--watch", "--profile"])
+
+    def test_build_without_compress_refreshes_sidecars(self):
+        self._main("--compress")
+        self._write_page("Changed")
+        self._main()
+        page = os.path.join("docs", "index.html")
+        with open(page, "rb") as f, gzip.open(page + ".gz") as g:
+            html = f.read()
+            self.assertIn(b"Changed", html)
+            self.assertEqual(g.read(), html)
+
+        os.remove(os.path.join("content", "index.md"))
+        self._main()
+        self.assertFalse(os.path.exists(page))
+        self.assertFalse(os.path.exists(page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
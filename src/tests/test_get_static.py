@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest
+from get_static import get_static_assets, map_bounded, update_static_assets
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self._write(self.static, "index.css", "body {}")
+        self._write(self.static, os.path.join("images", "a.png"), "aaaa")
+        self._write(self.static, os.path.join("images", "deep", "b.png"), "bbbb")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, root: str, rel: str, text: str) -> str:
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _read(self, rel: str) -> str:
+        with open(os.path.join(self.public, rel)) as f:
+            return f.read()
+
+    def _sync(self, **kwargs) -> tuple[int, int, int]:
+        # these tests edit files in place, which hardlinked copies would share
+        kwargs.setdefault("strategy", "copy")
+        stats = get_static_assets(self.static, self.public, **kwargs)
+        return stats.written, stats.skipped, stats.removed
+
+    def test_copies_everything_once(self):
+        self.assertEqual(self._sync(), (3, 0, 0))
+        self.assertEqual(self._read(os.path.join("images", "deep", "b.png")), "bbbb")
+        self.assertEqual(self._sync(), (0, 3, 0))
+        self.assertEqual(
+            sorted(BuildManifest.load(self.public).assets),
+            ["images/a.png", "images/deep/b.png", "index.css"],
+        )
+
+    def test_reports_strategies(self):
+        stats = get_static_assets(self.static, self.public)
+        self.assertEqual(sum(stats.strategies.values()), 3)
+        self.assertIn(next(iter(stats.strategies)), str(stats))
+
+    def test_thread_pool_matches_serial_sync(self):
+        for i in range(40):
+            self._write(
+                self.static, os.path.join(f"dir{i % 4}", f"{i}.txt"), str(i) * i
+            )
+        self.assertEqual(self._sync(concurrency=8), (43, 0, 0))
+        for i in range(0, 40, 7):
+            self.assertEqual(
+                self._read(os.path.join(f"dir{i % 4}", f"{i}.txt")), str(i) * i
+            )
+        self.assertEqual(self._sync(concurrency=1), (0, 43, 0))
+
+    def test_throughput_report(self):
+        stats = get_static_assets(self.static, self.public, strategy="copy")
+        self.assertEqual(stats.bytes, len("body {}aaaabbbb"))
+        self.assertGreater(stats.seconds, 0)
+        report = stats.report(n=2)
+        self.assertTrue(report.startswith("copied 3 files"))
+        self.assertEqual(len(report.splitlines()), 4)
+        self.assertIn("(copy)", report)
+
+    def test_map_bounded_keeps_order_and_is_lazy(self):
+        consumed: list[int] = []
+
+        def items():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        results = map_bounded(lambda i: i * 2, items(), workers=2)
+        self.assertEqual(next(results), 0)
+        self.assertLess(len(consumed), 100)
+        self.assertEqual(list(results), [i * 2 for i in range(1, 100)])
+        self.assertEqual(list(map_bounded(str, [1, 2], workers=1)), ["1", "2"])
+
+    def test_copies_changed_files(self):
+        self._sync()
+        self._write(self.static, "index.css", "p {}")
+        self.assertEqual(self._sync(), (1, 2, 0))
+        self.assertEqual(self._read("index.css"), "p {}")
+
+    def test_recopies_modified_output(self):
+        self._sync()
+        self._write(self.public, "index.css", "edited by hand")
+        self.assertEqual(self._sync(), (1, 2, 0))
+        self.assertEqual(self._read("index.css"), "body {}")
+
+    def test_checksum_sees_same_size_and_mtime_changes(self):
+        self._sync()
+        source = os.path.join(self.static, "index.css")
+        stat = os.stat(source)
+        self._write(self.static, "index.css", "body []")
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self._sync(), (0, 3, 0))
+        self.assertEqual(self._sync(checksum=True), (1, 2, 0))
+        self.assertEqual(self._read("index.css"), "body []")
+        self.assertEqual(self._sync(checksum=True), (0, 3, 0))
+
+    def test_removes_orphans_but_not_pages(self):
+        self._sync()
+        self._write(self.public, "index.html", "<p>page</p>")
+        os.remove(os.path.join(self.static, "images", "deep", "b.png"))
+        self.assertEqual(self._sync(), (0, 2, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "deep")))
+        self.assertEqual(self._read("index.html"), "<p>page</p>")
+
+    def test_clean_discards_pages(self):
+        self._sync()
+        self._write(self.public, "index.html", "<p>page</p>")
+        self.assertEqual(self._sync(clean=True), (3, 0, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_update_static_assets(self):
+        manifest = BuildManifest(self.public)
+        get_static_assets(self.static, self.public, manifest=manifest, strategy="copy")
+        new = self._write(self.static, "new.txt", "new")
+        os.remove(os.path.join(self.static, "index.css"))
+        stats = update_static_assets(
+            self.static,
+            self.public,
+            [new, os.path.join(self.static, "index.css")],
+            manifest,
+            strategy="copy",
+        )
+        self.assertEqual((stats.written, stats.removed), (1, 1))
+        self.assertEqual(self._read("new.txt"), "new")
+        self.assertNotIn("index.css", manifest.assets)
+        self.assertIn("new.txt", manifest.assets)
+
+        with self.assertRaises(ValueError):
+            update_static_assets(self.static, self.public, [self.public], manifest)
+
+
+if __name__ == "__main__":
+    unittest.main()
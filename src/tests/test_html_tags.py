@@ -1,6 +1,6 @@
 import unittest
 
-from html_tags import HTMLTags
+from html_tags import HTMLTags, attributes_to_html, escape_attribute, tag_markup
 from tests.utils import expected_error
 
 
@@ -80,6 +80,37 @@ class TestHTMLTags(unittest.TestCase):
     def test_closing_tag_invalid_raises(self):
         expected_error(self, lambda: HTMLTags.closing_tag("not-a-tag"), ValueError)  # type: ignore
 
+    def test_tag_markup(self):
+        self.assertEqual(tag_markup("p"), ("<p>", "<p", "</p>"))
+        self.assertIs(tag_markup(HTMLTags.PARAGRAPH), tag_markup("p"))
+        self.assertEqual(tag_markup("img").end, "</img>")
+        self.assertEqual(tag_markup("meta").end, "")
+
+    def test_tag_markup_of_tags_outside_the_enum(self):
+        self.assertEqual(tag_markup("table"), ("<table>", "<table", "</table>"))
+        self.assertIs(tag_markup("figure"), tag_markup("figure"))
+        self.assertEqual(tag_markup("br").end, "")
+        for bad in ("", "not a tag", "p>", "<p", None):
+            with self.subTest(tag=bad):
+                expected_error(self, lambda: tag_markup(bad), ValueError)  # type: ignore
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute("/a/b"), "/a/b")
+        self.assertEqual(
+            escape_attribute('say "a > b" & <c>'),
+            "say &quot;a &gt; b&quot; &amp; &lt;c&gt;",
+        )
+        # existing character references are not escaped twice
+        escaped = "a &amp; b &#38; &#x26;"
+        self.assertEqual(escape_attribute(escaped), escaped)
+
+    def test_attributes_to_html(self):
+        self.assertEqual(attributes_to_html({}), "")
+        self.assertEqual(
+            attributes_to_html({"href": "/a?b=1&c=2", "title": 'x">'}),
+            ' href="/a?b=1&amp;c=2" title="x&quot;&gt;"',
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
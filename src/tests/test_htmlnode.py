@@ -1,7 +1,12 @@
+import copy
+import pickle
 import unittest
 
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
 from html_tags import HTMLTags
-from htmlnode import HTMLNode
+from html_void_node import VoidNode
+from htmlnode import EMPTY_PROPS, HTMLNode
 from tests.utils import expected_error
 
 
@@ -59,12 +64,55 @@ class TestHTMLNode(unittest.TestCase):
         )
         self.assertEqual(expected, repr(node))
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode(props={"alt": 'a "quoted" > b', "href": "/?a=1&b=2"})
+        expected = ' alt="a &quot;quoted&quot; &gt; b" href="/?a=1&amp;b=2"'
+        self.assertEqual(node.props_to_html(), expected)
+
     def test_props_to_html_empty_when_props_none(self):
         self.assertEqual(HTMLNode().props_to_html(), "")
 
     def test_props_to_html_empty_when_props_empty_dict(self):
         self.assertEqual(HTMLNode(props={}).props_to_html(), "")
 
+    def test_nodes_have_no_instance_dict(self):
+        nodes = [
+            HTMLNode(),
+            LeafNode("b", "x"),
+            ParentNode("p", [LeafNode(None, "x")]),
+            VoidNode("meta"),
+        ]
+        for node in nodes:
+            with self.subTest(node=type(node).__name__):
+                self.assertFalse(hasattr(node, "__dict__"))
+                with self.assertRaises(AttributeError):
+                    node.extra = 1  # type: ignore[attr-defined]
+
+    def test_tags_are_interned(self):
+        level = 2
+        self.assertIs(HTMLNode(f"h{level}").tag, HTMLNode("h2").tag)
+
+    def test_empty_props_are_shared(self):
+        a, b = HTMLNode(props={}), LeafNode("a", "x", {})
+        self.assertIs(a.props, EMPTY_PROPS)
+        self.assertIs(b.props, EMPTY_PROPS)
+        self.assertEqual(a.props, {})
+        self.assertIsNone(HTMLNode().props)
+        # an empty dict and no props still differ, as before
+        self.assertEqual(a, HTMLNode(props={}))
+        self.assertNotEqual(a, HTMLNode())
+        with self.assertRaises(TypeError):
+            b.props["href"] = "/"  # type: ignore[index]
+        with self.assertRaises(TypeError):
+            b.props.update(href="/")  # type: ignore[union-attr]
+
+    def test_empty_props_survive_copies(self):
+        node = ParentNode("p", [LeafNode("a", "x", {})], {"class": "c"})
+        for clone in (pickle.loads(pickle.dumps(node)), copy.deepcopy(node)):
+            self.assertEqual(clone, node)
+            assert clone.children is not None
+            self.assertIs(clone.children[0].props, EMPTY_PROPS)
+
     def test_to_html_helper_without_props(self):
         node = HTMLNode()
         self.assertEqual(
@@ -86,6 +134,13 @@ class TestHTMLNode(unittest.TestCase):
             '<meta charset="utf-8">',
         )
 
+    def test_to_html_helper_value_with_closing_bracket(self):
+        node = HTMLNode(props={"title": "a>b"})
+        self.assertEqual(
+            node._to_html_helper("span", "<b>x</b>", node.props),
+            '<span title="a&gt;b"><b>x</b></span>',
+        )
+
     def test_eq_identical_nodes(self):
         props = {"href": "https://example.com", "target": "_blank"}
         children = [HTMLNode(tag="b", value="bold"), HTMLNode(tag=None, value=" text")]
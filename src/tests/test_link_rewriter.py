@@ -0,0 +1,136 @@
+import unittest
+
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
+from link_rewriter import (
+    BasepathRule,
+    CdnRule,
+    FingerprintRule,
+    LinkRewriter,
+    TrailingSlashRule,
+    is_external,
+)
+from tests.utils import expected_error
+
+
+class TestLinkRules(unittest.TestCase):
+    def test_basepath_prefixes_root_relative_urls_only(self):
+        rule = BasepathRule("/site/")
+        self.assertEqual(rule("/images/a.png", "img", "src"), "/site/images/a.png")
+        self.assertEqual(rule("/", "a", "href"), "/site/")
+        self.assertEqual(rule("https://x.dev/", "a", "href"), "https://x.dev/")
+        self.assertEqual(rule("//cdn.x.dev/a.png", "img", "src"), "//cdn.x.dev/a.png")
+        self.assertEqual(rule("relative/page", "a", "href"), "relative/page")
+
+    def test_cdn_only_rewrites_image_sources(self):
+        rule = CdnRule("https://cdn.x.dev/")
+        self.assertEqual(
+            rule("/images/a.png", "img", "src"), "https://cdn.x.dev/images/a.png"
+        )
+        self.assertEqual(rule("/blog", "a", "href"), "/blog")
+        self.assertEqual(
+            rule("https://y.dev/a.png", "img", "src"), "https://y.dev/a.png"
+        )
+
+    def test_fingerprint_maps_known_assets(self):
+        rule = FingerprintRule(
+            {"index.css": "index.3f2a1c.css", "a b.png": "a b.123456.png"}
+        )
+        self.assertEqual(rule("/index.css", "link", "href"), "/index.3f2a1c.css")
+        self.assertEqual(
+            rule("/index.css?v=2#x", "link", "href"), "/index.3f2a1c.css?v=2#x"
+        )
+        self.assertEqual(rule("/a%20b.png", "img", "src"), "/a%20b.123456.png")
+        self.assertEqual(rule("/other.css", "link", "href"), "/other.css")
+        self.assertEqual(rule("index.css", "link", "href"), "index.css")
+        self.assertNotEqual(rule.key(), FingerprintRule({}).key())
+
+    def test_trailing_slash_add(self):
+        rule = TrailingSlashRule("add")
+        self.assertEqual(rule("/blog/tom", "a", "href"), "/blog/tom/")
+        self.assertEqual(rule("/blog/tom#top", "a", "href"), "/blog/tom/#top")
+        self.assertEqual(rule("/blog/", "a", "href"), "/blog/")
+        self.assertEqual(rule("/index.css", "a", "href"), "/index.css")
+        self.assertEqual(rule("https://x.dev/a", "a", "href"), "https://x.dev/a")
+        self.assertEqual(rule("#top", "a", "href"), "#top")
+        self.assertEqual(rule("/index.css", "link", "href"), "/index.css")
+
+    def test_trailing_slash_strip(self):
+        rule = TrailingSlashRule("strip")
+        self.assertEqual(rule("/blog/tom/", "a", "href"), "/blog/tom")
+        self.assertEqual(rule("/blog/tom/?q=1", "a", "href"), "/blog/tom?q=1")
+        self.assertEqual(rule("/", "a", "href"), "/")
+
+    def test_trailing_slash_invalid_policy(self):
+        expected_error(self, lambda: TrailingSlashRule("sometimes"), ValueError)
+
+    def test_is_external(self):
+        self.assertTrue(is_external("https://x.dev"))
+        self.assertTrue(is_external("mailto:a@x.dev"))
+        self.assertTrue(is_external("//x.dev"))
+        self.assertFalse(is_external("/blog"))
+        self.assertFalse(is_external("blog/a:b"))
+
+
+class TestLinkRewriter(unittest.TestCase):
+    def setUp(self):
+        self.links = LinkRewriter(
+            [CdnRule("https://cdn.x.dev"), BasepathRule("/site/")]
+        )
+
+    def test_rewrite_tree(self):
+        tree = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/"}),
+                LeafNode(None, 'href="/not-a-link"'),
+                LeafNode("img", "", {"src": "/images/a.png", "alt": "/alt"}),
+                ParentNode("pre", [LeafNode("code", '<a href="/x">')]),
+            ],
+        )
+        self.assertIs(self.links.rewrite_tree(tree), tree)
+        self.assertEqual(
+            tree.to_html(),
+            '<p><a href="/site/">home</a>href="/not-a-link"'
+            '<img src="https://cdn.x.dev/images/a.png" alt="/alt"></img>'
+            '<pre><code><a href="/x"></code></pre></p>',
+        )
+
+    def test_rewrite_html(self):
+        html = (
+            '<link href="/index.css" rel="stylesheet" />'
+            '<img alt="x" src="/a.png">'
+            '<a class="c" href="https://x.dev/">x</a>'
+            '<p>src="/text"</p>'
+        )
+        self.assertEqual(
+            self.links.rewrite_html(html),
+            '<link href="/site/index.css" rel="stylesheet" />'
+            '<img alt="x" src="https://cdn.x.dev/a.png">'
+            '<a class="c" href="https://x.dev/">x</a>'
+            '<p>src="/text"</p>',
+        )
+
+    def test_rewrite_html_unterminated_attribute(self):
+        self.assertEqual(self.links.rewrite_html('<a href="/'), '<a href="/site/')
+
+    def test_digest_depends_on_rules(self):
+        self.assertEqual(
+            LinkRewriter.for_basepath("/a/").digest,
+            LinkRewriter([BasepathRule("/a/")]).digest,
+        )
+        self.assertNotEqual(
+            LinkRewriter.for_basepath("/a/").digest,
+            LinkRewriter.for_basepath("/b/").digest,
+        )
+
+    def test_no_rules_is_identity(self):
+        links = LinkRewriter()
+        node = LeafNode("a", "x", {"href": "/"})
+        links.rewrite_tree(node)
+        self.assertEqual(node.props, {"href": "/"})
+        self.assertEqual(links.rewrite_html('<a href="/">'), '<a href="/">')
+
+
+if __name__ == "__main__":
+    unittest.main()
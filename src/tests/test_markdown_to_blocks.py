@@ -1,7 +1,19 @@
+import io
 import unittest
 
 from parse_markdown import BlockType
 from parse_markdown import block_to_block_type as b2bt
+from parse_markdown import (
+    classify_block,
+    is_code,
+    is_heading,
+    is_ordered_list,
+    is_quote,
+    is_unordered_list,
+    iter_blocks,
+    read_front_matter,
+    scan_blocks,
+)
 from parse_markdown import markdown_to_blocks as md2b
 from tests.utils import expected_error
 
@@ -147,5 +159,99 @@ class TestBlockToBlockType(unittest.TestCase):
         self.assertEqual(b2bt(md), BlockType.PARAGRAPH)
 
 
+class TestScanBlocks(unittest.TestCase):
+    def test_blocks_are_typed_in_order_with_their_offsets(self):
+        md = (
+            "# Title\n"
+            "\n"
+            "\n"
+            "  para\n"
+            "graph  \n"
+            "\n"
+            "- a\n"
+            "- b\n"
+            "\n"
+            "para\n"
+            "\n"
+            "para"
+        )
+        blocks = scan_blocks(md)
+        self.assertEqual(
+            [(block.text, block.type, block.line) for block in blocks],
+            [
+                ("# Title", BlockType.HEADING, 0),
+                ("para\ngraph", BlockType.PARAGRAPH, 3),
+                ("- a\n- b", BlockType.UNDORDERED_LIST, 6),
+                ("para", BlockType.PARAGRAPH, 9),
+                ("para", BlockType.PARAGRAPH, 11),
+            ],
+        )
+        for block in blocks:
+            self.assertEqual(
+                md[block.offset : block.offset + len(block.text)], block.text
+            )
+
+    def test_whitespace_only_lines_do_not_separate_blocks(self):
+        md = "> a\n  \n> b\n\n \n\n```\ncode\n```"
+        self.assertEqual(
+            [(block.text, block.type) for block in scan_blocks(md)],
+            [("> a\n  \n> b", BlockType.PARAGRAPH), ("```\ncode\n```", BlockType.CODE)],
+        )
+
+    def test_iter_blocks_matches_scan_blocks(self):
+        documents = [
+            "# Title\n\n\n  para\ngraph  \n\n- a\n- b\n\npara\n\npara",
+            "> a\n  \n> b\n\n \n\n```\ncode\n```\n",
+            "\n\n  \n\nlast",
+            "",
+        ]
+        for md in documents:
+            with self.subTest(md=md):
+                self.assertEqual(list(iter_blocks(io.StringIO(md))), scan_blocks(md))
+
+    def test_read_front_matter(self):
+        f = io.StringIO("---\nlayout: post.html\n---\n# Title")
+        self.assertEqual(read_front_matter(f), {"layout": "post.html"})
+        self.assertEqual(f.read(), "# Title")
+        for md in ("# Title\n---\n", "---\nnever: closed\n"):
+            f = io.StringIO(md)
+            self.assertEqual(read_front_matter(f), {})
+            self.assertEqual(f.read(), md)
+        expected_error(
+            self, lambda: read_front_matter(io.StringIO("---\nbad\n---\n")), ValueError
+        )
+
+    def test_matches_the_block_predicates(self):
+        blocks = [
+            "######## seven",
+            "``` not code",
+            "```\n```",
+            "> a\n>b",
+            "> a\nb",
+            "- a\n-b",
+            "1. a\n2. b",
+            "1. a\n1. b",
+            "",
+            "\n",
+        ]
+        predicates = [
+            (is_heading, BlockType.HEADING),
+            (is_code, BlockType.CODE),
+            (is_quote, BlockType.QUOTE),
+            (is_unordered_list, BlockType.UNDORDERED_LIST),
+            (is_ordered_list, BlockType.ORDERED_LIST),
+        ]
+        for block in blocks:
+            expected = next(
+                (kind for matches, kind in predicates if matches(block)),
+                BlockType.PARAGRAPH,
+            )
+            with self.subTest(block=block):
+                self.assertEqual(classify_block(block), expected)
+
+    def test_invalid_input(self):
+        expected_error(self, lambda: scan_blocks(None), TypeError)  # type: ignore
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -195,6 +195,121 @@ class TestTextToTextNode(unittest.TestCase):
         ]
         self.assertEqual(expected, text_to_textnodes(text))
 
+    def test_nested_emphasis(self):
+        self.assertEqual(
+            text_to_textnodes("**bold _and italic_** done"),
+            [
+                TextNode(
+                    "bold and italic",
+                    TextType.BOLD,
+                    None,
+                    [
+                        TextNode("bold ", TextType.TEXT),
+                        TextNode("and italic", TextType.ITALIC),
+                    ],
+                ),
+                TextNode(" done", TextType.TEXT),
+            ],
+        )
+
+    def test_emphasis_left_open_closes_with_its_parent(self):
+        self.assertEqual(
+            text_to_textnodes("**a _b** c"),
+            [
+                TextNode(
+                    "a b",
+                    TextType.BOLD,
+                    None,
+                    [TextNode("a ", TextType.TEXT), TextNode("b", TextType.ITALIC)],
+                ),
+                TextNode(" c", TextType.TEXT),
+            ],
+        )
+
+    def test_code_spans_are_literal(self):
+        self.assertEqual(
+            text_to_textnodes("`2**3` and `snake_case_name`"),
+            [
+                TextNode("2**3", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("snake_case_name", TextType.CODE),
+            ],
+        )
+
+    def test_link_urls_are_literal(self):
+        self.assertEqual(
+            text_to_textnodes("![a](x_y_z.png) [b](/**c**)"),
+            [
+                TextNode("a", TextType.IMAGE, "x_y_z.png"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("b", TextType.LINK, "/**c**"),
+            ],
+        )
+
+    def test_links_are_matched_like_the_link_regex(self):
+        self.assertEqual(
+            text_to_textnodes("[a\n](u) ![b [c](d) [e](f\n) [g](h)"),
+            [
+                TextNode("[a\n](u) ![b ", TextType.TEXT),
+                TextNode("c", TextType.LINK, "d"),
+                TextNode(" [e](f\n) ", TextType.TEXT),
+                TextNode("g", TextType.LINK, "h"),
+            ],
+        )
+
+    def test_bracketed_prose_before_a_link_stays_text(self):
+        text = "See [1] and **note** or `code` at [docs](/docs)."
+        self.assertEqual(
+            text_to_textnodes(text),
+            [
+                TextNode("See [1] and ", TextType.TEXT),
+                TextNode("note", TextType.BOLD),
+                TextNode(" or ", TextType.TEXT),
+                TextNode("code", TextType.CODE),
+                TextNode(" at ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "/docs"),
+                TextNode(".", TextType.TEXT),
+            ],
+        )
+
+    def test_link_starts_at_the_nearest_bracket(self):
+        self.assertEqual(
+            text_to_textnodes("[sic] [x] [a [b](c) ![d [e](f)"),
+            [
+                TextNode("[sic] [x] [a ", TextType.TEXT),
+                TextNode("b", TextType.LINK, "c"),
+                TextNode(" ![d ", TextType.TEXT),
+                TextNode("e", TextType.LINK, "f"),
+            ],
+        )
+
+    def test_links_do_not_swallow_emphasis_or_code(self):
+        self.assertEqual(
+            text_to_textnodes("[a _b_ ](c) [ ]( `d` [e](f)"),
+            [
+                TextNode("[a ", TextType.TEXT),
+                TextNode("b", TextType.ITALIC),
+                TextNode(" ](c) [ ]( ", TextType.TEXT),
+                TextNode("d", TextType.CODE),
+                TextNode(" ", TextType.TEXT),
+                TextNode("e", TextType.LINK, "f"),
+            ],
+        )
+
+    def test_stray_brackets_are_scanned_in_linear_time(self):
+        text = "[1] " * 20000 + "](" + "[x]" * 20000 + "[a](b)"
+        nodes = text_to_textnodes(text)
+        self.assertEqual(nodes[-1], TextNode("a", TextType.LINK, "b"))
+
+    def test_nested_emphasis_renders_nested_tags(self):
+        nodes = text_to_textnodes("_it **and bold**_")
+        html = "".join(TextNode.text_node_to_html_node(n).to_html() for n in nodes)
+        self.assertEqual(html, "<i>it <b>and bold</b></i>")
+
+    def test_unmatched_brackets_are_text(self):
+        text = "[" * 20000 + "](" + "!" * 20000
+        self.assertEqual(text_to_textnodes(text), [TextNode(text, TextType.TEXT)])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,72 @@
+import errno
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from materialize import AUTO_ORDER, Materializer
+
+
+class TestMaterializer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.source = os.path.join(self.root, "static", "a.png")
+        os.makedirs(os.path.dirname(self.source))
+        with open(self.source, "wb") as f:
+            f.write(b"\x89PNG" + bytes(range(256)) * 64)
+        os.chmod(self.source, 0o640)
+        os.utime(self.source, ns=(1_000_000_000, 2_000_000_000))
+        self.dest = os.path.join(self.root, "public", "images", "a.png")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _assert_copy(self) -> None:
+        with open(self.source, "rb") as src, open(self.dest, "rb") as dst:
+            self.assertEqual(src.read(), dst.read())
+        source, dest = os.stat(self.source), os.stat(self.dest)
+        self.assertEqual(dest.st_mtime_ns, source.st_mtime_ns)
+        self.assertEqual(dest.st_mode, source.st_mode)
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), ["a.png"])
+
+    def test_every_strategy_makes_the_same_copy(self):
+        for strategy in AUTO_ORDER:
+            with self.subTest(strategy=strategy):
+                used = Materializer(strategy).materialize(self.source, self.dest)
+                self.assertIn(used, AUTO_ORDER)
+                self._assert_copy()
+                os.remove(self.dest)
+
+    def test_hardlink_shares_the_source(self):
+        materializer = Materializer("hardlink")
+        self.assertEqual(materializer.materialize(self.source, self.dest), "hardlink")
+        self.assertTrue(os.path.samefile(self.source, self.dest))
+
+    def test_auto_falls_back_and_remembers(self):
+        materializer = Materializer()
+        unsupported = OSError(errno.EOPNOTSUPP, "no reflinks")
+        cross_device = OSError(errno.EXDEV, "cross-device link")
+        with mock.patch.dict(
+            "materialize._COPIERS", reflink=mock.Mock(side_effect=unsupported)
+        ):
+            with mock.patch("os.link", side_effect=cross_device) as link:
+                for _ in range(2):
+                    used = materializer.materialize(self.source, self.dest)
+                    self.assertEqual(used, "copy_file_range")
+        self.assertEqual(link.call_count, 1)
+        self._assert_copy()
+
+    def test_real_errors_propagate(self):
+        with mock.patch("shutil.copyfile", side_effect=OSError(errno.EIO, "bad disk")):
+            with self.assertRaises(OSError):
+                Materializer("copy").materialize(self.source, self.dest)
+        self.assertEqual(os.listdir(os.path.dirname(self.dest)), [])
+
+    def test_invalid_strategy(self):
+        with self.assertRaises(ValueError):
+            Materializer("teleport")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,7 @@ from markdown_to_html import md_to_ordered_list as md2ol
 from markdown_to_html import md_to_paragraph as md2p
 from markdown_to_html import md_to_unordered_list as md2ul
 from markdown_to_html import text_to_children as t2c
+from parse_markdown import Block
 from tests.utils import expected_error
 
 
@@ -409,21 +410,24 @@ code
             ),
         )
 
-    def test_duplicate_blocks_keep_last_due_to_dict(self):
+    def test_duplicate_blocks_are_kept(self):
         md = "Repeat\n\nRepeat"
         node = md2html(md)
         self.assertEqual(
-            node.to_html(), "<html><body><div><p>Repeat</p></div></body></html>"
+            node.to_html(),
+            "<html><body><div><p>Repeat</p></div><div><p>Repeat</p></div></body></html>",
         )
 
     def test_invalid_block_type_raises(self):
-        original_b2bt = md2html_module.b2bt
+        original_scan_blocks = md2html_module.scan_blocks
         try:
-            md2html_module.b2bt = lambda _: "unknown"  # type: ignore[assignment]
+            md2html_module.scan_blocks = lambda md: [  # type: ignore[assignment]
+                Block(md, "unknown", 0, 0)  # type: ignore[arg-type]
+            ]
             fn = lambda: md2html("Paragraph")
             expected_error(self, fn, ValueError)
         finally:
-            md2html_module.b2bt = original_b2bt
+            md2html_module.scan_blocks = original_scan_blocks
 
 
 class TestMarkdownToParagraph(unittest.TestCase):
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+
+from generate_page import generate_pages_recursive
+from get_static import get_static_assets
+from minify import (
+    CSSMinifier,
+    HTMLMinifier,
+    MinifyOptions,
+    minify_attributes,
+    minify_css,
+    minify_html,
+)
+
+PAGE = """<!doctype html>
+<html>
+
+<head>
+    <meta charset="utf-8" />
+    <!-- a comment -->
+    <title>  A   page </title>
+    <link href="/index.css" rel="stylesheet" />
+</head>
+
+<body>
+    <ul>
+        <li>one <b>bold</b> <i>two</i></li>
+        <li>three</li>
+    </ul>
+    <p>para
+       graph</p>
+    <div><p>last</p></div>
+    <pre><code>  keep
+    this  </code></pre>
+    <p>inline <code>a  b</code> code</p>
+    <script>if (a  <  b) { x(); }</script>
+</body>
+
+</html>
+"""
+
+
+class TestMinifyHTML(unittest.TestCase):
+    def test_collapses_whitespace_outside_pre_and_code(self):
+        self.assertEqual(
+            minify_html(PAGE),
+            "<!doctype html><html><head><meta charset=utf-8><title>A page</title>"
+            "<link href=/index.css rel=stylesheet></head><body>"
+            "<ul><li>one <b>bold</b> <i>two</i></li><li>three</li></ul>"
+            "<p>para graph</p><div><p>last</p></div>"
+            "<pre><code>  keep\n    this  </code></pre>"
+            "<p>inline <code>a  b</code> code</p>"
+            "<script>if (a  <  b) { x(); }</script></body></html>",
+        )
+
+    def test_omits_optional_end_tags(self):
+        self.assertEqual(
+            minify_html(PAGE, MinifyOptions(omit_optional_tags=True)),
+            "<!doctype html><html><head><meta charset=utf-8><title>A page</title>"
+            "<link href=/index.css rel=stylesheet><body>"
+            "<ul><li>one <b>bold</b> <i>two</i><li>three</ul>"
+            "<p>para graph<div><p>last</div>"
+            "<pre><code>  keep\n    this  </code></pre>"
+            "<p>inline <code>a  b</code> code</p>"
+            "<script>if (a  <  b) { x(); }</script>",
+        )
+
+    def test_keeps_p_end_tag_inside_links(self):
+        options = MinifyOptions(omit_optional_tags=True)
+        self.assertEqual(minify_html("<a><p>x</p></a>", options), "<a><p>x</p></a>")
+        self.assertEqual(
+            minify_html("<p>x</p><span>y</span>", options), "<p>x</p><span>y</span>"
+        )
+        self.assertEqual(minify_html("<p>x</p>tail", options), "<p>x</p>tail")
+        self.assertEqual(
+            minify_html("<p><img src=a.png></img></p>", options),
+            "<p><img src=a.png></p>",
+        )
+
+    def test_inline_whitespace_is_kept(self):
+        self.assertEqual(
+            minify_html("<p>a <b>b</b>\n\n<i>c</i></p>"), "<p>a <b>b</b> <i>c</i></p>"
+        )
+
+    def test_attribute_quoting(self):
+        self.assertEqual(
+            minify_attributes(
+                ' href="/a/b" alt="two words" class=\'x\' title=\'say "hi"\' hidden data-x=""'
+            ),
+            ' href=/a/b alt="two words" class=x title="say &quot;hi&quot;" hidden data-x',
+        )
+
+    def test_streaming_matches_one_shot(self):
+        expected = minify_html(PAGE, MinifyOptions(True))
+        for size in (1, 2, 7, 64):
+            minifier = HTMLMinifier(MinifyOptions(True))
+            parts = [
+                minifier.feed(PAGE[i : i + size]) for i in range(0, len(PAGE), size)
+            ]
+            parts.append(minifier.close())
+            self.assertEqual("".join(parts), expected, size)
+
+    def test_stray_angle_brackets_are_text(self):
+        self.assertEqual(
+            minify_html("<p>1 < 2 and 3 > 2</p>"), "<p>1 < 2 and 3 > 2</p>"
+        )
+
+
+class TestMinifyCSS(unittest.TestCase):
+    def test_minify_css(self):
+        css = """
+        /* layout */
+        body , p > a {
+            margin : 0 auto ;
+            width: calc(100% - 2px);
+            font-family: "Open  Sans", serif;
+        }
+        a :hover { color: red; }
+        """
+        self.assertEqual(
+            minify_css(css),
+            'body,p>a{margin :0 auto;width:calc(100% - 2px);font-family:"Open  Sans",serif}'
+            "a :hover{color:red}",
+        )
+
+    def test_cached_by_content(self):
+        minifier = CSSMinifier()
+        self.assertEqual(minifier("a { b: c; }"), "a{b:c}")
+        self.assertEqual(minifier("a { b: c; }"), "a{b:c}")
+        self.assertEqual((minifier.hits, minifier.misses), (1, 1))
+
+
+class TestMinifyStages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, rel: str, text: str) -> str:
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _read(self, rel: str) -> str:
+        with open(os.path.join(self.root, rel)) as f:
+            return f.read()
+
+    def test_pages_are_minified_and_rebuilt_when_the_option_changes(self):
+        template = self._write(
+            "template.html", "<html>\n  <body>\n{{ Content }}\n  </body>\n</html>"
+        )
+        content = os.path.join(self.root, "content")
+        self._write(os.path.join("content", "index.md"), "# Home\n\n- a\n- b")
+        docs = os.path.join(self.root, "docs")
+
+        generate_pages_recursive(content, template, docs, "/")
+        self.assertIn("\n", self._read(os.path.join("docs", "index.html")))
+
+        options = MinifyOptions(omit_optional_tags=True)
+        stats = generate_pages_recursive(content, template, docs, "/", minify=options)
+        self.assertEqual(stats.written, 1)
+        html = self._read(os.path.join("docs", "index.html"))
+        self.assertNotIn("\n", html)
+        self.assertIn("<li>a<li>b</ul>", html)
+
+    def test_css_is_minified_once(self):
+        self._write(os.path.join("static", "index.css"), "a {\n  color: red;\n}\n")
+        static = os.path.join(self.root, "static")
+        public = os.path.join(self.root, "public")
+
+        stats = get_static_assets(static, public, minify=True)
+        self.assertEqual(dict(stats.strategies), {"minify-css": 1})
+        self.assertEqual(
+            self._read(os.path.join("public", "index.css")), "a{color:red}"
+        )
+        self.assertEqual(get_static_assets(static, public, minify=True).skipped, 1)
+
+        stats = get_static_assets(static, public, strategy="copy")
+        self.assertEqual(stats.written, 1)
+        self.assertEqual(
+            self._read(os.path.join("public", "index.css")), "a {\n  color: red;\n}\n"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from output_writer import (
+    FileStamp,
+    StreamingOutput,
+    WriteStats,
+    atomic_write,
+    write_if_changed,
+)
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.path = os.path.join(self.root, "out", "index.html")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def _mark_stale(self) -> None:
+        os.utime(self.path, ns=(0, 0))
+
+    def test_writes_new_file(self):
+        self.assertTrue(write_if_changed(self.path, b"<p>hi</p>"))
+        self.assertEqual(self._read(), b"<p>hi</p>")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+    def test_skips_identical_content(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        self._mark_stale()
+        self.assertFalse(write_if_changed(self.path, b"<p>hi</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+    def test_rewrites_changed_content_of_same_size(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        self.assertTrue(write_if_changed(self.path, b"<p>yo</p>"))
+        self.assertEqual(self._read(), b"<p>yo</p>")
+
+    def test_previous_stamp_avoids_reading_the_file(self):
+        data = b"<p>hi</p>"
+        write_if_changed(self.path, data)
+        stamp = FileStamp.of(data)
+        with mock.patch("builtins.open", side_effect=AssertionError("read")):
+            self.assertFalse(write_if_changed(self.path, data, stamp, stamp))
+
+    def test_atomic_write_cleans_up_after_failure(self):
+        atomic_write(self.path, b"old")
+        with mock.patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                atomic_write(self.path, b"new")
+        self.assertEqual(self._read(), b"old")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_atomic_write_keeps_mode(self):
+        atomic_write(self.path, b"old")
+        os.chmod(self.path, 0o600)
+        atomic_write(self.path, b"new")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_streaming_output(self):
+        with StreamingOutput(self.path) as out:
+            for piece in ("<p>", "héllo", "</p>"):
+                out.write(piece)
+        data = "<p>héllo</p>".encode("utf-8")
+        self.assertEqual(out.result, (True, FileStamp.of(data)))
+        self.assertEqual(self._read(), data)
+
+        self._mark_stale()
+        with StreamingOutput(self.path) as out:
+            out.write("<p>héllo</p>")
+        self.assertEqual(out.result, (False, FileStamp.of(data)))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_streaming_output_is_discarded_after_failure(self):
+        write_if_changed(self.path, b"<p>old</p>")
+        with self.assertRaises(RuntimeError):
+            with StreamingOutput(self.path) as out:
+                out.write("<p>partial")
+                raise RuntimeError
+        self.assertIsNone(out.result)
+        self.assertEqual(self._read(), b"<p>old</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_write_stats_str(self):
+        stats = WriteStats()
+        stats.written, stats.skipped, stats.removed = 1, 2, 3
+        self.assertEqual(str(stats), "1 written, 2 skipped, 3 removed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -29,6 +29,16 @@ class TestParentNode(unittest.TestCase):
         parent_node = ParentNode("div", [child_node])
         self.assertEqual(parent_node.to_html(), "<div><span>child</span></div>")
 
+    def test_tags_outside_the_enum(self):
+        caption = ParentNode("figcaption", [LeafNode(None, "a table")])
+        table = ParentNode("table", [ParentNode("tr", [LeafNode("td", "1")])])
+        node = ParentNode("figure", [table, caption], {"class": "wide"})
+        self.assertEqual(
+            node.to_html(),
+            '<figure class="wide"><table><tr><td>1</td></tr></table>'
+            "<figcaption>a table</figcaption></figure>",
+        )
+
     def test_to_html_with_grandchildren(self):
         grandchild_node = LeafNode("b", "grandchild")
         child_node = ParentNode("span", [grandchild_node])
@@ -80,6 +90,31 @@ class TestParentNode(unittest.TestCase):
         expected = """<html><head><title>My First HTML</title><meta charset="UTF-8"></head><body><div style="background-color:#FFF4A3;"><span><h2>London</h2><p>CSS styles are added to make it easier to separate the divs, and to make them more pretty:)</p></span></div></body></html>"""
         self.assertEqual(html_node.to_html(), expected)
 
+    def test_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(10_000):
+            node = ParentNode("blockquote", [node])
+        html = node.to_html()
+        self.assertEqual(
+            html, "<blockquote>" * 10_000 + "deep" + "</blockquote>" * 10_000
+        )
+
+    def test_content_is_not_substituted(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode(None, "{{{}}}"),
+                ParentNode("b", [LeafNode(None, "x")], {"title": "{{{}}}"}),
+            ],
+        )
+        self.assertEqual(node.to_html(), '<p>{{{}}}<b title="{{{}}}">x</b></p>')
+
+    def test_children_must_be_nodes(self):
+        parent_node = ParentNode("div", [LeafNode("b", "bold"), "</div>"])  # type: ignore
+        _ = expected_error(self, parent_node.to_html, ValueError)
+        nested = ParentNode("div", [ParentNode("span", [])])
+        _ = expected_error(self, nested.to_html, ValueError)
+
 
 if __name__ == "__main__":
     unittest.main()
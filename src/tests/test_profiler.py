@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+import profiler
+from generate_page import generate_pages_recursive
+from html_leafnode import LeafNode
+from html_parentnode import ParentNode
+from profiler import BuildProfiler
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_stages_are_attributed_to_the_current_page(self):
+        p = BuildProfiler()
+        with p.page("a.md"):
+            with p.stage("read"):
+                pass
+        with p.stage("read"):
+            pass
+        self.assertIn("read", p.pages["a.md"])
+        self.assertGreaterEqual(p.stages["read"], p.pages["a.md"]["read"])
+        self.assertIn("total", p.pages["a.md"])
+
+    def test_slowest_pages_ranked_by_total(self):
+        p = BuildProfiler()
+        p.pages = {
+            "fast": {"total": 0.1},
+            "slow": {"total": 2.0},
+            "mid": {"total": 1.0},
+        }
+        self.assertEqual([name for name, _ in p.slowest_pages(2)], ["slow", "mid"])
+
+    def test_report_lists_every_stage(self):
+        report = BuildProfiler().report()
+        self.assertEqual(list(report["stages"]), list(profiler.STAGES))
+        self.assertEqual(report["counters"], {})
+
+    def test_count_nodes(self):
+        tree = ParentNode(
+            "div", [LeafNode("p", "a"), ParentNode("p", [LeafNode(None, "b")])]
+        )
+        self.assertEqual(profiler.count_nodes(tree), 4)
+
+
+class TestModuleProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.disable()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(profiler.active())
+        with profiler.stage("read"), profiler.page("a.md"):
+            profiler.count("regex")
+
+    def test_build_reports_stages_and_counters(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write(
+                    "# Title\n\nSome **bold** text and a [link](/a).\n\n- one\n- two"
+                )
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+
+            p = profiler.enable()
+            generate_pages_recursive(content, template, os.path.join(root, "docs"), "/")
+            profiler.disable()
+
+            page = os.path.join(content, "index.md")
+            self.assertEqual(list(p.pages), [page])
+            for name in profiler.STAGES:
+                self.assertIn(name, p.pages[page], name)
+            self.assertEqual(p.counters["pages"], 1)
+            self.assertGreater(p.counters["nodes"], 1)
+            self.assertGreater(p.counters["regex"], 0)
+            self.assertGreater(p.counters["bytes_written"], 0)
+
+            path = os.path.join(root, "profile.json")
+            p.write_json(path)
+            with open(path) as f:
+                report = json.load(f)
+            self.assertEqual(report["counters"]["pages"], 1)
+            self.assertIn(page, p.format_table(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
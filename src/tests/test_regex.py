@@ -4,6 +4,7 @@ from parse_markdown import (
     extract_markdown_images,
     extract_markdown_links,
     extract_title,
+    split_front_matter,
 )
 from tests.utils import expected_error
 
@@ -70,5 +71,29 @@ class TestExtractTitle(unittest.TestCase):
         self.assertEqual(title, expected)
 
 
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_without_front_matter(self):
+        md = "# A title\n\nSome text"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_with_front_matter(self):
+        md = "---\nlayout: layouts/post.html\ntitle: A: B\n---\n# A title"
+        self.assertEqual(
+            split_front_matter(md),
+            ({"layout": "layouts/post.html", "title": "A: B"}, "# A title"),
+        )
+
+    def test_unterminated_front_matter_is_content(self):
+        md = "---\nlayout: x\n\n# A title"
+        self.assertEqual(split_front_matter(md), ({}, md))
+
+    def test_invalid_line_raises(self):
+        md = "---\nnot a pair\n---\n# A title"
+        _ = expected_error(self, lambda: split_front_matter(md), ValueError)
+
+    def test_wrong_input_type(self):
+        _ = expected_error(self, lambda: split_front_matter(None), TypeError)  # type: ignore
+
+
 if __name__ == "__main__":
     unittest.main()
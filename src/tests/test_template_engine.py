@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from template_engine import (
+    clear_template_cache,
+    compile_template,
+    load_template,
+    resolve_layout,
+)
+from tests.utils import expected_error
+
+
+class TestTemplateEngine(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        clear_template_cache()
+
+    def tearDown(self):
+        clear_template_cache()
+        self._tmp.cleanup()
+
+    def _write(self, name: str, text: str) -> str:
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_compiles_into_segments_and_slots(self):
+        path = self._write("t.html", "<title>{{ Title }}</title><p>{{Content}}</p>")
+        template = compile_template(path)
+        self.assertEqual(template.segments, ("<title>", "</title><p>", "</p>"))
+        self.assertEqual(template.slots, ("Title", "Content"))
+
+    def test_render(self):
+        path = self._write("t.html", "<title>{{ Title }}</title>{{ Content }}")
+        html = compile_template(path).render({"Title": "T", "Content": "<p>c</p>"})
+        self.assertEqual(html, "<title>T</title><p>c</p>")
+
+    def test_stream(self):
+        path = self._write(
+            "t.html", "<title>{{ Title }}</title>{{ Content }}<p>{{ Content }}</p>"
+        )
+        parts: list[str] = []
+        template = compile_template(path)
+        template.stream(
+            {"Title": "T"}, parts.append, "Content", lambda: parts.append("c")
+        )
+        self.assertEqual("".join(parts), "<title>T</title>c<p>c</p>")
+        self.assertEqual(
+            "".join(parts), template.render({"Title": "T", "Content": "c"})
+        )
+        with self.assertRaises(ValueError):
+            template.stream({}, parts.append, "Content", lambda: None)
+
+    def test_render_does_not_rescan_slot_values(self):
+        path = self._write("t.html", "{{ Content }}|{{ Title }}")
+        html = compile_template(path).render({"Title": "x", "Content": "{{ Title }}"})
+        self.assertEqual(html, "{{ Title }}|x")
+
+    def test_render_missing_slot_raises(self):
+        path = self._write("t.html", "{{ Title }}")
+        expected_error(self, lambda: compile_template(path).render({}), ValueError)
+
+    def test_includes_are_inlined(self):
+        self._write("partials/head.html", "<head>{{ Title }}</head>")
+        path = self._write(
+            "t.html", '<html>{% include "partials/head.html" %}{{ Content }}</html>'
+        )
+        template = compile_template(path)
+        self.assertEqual(template.slots, ("Title", "Content"))
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            "<html><head>T</head>C</html>",
+        )
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_recursive_include_raises(self):
+        self._write("a.html", "{% include 'b.html' %}")
+        self._write("b.html", "{% include 'a.html' %}")
+        path = os.path.join(self.root, "a.html")
+        expected_error(self, lambda: compile_template(path), ValueError)
+
+    def test_load_template_is_cached(self):
+        path = self._write("t.html", "{{ Title }}")
+        self.assertIs(load_template(path), load_template(path))
+
+    def test_load_template_recompiles_when_a_partial_changes(self):
+        partial = self._write("p.html", "old")
+        path = self._write("t.html", "{% include 'p.html' %}")
+        first = load_template(path)
+        self._write("p.html", "newer")
+        os.utime(partial, ns=(1, 1))
+        second = load_template(path)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({}), "newer")
+        self.assertNotEqual(first.digest, second.digest)
+
+    def test_map_literals_is_cached_and_skips_slots(self):
+        path = self._write("t.html", 'href="/a" {{ Content }}')
+        template = compile_template(path)
+        mapped = template.map_literals("k", lambda text: text.replace("/", "/b/"))
+        self.assertIs(mapped, template.map_literals("k", lambda text: text))
+        self.assertEqual(mapped.render({"Content": "/c"}), 'href="/b/a" /c')
+
+    def test_resolve_layout(self):
+        default = os.path.join(self.root, "template.html")
+        self.assertEqual(resolve_layout(default, None), default)
+        self.assertEqual(
+            resolve_layout(default, "layouts/post.html"),
+            os.path.join(self.root, "layouts", "post.html"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
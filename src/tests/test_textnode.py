@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from tests.utils import expected_error
@@ -95,6 +96,12 @@ class TestTextNode(unittest.TestCase):
         cm = expected_error(self, fn, ValueError)
         self.assertEqual(str(cm.exception), "images must have a url")
 
+    def test_has_no_instance_dict(self):
+        node = TextNode("x", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        clone = pickle.loads(pickle.dumps(TextNode("x", TextType.BOLD, None, [node])))
+        self.assertEqual(clone, TextNode("x", TextType.BOLD, None, [node]))
+
     def test_invalid_text_type_raises(self):
         node = TextNode("x", TextType.TEXT)
         node.text_type = "not-a-texttype"  # type: ignore[assignment]
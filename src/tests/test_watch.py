@@ -0,0 +1,171 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs
+from link_rewriter import FingerprintRule, LinkRewriter
+from minify import MinifyOptions
+from template_engine import clear_template_cache
+from watch import SiteWatcher, changed_paths, snapshot_tree
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_changed_paths(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(changed_paths(old, new), {"b", "c", "d"})
+
+    def test_snapshot_tree(self):
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(os.path.join(root, "a", "b"))
+            for rel in ("top.md", os.path.join("a", "b", "deep.md")):
+                with open(os.path.join(root, rel), "w") as f:
+                    f.write("x")
+            snapshot = snapshot_tree(root)
+            self.assertEqual(
+                sorted(os.path.relpath(path, root) for path in snapshot),
+                [os.path.join("a", "b", "deep.md"), "top.md"],
+            )
+            self.assertEqual(snapshot_tree(os.path.join(root, "missing")), {})
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self._write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self._write(os.path.join(self.static, "index.css"), "body {}")
+        self._write(os.path.join(self.content, "index.md"), "# Home")
+        self._write(os.path.join(self.content, "a", "index.md"), "# A")
+        self.logs: list[str] = []
+        clear_template_cache()
+        self.watcher = self._watcher()
+        self.watcher.full_build()
+
+    def _watcher(self, **kwargs) -> SiteWatcher:
+        return SiteWatcher(
+            self.content,
+            self.static,
+            self.template,
+            self.public,
+            LinkRewriter.for_basepath("/"),
+            interval=0.01,
+            debounce=0.01,
+            log=self.logs.append,
+            **kwargs,
+        )
+
+    def tearDown(self):
+        clear_template_cache()
+        self._tmp.cleanup()
+
+    def _write(self, path: str, text: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        # make sure the change is visible even on coarse mtime filesystems
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def _read(self, *parts: str) -> str:
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def test_full_build(self):
+        self.assertEqual(
+            self._read("index.html"),
+            "<title>Home</title><html><body><div><h1>Home</h1></div></body></html>",
+        )
+        self.assertEqual(self._read("index.css"), "body {}")
+
+    def test_no_changes_times_out(self):
+        self.assertEqual(self.watcher.wait_for_changes(timeout=0.03), set())
+
+    def test_page_change_rebuilds_only_that_page(self):
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        path = os.path.join(self.content, "a", "index.md")
+        self._write(path, "# A changed")
+        changed = self.watcher.wait_for_changes(timeout=1)
+        self.assertEqual(changed, {path})
+        stats = self.watcher.rebuild(changed)
+        self.assertEqual((stats.written, stats.skipped), (1, 0))
+        self.assertIn("A changed", self._read("a", "index.html"))
+        home = os.path.join(self.public, "index.html")
+        self.assertEqual(os.stat(home).st_mtime_ns, 0)
+
+    def test_new_and_removed_pages(self):
+        self._write(os.path.join(self.content, "b", "c", "index.md"), "# C")
+        os.remove(os.path.join(self.content, "a", "index.md"))
+        stats = self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        self.assertEqual((stats.written, stats.removed), (1, 1))
+        self.assertIn("<h1>C</h1>", self._read("b", "c", "index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "a", "index.html")))
+
+    def test_rebuilds_refresh_earlier_sidecars(self):
+        path = os.path.join(self.content, "a", "index.md")
+        self._write(path, "# A\n\n" + "words " * 200)
+        self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        compress_outputs(self.public, formats=["gz"], manifest=self.watcher.manifest)
+        page = os.path.join(self.public, "a", "index.html")
+
+        self._write(path, "# A\n\n" + "changed " * 200)
+        self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        with gzip.open(page + ".gz") as f:
+            self.assertEqual(f.read().decode(), self._read("a", "index.html"))
+        os.remove(path)
+        self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        self.assertFalse(os.path.exists(page + ".gz"))
+
+    def test_template_change_rebuilds_pages(self):
+        self._write(self.template, "<h2>{{ Title }}</h2>")
+        stats = self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        self.assertEqual(stats.written, 2)
+        self.assertEqual(self._read("a", "index.html"), "<h2>A</h2>")
+
+    def test_static_change_is_copied(self):
+        self._write(os.path.join(self.static, "index.css"), "p {}")
+        self._write(os.path.join(self.static, "images", "new.txt"), "new")
+        self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        self.assertEqual(self._read("index.css"), "p {}")
+        self.assertEqual(self._read("images", "new.txt"), "new")
+
+    def test_build_options_are_kept(self):
+        self._write(self.template, "<title>{{ Title }}</title>\n\n  {{ Content }}")
+        self.watcher.full_build()
+        # minifying is an input of every page, so they are rebuilt once
+        self.assertEqual(self._watcher(minify=MinifyOptions())._build_all().written, 2)
+        self.assertNotIn("\n", self._read("index.html"))
+        watcher = self._watcher(minify=MinifyOptions())
+        self.assertEqual(watcher._build_all().written, 0)
+        path = os.path.join(self.content, "a", "index.md")
+        self._write(path, "# A\n\n\n\ntext")
+        watcher.rebuild(watcher.wait_for_changes(timeout=1))
+        self.assertEqual(self._watcher(minify=MinifyOptions())._build_all().written, 0)
+
+    def test_fingerprinted_links_follow_asset_changes(self):
+        self._write(self.template, '<link href="/index.css">{{ Content }}')
+        watcher = self._watcher(
+            fingerprint=lambda mapping: LinkRewriter([FingerprintRule(mapping)])
+        )
+        watcher.full_build()
+        before = self._read("index.html")
+        self.assertRegex(before, r'href="/index\.[0-9a-f]+\.css"')
+
+        self._write(os.path.join(self.static, "index.css"), "p {}")
+        stats = watcher.rebuild(watcher.wait_for_changes(timeout=1))
+        self.assertEqual(stats.written, 2)
+        self.assertNotEqual(self._read("index.html"), before)
+
+    def test_broken_page_is_logged(self):
+        self._write(os.path.join(self.content, "a", "index.md"), "no title")
+        self.watcher.rebuild(self.watcher.wait_for_changes(timeout=1))
+        self.assertTrue(any("missing a title" in line for line in self.logs))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,12 +25,24 @@ class TextType(Enum):
 
 
 class TextNode:
+    """
+    A span of inline text. Bold and italic spans with other spans nested in
+    them hold those as `children`; their `text` is the children's text joined.
+    """
+
+    __slots__ = ("text", "text_type", "url", "children")
+
     def __init__(
-        self, text: str, text_type: TextType, url: Optional[str] = None
+        self,
+        text: str,
+        text_type: TextType,
+        url: Optional[str] = None,
+        children: Optional[list[TextNode]] = None,
     ) -> None:
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
 
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, TextNode):
@@ -39,16 +51,27 @@ class TextNode:
             (self.text == value.text)
             and (self.text_type == value.text_type)
             and (self.url == value.url)
+            and (self.children == value.children)
         )
 
     def __repr__(self) -> str:
+        if self.children:
+            return f"TextNode({self.text_type.value}, {self.children})"
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
     @staticmethod
     def text_node_to_html_node(text_node: TextNode):
         from html_leafnode import LeafNode
+        from html_parentnode import ParentNode
         from htmlnode import HTMLNode
 
+        if text_node.children:
+            tag = {TextType.BOLD: "b", TextType.ITALIC: "i"}.get(text_node.text_type)
+            if tag is None:
+                raise ValueError(f"{text_node.text_type} spans cannot be nested")
+            children = [TextNode.text_node_to_html_node(c) for c in text_node.children]
+            return ParentNode(tag, children)
+
         match text_node.text_type:
             case TextType.TEXT:
                 return LeafNode(None, text_node.text)
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable, Iterable, Optional
+
+from block_cache import BlockCache
+from build_manifest import BuildManifest
+from cache_store import CacheStore
+from compress import compress_outputs, refresh_sidecars
+from fingerprint import fingerprint_assets
+from generate_page import (
+    DEFAULT_STREAM_THRESHOLD,
+    PageBuildError,
+    build_pages,
+    generate_pages_recursive,
+    remove_output,
+)
+from get_static import DEFAULT_CONCURRENCY, get_static_assets, update_static_assets
+from link_rewriter import LinkRewriter
+from minify import MinifyOptions
+from output_writer import WriteStats
+from template_engine import cached_dependencies, load_template
+
+# path -> (mtime, size)
+Snapshot = dict[str, tuple[int, int]]
+
+
+def snapshot_tree(root: str) -> Snapshot:
+    """Stats every file below `root` with `os.scandir`, without following symlinked dirs."""
+    result: Snapshot = {}
+    stack: list[str] = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        result[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    # deleted between listing and stat; the next poll will see it
+                    continue
+    return result
+
+
+def snapshot_files(paths: Iterable[str]) -> Snapshot:
+    result: Snapshot = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        result[path] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def changed_paths(old: Snapshot, new: Snapshot) -> set[str]:
+    """Paths that were added, removed or modified between two snapshots."""
+    changed = {path for path, stamp in new.items() if old.get(path) != stamp}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+class SiteWatcher:
+    """
+    Polls the content, static and template files and rebuilds what changed.
+    Bursts of changes (an editor saving several files, a `git checkout`) are
+    debounced into a single rebuild. Rendered blocks are kept between rebuilds,
+    so an edit only re-renders the blocks it changed.
+
+    Pages and assets are built with the same options as `generate_page.main`
+    takes: `minify`, `cache` and `store`, `time_budget` and `stream_threshold`
+    for pages, `clean`, `checksum`, `strategy` and `static_jobs` for assets.
+    With `fingerprint`, assets get content-hashed copies after every sync and
+    pages link through `fingerprint(mapping)`, the rewriter for the hashed
+    copies. With `compress`, outputs get compressed sidecars after every build;
+    without it, only sidecars written by an earlier build are kept current.
+    """
+
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        template_file: str,
+        dest_dir: str,
+        links: LinkRewriter,
+        jobs: int = 1,
+        minify: Optional[MinifyOptions] = None,
+        cache: Optional[BlockCache] = None,
+        store: Optional[CacheStore] = None,
+        time_budget: Optional[float] = None,
+        stream_threshold: Optional[int] = DEFAULT_STREAM_THRESHOLD,
+        clean: bool = False,
+        checksum: bool = False,
+        strategy: str = "auto",
+        static_jobs: int = DEFAULT_CONCURRENCY,
+        fingerprint: Optional[Callable[[dict[str, str]], LinkRewriter]] = None,
+        compress: bool = False,
+        compress_jobs: int = os.cpu_count() or 1,
+        interval: float = 0.5,
+        debounce: float = 0.1,
+        log: Callable[[str], None] = print,
+    ) -> None:
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_file = os.path.abspath(template_file)
+        self.dest_dir = os.path.abspath(dest_dir)
+        self.links = links
+        self.jobs = jobs
+        self.minify = minify
+        self.cache = cache if cache is not None else BlockCache()
+        self.store = store
+        self.time_budget = time_budget
+        self.stream_threshold = stream_threshold
+        self.clean = clean
+        self.checksum = checksum
+        self.strategy = strategy
+        self.static_jobs = static_jobs
+        self.fingerprint = fingerprint
+        self.compress = compress
+        self.compress_jobs = compress_jobs
+        self.interval = interval
+        self.debounce = debounce
+        self.log = log
+        self.manifest = BuildManifest.load(self.dest_dir)
+        self._snapshot: Snapshot = {}
+
+    def take_snapshot(self) -> Snapshot:
+        snapshot = snapshot_tree(self.content_dir)
+        snapshot.update(snapshot_tree(self.static_dir))
+        snapshot.update(snapshot_files(self._template_files()))
+        return snapshot
+
+    def _template_files(self) -> set[str]:
+        return cached_dependencies() | {self.template_file}
+
+    def full_build(self) -> None:
+        get_static_assets(
+            self.static_dir,
+            self.dest_dir,
+            clean=self.clean,
+            checksum=self.checksum,
+            manifest=self.manifest,
+            strategy=self.strategy,
+            concurrency=self.static_jobs,
+            minify=self.minify is not None,
+            store=self.store,
+        )
+        if self.clean:
+            # the output directory was cleared, manifest included
+            self.manifest = BuildManifest.load(self.dest_dir)
+        self._fingerprint()
+        try:
+            self._build_all()
+        except PageBuildError as e:
+            self.log(str(e))
+        self._update_sidecars()
+        self._snapshot = self.take_snapshot()
+
+    def _build_all(self) -> WriteStats:
+        return generate_pages_recursive(
+            self.content_dir,
+            self.template_file,
+            self.dest_dir,
+            "",
+            manifest=self.manifest,
+            jobs=self.jobs,
+            links=self.links,
+            minify=self.minify,
+            cache=self.cache,
+            time_budget=self.time_budget,
+            stream_threshold=self.stream_threshold,
+        )
+
+    def _fingerprint(self) -> bool:
+        """Fingerprints the assets; returns whether the links of pages changed."""
+        if self.fingerprint is None:
+            return False
+        mapping = fingerprint_assets(self.dest_dir, self.manifest, self.strategy)
+        links = self.fingerprint(mapping)
+        changed = links.digest != self.links.digest
+        self.links = links
+        return changed
+
+    def _update_sidecars(self) -> None:
+        if self.compress:
+            compress_outputs(
+                self.dest_dir, jobs=self.compress_jobs, manifest=self.manifest
+            )
+        else:
+            # the compressed copies of rewritten and removed outputs would be stale
+            refresh_sidecars(self.dest_dir, self.compress_jobs, self.manifest)
+
+    def wait_for_changes(self, timeout: Optional[float] = None) -> set[str]:
+        """
+        Blocks until something changes, then keeps polling every `debounce` seconds
+        until a poll finds nothing new. Returns every path that changed, or an
+        empty set if `timeout` passed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed: set[str] = set()
+        while True:
+            snapshot = self.take_snapshot()
+            new = changed_paths(self._snapshot, snapshot)
+            self._snapshot = snapshot
+            if new:
+                changed |= new
+            elif changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline and not changed:
+                return changed
+            time.sleep(self.debounce if changed else self.interval)
+
+    def rebuild(self, changed: set[str]) -> WriteStats:
+        """Rebuilds the pages and assets affected by the `changed` paths."""
+        stats = WriteStats()
+        templates = self._template_files()
+        static_prefix = self.static_dir + os.sep
+        content_prefix = self.content_dir + os.sep
+
+        static_paths = sorted(p for p in changed if p.startswith(static_prefix))
+        relinked = False
+        if static_paths:
+            update_static_assets(
+                self.static_dir,
+                self.dest_dir,
+                static_paths,
+                self.manifest,
+                self.strategy,
+                self.minify is not None,
+                self.store,
+            )
+            relinked = self._fingerprint()
+
+        failures: list[tuple[str, str]] = []
+        if changed & templates or relinked:
+            # any page may use the changed template or link to a changed asset,
+            # so let the manifest decide
+            try:
+                stats = self._build_all()
+            except PageBuildError as e:
+                failures = e.failures
+        else:
+            pages: list[tuple[str, str]] = []
+            removed: list[str] = []
+            for path in sorted(changed):
+                if not (path.startswith(content_prefix) and path.endswith(".md")):
+                    continue
+                rel_dir = os.path.relpath(os.path.dirname(path), self.content_dir)
+                dest_dir = os.path.normpath(os.path.join(self.dest_dir, rel_dir))
+                if os.path.isfile(path):
+                    pages.append((path, dest_dir))
+                else:
+                    removed.append(os.path.relpath(path, self.content_dir))
+
+            stats, failures = build_pages(
+                pages,
+                self.content_dir,
+                self.template_file,
+                self.manifest,
+                self.links,
+                self.jobs,
+                self.minify,
+                self.cache,
+                self.time_budget,
+                self.stream_threshold,
+            )
+            for output in self.manifest.discard(removed):
+                if remove_output(self.dest_dir, output):
+                    stats.removed += 1
+            self.manifest.save()
+
+        self._update_sidecars()
+        if failures:
+            self.log(str(PageBuildError(failures)))
+        # layouts used for the first time must be watched from now on
+        self._snapshot.update(snapshot_files(self._template_files()))
+        return stats
+
+    def run(self, max_rebuilds: Optional[int] = None) -> None:
+        load_template(self.template_file)
+        self.full_build()
+        self.log(f"watching {self.content_dir}, {self.static_dir} and templates")
+        rebuilds = 0
+        while max_rebuilds is None or rebuilds < max_rebuilds:
+            changed = self.wait_for_changes()
+            started = time.perf_counter()
+            try:
+                stats = self.rebuild(changed)
+            except Exception as e:
+                # keep watching; the next save will most likely fix it
+                self.log(f"rebuild failed: {type(e).__name__}: {e}")
+            else:
+                elapsed = (time.perf_counter() - started) * 1000
+                self.log(f"rebuilt {len(changed)} file(s) in {elapsed:.1f}ms: {stats}")
+            rebuilds += 1